@@ -0,0 +1,140 @@
+# admin_management/dashboard_cache.py
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache, caches
+
+from staff_management.models import DataVersion
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "dashboard"
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+STATS_FLUSH_SECONDS = 10
+
+_stats_lock = threading.Lock()
+_local_stats = Counter()        # (endpoint, "hits"|"misses") -> count
+_stats_flushed = [time.monotonic()]
+
+ALL_DOMAINS = (
+    DataVersion.DOMAIN_BOOKING,
+    DataVersion.DOMAIN_INCOME,
+    DataVersion.DOMAIN_EXPENSE,
+)
+
+
+class DashboardCache:
+    """
+    Response cache for the dashboard endpoints, held per worker in the
+    "dashboard" cache (see settings.CACHES); hit/miss counters go to the
+    shared default cache.
+
+    Keys combine the endpoint, its resolved parameters (including the date the
+    period was resolved against) and the current DataVersion of every domain
+    the response reads. Writes bump the version, so entries are never served
+    stale; they are simply no longer looked up and expire on their own.
+    """
+
+    @staticmethod
+    def key(endpoint, params, versions):
+        raw = json.dumps({"params": params, "versions": versions}, sort_keys=True, default=str)
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f"{KEY_PREFIX}:{endpoint}:{digest}"
+
+    @staticmethod
+    def get_or_compute(endpoint, params, compute, domains=ALL_DOMAINS, versions=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Cached result of compute(). `versions` are {domain: version} already
+        read for this request (see conditional_get); otherwise `domains` are
+        looked up.
+        """
+        if versions is None:
+            versions = DataVersion.current(*domains)
+        key = DashboardCache.key(endpoint, params, versions)
+
+        responses = caches["dashboard"]
+        data = responses.get(key)
+        if data is not None:
+            DashboardCache._count(endpoint, "hits")
+            return data
+
+        DashboardCache._count(endpoint, "misses")
+        data = compute()
+        responses.set(key, data, timeout)
+        return data
+
+    @staticmethod
+    def _count(endpoint, outcome):
+        # Counted in-process and pushed to the shared cache every few seconds,
+        # so a hit costs no extra cache writes
+        with _stats_lock:
+            _local_stats[(endpoint, outcome)] += 1
+            due = time.monotonic() - _stats_flushed[0] >= STATS_FLUSH_SECONDS
+        if due:
+            DashboardCache.flush_stats()
+
+    @staticmethod
+    def flush_stats():
+        with _stats_lock:
+            pending = dict(_local_stats)
+            _local_stats.clear()
+            _stats_flushed[0] = time.monotonic()
+        if not pending:
+            return
+
+        totals = Counter()
+        for (endpoint, outcome), count in pending.items():
+            totals[f"{KEY_PREFIX}:stats:{endpoint}:{outcome}"] += count
+            totals[f"{KEY_PREFIX}:stats:{outcome}"] += count
+
+        try:
+            for key, count in totals.items():
+                if not cache.add(key, count, None):
+                    cache.incr(key, count)
+
+            endpoints = set(cache.get(f"{KEY_PREFIX}:stats:endpoints") or [])
+            new = {endpoint for endpoint, _outcome in pending} - endpoints
+            if new:
+                cache.set(f"{KEY_PREFIX}:stats:endpoints", sorted(endpoints | new), None)
+        except Exception as e:
+            logger.error(f"Failed to store dashboard cache stats: {str(e)}")
+
+    @staticmethod
+    def stats():
+        """Hit/miss counters across all workers, plus the current data versions."""
+        DashboardCache.flush_stats()
+
+        def counters(prefix):
+            hits = cache.get(f"{prefix}:hits") or 0
+            misses = cache.get(f"{prefix}:misses") or 0
+            total = hits + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 3) if total else None,
+            }
+
+        endpoints = cache.get(f"{KEY_PREFIX}:stats:endpoints") or []
+        return {
+            **counters(f"{KEY_PREFIX}:stats"),
+            "endpoints": {
+                endpoint: counters(f"{KEY_PREFIX}:stats:{endpoint}") for endpoint in endpoints
+            },
+            "versions": DataVersion.current(*ALL_DOMAINS),
+        }
+
+    @staticmethod
+    def reset_stats():
+        with _stats_lock:
+            _local_stats.clear()
+        endpoints = cache.get(f"{KEY_PREFIX}:stats:endpoints") or []
+        keys = [f"{KEY_PREFIX}:stats:endpoints"]
+        for prefix in [f"{KEY_PREFIX}:stats"] + [f"{KEY_PREFIX}:stats:{e}" for e in endpoints]:
+            keys += [f"{prefix}:hits", f"{prefix}:misses"]
+        cache.delete_many(keys)
@@ -1,9 +1,12 @@
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models import DEFERRED
 from django.utils import timezone
 from django.dispatch import receiver
 from django.db.models.signals import post_delete, pre_save
 
+from staff_management.models import DocumentSequence
+
 
 
 ########### models.py #############
@@ -48,16 +51,36 @@ class User(AbstractUser):
         db_table = 'users'
         ordering = ['-id']
 
+    STAFF_ID_PREFIX = "SHORELUXSTAFF"
+
+    # File fields whose loaded names are remembered to clean up replaced files
+    TRACKED_FILE_FIELDS = ("aadhaar_card", "profile_image")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FILE_FIELDS and value is not DEFERRED
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         if self.role == "STAFF" and not self.staff_unique_id:
-            prefix = "SHORELUXSTAFF"
-            last_user = User.objects.filter(staff_unique_id__startswith=prefix).order_by('-id').first()
-
-            last_num = int(last_user.staff_unique_id.replace(prefix, '')) if last_user else 0
-            self.staff_unique_id = f"{prefix}{(last_num + 1):03d}"
+            number = DocumentSequence.reserve(DocumentSequence.STAFF, start=User._last_staff_number)[0]
+            self.staff_unique_id = f"{self.STAFF_ID_PREFIX}{number:03d}"
 
         super().save(*args, **kwargs)
 
+        self._loaded_values = {
+            name: getattr(self, name).name for name in self.TRACKED_FILE_FIELDS
+        }
+
+    @classmethod
+    def _last_staff_number(cls):
+        return DocumentSequence.last_used(cls.objects.all(), "staff_unique_id", cls.STAFF_ID_PREFIX)
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -78,29 +101,22 @@ def delete_user_files(sender, instance, **kwargs):
         pass
 
 
-# When replacing a file on an existing User, delete the old file to avoid orphaned files
+# When replacing a file on an existing User, delete the old file to avoid orphaned files.
+# The previous file names come from the values the instance was loaded with, so no re-fetch.
 @receiver(pre_save, sender=User)
 def auto_delete_file_on_change(sender, instance, **kwargs):
     if not instance.pk:
         return
-    try:
-        old = User.objects.get(pk=instance.pk)
-    except User.DoesNotExist:
-        return
-
-    # Aadhaar card changed
-    try:
-        if old.aadhaar_card and old.aadhaar_card != instance.aadhaar_card:
-            old.aadhaar_card.delete(save=False)
-    except Exception:
-        pass
-
-    # Profile image changed
-    try:
-        if old.profile_image and old.profile_image != instance.profile_image:
-            old.profile_image.delete(save=False)
-    except Exception:
-        pass
+    loaded = getattr(instance, "_loaded_values", {})
+
+    for field_name in User.TRACKED_FILE_FIELDS:
+        old_name = loaded.get(field_name)
+        new_file = getattr(instance, field_name)
+        try:
+            if old_name and old_name != new_file.name:
+                new_file.storage.delete(old_name)
+        except Exception:
+            pass
 
 
 
@@ -1,3 +1,328 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_management.dashboard_cache import DashboardCache
+from admin_management.models import User
+from staff_management.dashboard_snapshots import DashboardSnapshotService
+from staff_management.models import (
+    Booking, IncomeCategory, OtherIncome, Room, SalesIncome, MessExpense, SalaryExpense, SnapshotWatermark,
+)
+
+
+def clear_caches():
+    for alias in ("default", "dashboard"):
+        caches[alias].clear()
+    # Restart the stats flush interval so no flush lands inside a query count
+    DashboardCache.flush_stats()
+
+
+def report_queries(captured):
+    """SQL of a cold dashboard request: the data versions, then the one aggregate."""
+    sql = [query["sql"] for query in captured]
+    assert "django_cache" not in " ".join(sql), sql
+    assert "staff_management_dataversion" in sql[0], sql
+    return sql[1:]
+
+
+class DashboardSummaryQueryTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+
+        today = timezone.localdate()
+        now = timezone.now()
+        Booking.objects.create(
+            booking_date=today, guest_name="Guest", checkin_date=now,
+            checkout_date=now + timedelta(days=1), booking_price=Decimal("1000.00"),
+            paid_amount=Decimal("0.00"), pending_amount=Decimal("1000.00"),
+        )
+        food = IncomeCategory.resolve("Food")
+        SalesIncome.objects.create(date=today, category=food, amount=Decimal("200.00"))
+        MessExpense.objects.create(date=today, amount=Decimal("150.00"))
+        SalaryExpense.objects.create(date=today, amount=Decimal("50.00"))
+
+    def test_summary_is_one_aggregate_query(self):
+        # data versions + the UNION ALL aggregate
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(reverse("dashboard-metrics"))
+        self.assertIn("UNION ALL", report_queries(queries.captured_queries)[0])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["bookings"], 1)
+        self.assertEqual(response.data["income"], 1200.0)
+        self.assertEqual(response.data["expenses"], 200.0)
+        self.assertEqual(response.data["profit"], 1000.0)
+
+    def test_repeat_load_is_cached_until_a_write(self):
+        self.client.get(reverse("dashboard-metrics"))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("dashboard-metrics"))
+        self.assertEqual(response.data["expenses"], 200.0)
+
+        MessExpense.objects.create(date=timezone.localdate(), amount=Decimal("25.00"))
+
+        response = self.client.get(reverse("dashboard-metrics"))
+        self.assertEqual(response.data["expenses"], 225.0)
+
+
+class MonthlyTrendQueryTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+
+        food = IncomeCategory.resolve("Food")
+        SalesIncome.objects.create(date=date(2024, 11, 30), category=food, amount=Decimal("100.00"))
+        SalesIncome.objects.create(date=date(2025, 1, 31), category=food, amount=Decimal("300.00"))
+        MessExpense.objects.create(date=date(2025, 1, 1), amount=Decimal("40.00"))
+
+    def test_trend_line_is_calendar_correct_and_zero_filled(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(
+                reverse("monthly-trend-line"), {"start": "2024-10", "end": "2025-02"}
+            )
+        self.assertIn("UNION ALL", report_queries(queries.captured_queries)[0])
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.data["data"]
+        self.assertEqual([row["month"] for row in rows], ["Oct", "Nov", "Dec", "Jan", "Feb"])
+        self.assertEqual([row["income"] for row in rows], [0.0, 100.0, 0.0, 300.0, 0.0])
+        self.assertEqual(rows[3]["profit"], 260.0)
+
+    def test_trend_query_count_does_not_grow_with_window(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(reverse("monthly-trend"), {"start": "2020-01", "end": "2025-12"})
+        self.assertIn("UNION ALL", report_queries(queries.captured_queries)[0])
+        self.assertEqual(len(response.data["data"]), 72)
+
+    def test_trend_rejects_oversized_window(self):
+        response = self.client.get(reverse("monthly-trend"), {"start": "2000-01", "end": "2025-12"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_analytics_series_is_columnar_and_gap_filled(self):
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(reverse("analytics-timeseries"), {
+                "start": "2024-10-01", "end": "2025-06-30",
+                "granularity": "quarter", "metrics": "income_by_source,expense_by_category,profit",
+            })
+        self.assertIn("UNION ALL", report_queries(queries.captured_queries)[0])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["periods"], ["2024-10-01", "2025-01-01", "2025-04-01"])
+        self.assertEqual(response.data["series"]["income.salesincome"], [100.0, 300.0, 0.0])
+        self.assertEqual(response.data["series"]["expense.messexpense"], [0.0, 40.0, 0.0])
+        self.assertEqual(response.data["series"]["profit"], [100.0, 260.0, 0.0])
+
+    def test_analytics_financial_year_buckets(self):
+        response = self.client.get(reverse("analytics-timeseries"), {
+            "start": "2024-04-01", "end": "2025-12-31", "granularity": "fy", "metrics": "income",
+        })
+        self.assertEqual(response.data["periods"], ["2024-04-01", "2025-04-01"])
+        self.assertEqual(response.data["series"]["income"], [400.0, 0.0])
+
+
+class OccupancyTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+
+        Room.objects.create(room_no="101")
+        Room.objects.create(room_no="102", active_from=date(2025, 1, 2))
+        self.book(date(2025, 1, 1), date(2025, 1, 3), "2000.00")
+        self.book(date(2025, 1, 2), date(2025, 1, 4), "3000.00")
+
+    def book(self, checkin, checkout, price):
+        tz = timezone.get_current_timezone()
+        Booking.objects.create(
+            booking_date=checkin, guest_name="Guest",
+            checkin_date=timezone.make_aware(datetime.combine(checkin, time(14)), tz),
+            checkout_date=timezone.make_aware(datetime.combine(checkout, time(11)), tz),
+            booking_price=Decimal(price), paid_amount=Decimal(price), pending_amount=Decimal("0.00"),
+        )
+
+    def test_daily_series_sweeps_stays_and_inventory(self):
+        response = self.client.get(reverse("occupancy"), {"start": "2025-01-01", "end": "2025-01-04"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["periods"], ["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04"])
+        self.assertEqual(response.data["occupied"], [1, 2, 1, 0])
+        self.assertEqual(response.data["available"], [1, 2, 2, 2])
+        self.assertEqual(response.data["revenue"], [1000.0, 2500.0, 1500.0, 0.0])
+        self.assertEqual(response.data["occupancy_pct"], [100.0, 100.0, 50.0, 0.0])
+        self.assertEqual(response.data["adr"], [1000.0, 1250.0, 1500.0, None])
+        self.assertEqual(response.data["revpar"], [1000.0, 1250.0, 750.0, 0.0])
+
+    def test_year_query_count_does_not_grow_with_range(self):
+        # data versions + occupancy snapshots + live bookings + rooms
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("occupancy"), {
+                "start": "2025-01-01", "end": "2025-12-31", "granularity": "month",
+            })
+
+        self.assertEqual(len(response.data["periods"]), 12)
+        self.assertEqual(response.data["occupied"][0], 4)
+        self.assertEqual(response.data["available"][0], 31 + 30)
+
+    def test_room_change_invalidates_cached_series(self):
+        params = {"start": "2025-01-01", "end": "2025-01-01"}
+        self.assertEqual(self.client.get(reverse("occupancy"), params).data["available"], [1])
+
+        Room.objects.create(room_no="103")
+
+        self.assertEqual(self.client.get(reverse("occupancy"), params).data["available"], [2])
+
+
+class DashboardSnapshotTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+
+        self.today = timezone.localdate()
+        self.week_ago = self.today - timedelta(days=7)
+        Room.objects.create(room_no="101")
+        self.food = IncomeCategory.resolve("Food")
+        SalesIncome.objects.create(date=self.week_ago, category=self.food, amount=Decimal("100.00"))
+        SalesIncome.objects.create(date=self.today, category=self.food, amount=Decimal("10.00"))
+        MessExpense.objects.create(date=self.week_ago, amount=Decimal("40.00"))
+        checkin = timezone.now() - timedelta(days=3)
+        Booking.objects.create(
+            booking_date=self.week_ago, guest_name="Guest", checkin_date=checkin,
+            checkout_date=checkin + timedelta(days=2), booking_price=Decimal("900.00"),
+            paid_amount=Decimal("900.00"), pending_amount=Decimal("0.00"),
+        )
+
+    def series(self):
+        clear_caches()
+        params = {"start": self.week_ago.isoformat(), "end": self.today.isoformat()}
+        return (
+            self.client.get(reverse("analytics-timeseries"), {**params, "granularity": "day", "metrics": "income,expenses,bookings"}).data,
+            self.client.get(reverse("occupancy"), params).data,
+        )
+
+    def test_snapshots_match_live_results(self):
+        live = self.series()
+
+        self.assertEqual(DashboardSnapshotService.run(), 7)
+        self.assertEqual(
+            SnapshotWatermark.objects.get(name=SnapshotWatermark.DASHBOARD).closed_through,
+            self.today - timedelta(days=1),
+        )
+        self.assertEqual(self.series(), live)
+        self.assertEqual(DashboardSnapshotService.run(), 0)
+
+    def test_backdated_write_reopens_snapshots(self):
+        DashboardSnapshotService.run()
+
+        MessExpense.objects.create(date=self.week_ago + timedelta(days=2), amount=Decimal("5.00"))
+
+        self.assertEqual(
+            SnapshotWatermark.objects.get(name=SnapshotWatermark.DASHBOARD).closed_through,
+            self.week_ago + timedelta(days=1),
+        )
+        self.assertEqual(sum(self.series()[0]["series"]["expenses"]), 45.0)
+
+        self.assertEqual(DashboardSnapshotService.run(), 5)
+        self.assertEqual(sum(self.series()[0]["series"]["expenses"]), 45.0)
+
+    def test_income_edit_reopens_from_its_loaded_day_without_a_re_read(self):
+        DashboardSnapshotService.run()
+        income = SalesIncome.objects.get(date=self.week_ago)
+        income.date = self.today - timedelta(days=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            income.save()
+
+        reads = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertFalse([sql for sql in reads if "salesincome" in sql])
+        self.assertEqual(
+            SnapshotWatermark.objects.get(name=SnapshotWatermark.DASHBOARD).closed_through,
+            self.week_ago - timedelta(days=1),
+        )
+
+    def test_todays_writes_leave_snapshots_closed(self):
+        DashboardSnapshotService.run()
+
+        SalesIncome.objects.create(date=self.today, category=self.food, amount=Decimal("1.00"))
+
+        self.assertEqual(
+            SnapshotWatermark.objects.get(name=SnapshotWatermark.DASHBOARD).closed_through,
+            self.today - timedelta(days=1),
+        )
+        self.assertEqual(self.series()[0]["series"]["income"][-1], 11.0)
+
+
+class IncomeByCategoryTests(TestCase):
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+
+        self.today = timezone.localdate()
+        for model, category, amount in (
+            (SalesIncome, "Cafe", "10.00"),
+            (OtherIncome, "cafe ", "5.50"),
+            (OtherIncome, "Parking", "20.00"),
+        ):
+            model.objects.create(
+                date=self.today, category=IncomeCategory.resolve(category), amount=Decimal(amount),
+            )
+
+    def test_categories_cluster_and_sum_in_one_query(self):
+        self.assertEqual(IncomeCategory.objects.count(), 2)
+
+        # data versions + the grouped union
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(reverse("income-by-category"))
+        self.assertIn("UNION ALL", report_queries(queries.captured_queries)[0])
+        self.assertEqual(response.data["categories"], [
+            {"category": "Cafe", "total": 15.5, "count": 2},
+            {"category": "Parking", "total": 20.0, "count": 1},
+        ])
+        self.assertEqual(response.data["total"], 35.5)
+
+
+class UserFileTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        User.objects.create(
+            username="staff", role="ADMIN", aadhaar_card=SimpleUploadedFile("old.pdf", b"old"),
+        )
+
+    def test_replaced_file_is_removed_without_reloading_the_user(self):
+        user = User.objects.get(username="staff")
+        old = user.aadhaar_card
+        self.assertTrue(old.storage.exists(old.name))
+
+        user.aadhaar_card = SimpleUploadedFile("new.pdf", b"new")
+        # Only the UPDATE; the old name comes from the values the user was loaded with
+        with self.assertNumQueries(1):
+            user.save()
+
+        self.assertFalse(old.storage.exists(old.name))
+        self.assertTrue(user.aadhaar_card.storage.exists(user.aadhaar_card.name))
@@ -18,6 +18,10 @@ urlpatterns = [
     path('monthly-trend', MonthlyTrendAPIView.as_view(), name="monthly-trend"),
     path('booking-progress', BookingProgressAPIView.as_view(), name="booking-progress"),
     path('monthly-trend-line',MonthlyTrendLineAPIView.as_view(), name="monthly-trend-line"),
+    path('occupancy', OccupancyAPIView.as_view(), name="occupancy"),
+    path('income-by-category', IncomeByCategoryAPIView.as_view(), name="income-by-category"),
+    path('analytics-timeseries', AnalyticsTimeSeriesAPIView.as_view(), name="analytics-timeseries"),
+    path('dashboard-cache-stats', DashboardCacheStatsAPIView.as_view(), name="dashboard-cache-stats"),
 
     path('request-otp',RequestOTPAPIView.as_view(), name="request_otp"),
     path('verify-otp',VerifyOTPAPIView.as_view(), name="verify_otp"),
@@ -203,6 +203,13 @@ class DisableLoginForStaffAPIView(APIView):
 
 from decimal import Decimal
 from staff_management.models import *
+from staff_management.report_service import (
+    ReportService, add_months, period_starts, GRANULARITIES, METRICS,
+    GRANULARITY_DAY, GRANULARITY_WEEK, GRANULARITY_MONTH,
+)
+from staff_management.occupancy_service import OccupancyService
+from admin_management.dashboard_cache import DashboardCache, ALL_DOMAINS
+from staff_management.conditional_get import conditional_get
 from django.db.models import Sum, Q
 from datetime import datetime, timedelta
 
@@ -210,6 +217,7 @@ from datetime import datetime, timedelta
 class DashboardSummaryAPIView(APIView):
     #permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(*ALL_DOMAINS, daily=True)
     def get(self, request):
         """
         Returns dashboard summary cards data.
@@ -253,60 +261,60 @@ class DashboardSummaryAPIView(APIView):
                 end_date = now.replace(month=now.month+1, day=1).date() - timedelta(days=1)
             period_label = "This Month"
 
-        # 1️⃣ Total Bookings
-        total_bookings = Booking.objects.filter(
-            booking_date__range=[start_date, end_date]
-        ).count()
-
-        # 2️⃣ Total Income (SalesIncome + OtherIncome + Booking Revenue)
-        sales_income = SalesIncome.objects.filter(
-            date__range=[start_date, end_date]
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        other_income = OtherIncome.objects.filter(
-            date__range=[start_date, end_date]
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        booking_income = Booking.objects.filter(
-            booking_date__range=[start_date, end_date]
-        ).aggregate(total=Sum('booking_price'))['total'] or Decimal('0.00')
+        def compute():
+            # Bookings, income (sales + other + booking revenue), expenses and
+            # profit in one UNION ALL query
+            totals = ReportService.totals(start_date, end_date)
+            return {
+                "bookings": totals["bookings"],
+                "income": float(totals["income"]),
+                "expenses": float(totals["expenses"]),
+                "profit": float(totals["profit"]),
+                "period": period_label
+            }
+
+        data = DashboardCache.get_or_compute(
+            "summary", {"start": start_date, "end": end_date}, compute,
+            versions=request.data_versions,
+        )
+        return Response(data, status=status.HTTP_200_OK)
 
-        total_income = sales_income + other_income + booking_income
 
-        # 3️⃣ Total Expenses
-        expense_models = [
-            LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
-            RentalExpense, SalaryExpense, MiscellaneousExpense,
-            MaintenanceExpense, CapitalExpense, OtherExpense
-        ]
+MAX_TREND_MONTHS = 120
 
-        total_expenses = Decimal('0.00')
-        for model in expense_models:
-            amount = model.objects.filter(
-                date__range=[start_date, end_date]
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            total_expenses += amount
 
-        # 4️⃣ Profit = Income - Expenses
-        profit = total_income - total_expenses
+def _month_window(request, default_first, default_last):
+    """
+    (first_month, last_month) from ?start= / ?end= (YYYY-MM or YYYY-MM-DD),
+    falling back to the defaults. Raises ValueError on bad input.
+    """
+    def parse(name, default):
+        value = request.query_params.get(name)
+        if not value:
+            return default
+        return datetime.strptime(value[:7], "%Y-%m").date()
 
-        return Response({
-            "bookings": total_bookings,
-            "income": float(total_income),
-            "expenses": float(total_expenses),
-            "profit": float(profit),
-            "period": period_label
-        }, status=status.HTTP_200_OK)
+    first = parse("start", default_first)
+    last = parse("end", default_last)
+    if first > last:
+        raise ValueError("start must not be after end")
+    if (last.year - first.year) * 12 + last.month - first.month >= MAX_TREND_MONTHS:
+        raise ValueError(f"At most {MAX_TREND_MONTHS} months per request")
+    return first, last
 
 
 class MonthlyTrendAPIView(APIView):
     #permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(*ALL_DOMAINS, daily=True)
     def get(self, request):
         """
         Returns monthly income and expenses data for the current year (Jan to current month).
         Used for the "Income vs Expenses (Monthly Data Shown)" chart.
-        
+
+        Query Parameters:
+        - start / end: YYYY-MM, any other window of calendar months
+
         Example response:
         {
             "data": [
@@ -317,61 +325,29 @@ class MonthlyTrendAPIView(APIView):
             ]
         }
         """
-        now = timezone.now()
-        months_data = []
-        
-        # Get all months from January to current month of current year
-        current_year = now.year
-        current_month = now.month
-
-        for month in range(1, current_month + 1):
-            # Create start and end dates for each month
-            month_start = timezone.make_aware(datetime(current_year, month, 1))
-            
-            # Calculate month end
-            if month == 12:
-                month_end = timezone.make_aware(datetime(current_year + 1, 1, 1)) - timedelta(days=1)
-            else:
-                month_end = timezone.make_aware(datetime(current_year, month + 1, 1)) - timedelta(days=1)
-
-            month_start_date = month_start.date()
-            month_end_date = month_end.date()
-
-            # Calculate income for this month
-            sales_inc = SalesIncome.objects.filter(
-                date__range=[month_start_date, month_end_date]
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-            other_inc = OtherIncome.objects.filter(
-                date__range=[month_start_date, month_end_date]
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        today = timezone.localdate()
 
-            booking_inc = Booking.objects.filter(
-                booking_date__range=[month_start_date, month_end_date]
-            ).aggregate(total=Sum('booking_price'))['total'] or Decimal('0.00')
-
-            month_income = sales_inc + other_inc + booking_inc
-
-            # Calculate expenses for this month
-            expense_models = [
-                LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
-                RentalExpense, SalaryExpense, MiscellaneousExpense,
-                MaintenanceExpense, CapitalExpense, OtherExpense
+        try:
+            first, last = _month_window(request, today.replace(month=1, day=1), today)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One grouped query for the whole window, missing months come back as zero
+        def compute():
+            return [
+                {
+                    "month": row["month_start"].strftime("%b"),  # Jan, Feb, Mar, etc.
+                    "year": row["month_start"].year,
+                    "income": float(row["income"]),
+                    "expenses": float(row["expenses"])
+                }
+                for row in ReportService.monthly_series(first, last)
             ]
 
-            month_expenses = Decimal('0.00')
-            for model in expense_models:
-                exp = model.objects.filter(
-                    date__range=[month_start_date, month_end_date]
-                ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-                month_expenses += exp
-
-            months_data.append({
-                "month": month_start.strftime("%b"),  # Jan, Feb, Mar, etc.
-                "income": float(month_income),
-                "expenses": float(month_expenses)
-            })
-
+        months_data = DashboardCache.get_or_compute(
+            "trend", {"first": first, "last": last}, compute,
+            versions=request.data_versions,
+        )
         return Response({"data": months_data}, status=status.HTTP_200_OK)
 
 
@@ -382,41 +358,29 @@ class MonthlyTrendAPIView(APIView):
 class BookingProgressAPIView(APIView):
     #permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(DataVersion.DOMAIN_BOOKING, DataVersion.DOMAIN_ROOM, daily=True)
     def get(self, request):
         """
-        Returns booking occupancy/progress percentage.
-        This is a simplified calculation - adjust logic based on your requirement.
-        
-        Calculation options:
-        1. Percentage of rooms booked vs total rooms
-        2. Percentage of booking capacity utilized
-        3. Current month bookings vs target/goal
+        Returns tonight's occupancy: rooms occupied by a stay vs the active
+        room inventory (see Room).
         """
-        now = timezone.now()
-        current_month_start = now.replace(day=1)
-        
-        if now.month == 12:
-            current_month_end = now.replace(year=now.year+1, month=1, day=1) - timedelta(days=1)
-        else:
-            current_month_end = now.replace(month=now.month+1, day=1) - timedelta(days=1)
-
-        # Get active bookings (checked in but not checked out yet)
-        active_bookings = Booking.objects.filter(
-            checkin_date__lte=now.date(),
-            checkout_date__gte=now.date()
-        ).count()
-
-        # Example: Assuming 100 room capacity
-        # Adjust TOTAL_ROOMS constant to your actual room count
-        TOTAL_ROOMS = 100
-        occupancy_percentage = (active_bookings / TOTAL_ROOMS) * 100
-
-        return Response({
-            "progress_percentage": min(int(occupancy_percentage), 100),
-            "active_bookings": active_bookings,
-            "total_capacity": TOTAL_ROOMS,
-            "label": f"{min(int(occupancy_percentage), 100)}%"
-        }, status=status.HTTP_200_OK)
+        def compute():
+            # Rooms occupied tonight against the active room inventory
+            occupied, available = OccupancyService.tonight()
+            percentage = int(occupied * 100 / available) if available else 0
+
+            return {
+                "progress_percentage": min(percentage, 100),
+                "active_bookings": occupied,
+                "total_capacity": available,
+                "label": f"{min(percentage, 100)}%"
+            }
+
+        data = DashboardCache.get_or_compute(
+            "booking-progress", {"day": timezone.localdate()}, compute,
+            versions=request.data_versions,
+        )
+        return Response(data, status=status.HTTP_200_OK)
 
 
 # =============================================
@@ -425,63 +389,287 @@ class BookingProgressAPIView(APIView):
 class MonthlyTrendLineAPIView(APIView):
     #permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(*ALL_DOMAINS, daily=True)
     def get(self, request):
         """
         Returns trend data for income, expenses, and profit lines.
         Used for line chart visualization.
+
+        Query Parameters:
+        - months: number of calendar months ending with the current one (default 9)
+        - start / end: YYYY-MM, explicit window instead of `months`
         """
-        now = timezone.now()
-        trend_data = []
+        today = timezone.localdate()
 
-        # Get last 9 months
-        for i in range(8, -1, -1):
-            month_date = now - timedelta(days=30*i)
-            month_start = month_date.replace(day=1)
-            
-            if month_date.month == 12:
-                month_end = month_date.replace(year=month_date.year+1, month=1, day=1) - timedelta(days=1)
-            else:
-                month_end = month_date.replace(month=month_date.month+1, day=1) - timedelta(days=1)
+        try:
+            months = int(request.query_params.get("months", 9))
+        except ValueError:
+            return Response({"error": "months must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        months = max(1, min(months, MAX_TREND_MONTHS))
 
-            # Income
-            sales_inc = SalesIncome.objects.filter(
-                date__range=[month_start, month_end]
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        try:
+            first, last = _month_window(request, add_months(today, 1 - months), today)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def compute():
+            return [
+                {
+                    "month": row["month_start"].strftime("%b"),
+                    "year": row["month_start"].year,
+                    "income": float(row["income"]),
+                    "expenses": float(row["expenses"]),
+                    "profit": float(row["profit"])
+                }
+                for row in ReportService.monthly_series(first, last)
+            ]
 
-            other_inc = OtherIncome.objects.filter(
-                date__range=[month_start, month_end]
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+        trend_data = DashboardCache.get_or_compute(
+            "trend-line", {"first": first, "last": last}, compute,
+            versions=request.data_versions,
+        )
+        return Response({"data": trend_data}, status=status.HTTP_200_OK)
 
-            booking_inc = Booking.objects.filter(
-                booking_date__range=[month_start, month_end]
-            ).aggregate(total=Sum('booking_price'))['total'] or Decimal('0.00')
 
-            month_income = sales_inc + other_inc + booking_inc
 
-            # Expenses
-            expense_models = [
-                LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
-                RentalExpense, SalaryExpense, MiscellaneousExpense,
-                MaintenanceExpense, CapitalExpense, OtherExpense
-            ]
+# =============================================
+# 5. ANALYTICS TIME SERIES
+# =============================================
+MAX_SERIES_PERIODS = 1500
 
-            month_expenses = Decimal('0.00')
-            for model in expense_models:
-                exp = model.objects.filter(
-                    date__range=[month_start, month_end]
-                ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-                month_expenses += exp
 
-            profit = month_income - month_expenses
+class AnalyticsTimeSeriesAPIView(APIView):
+    #permission_classes = [permissions.IsAuthenticated]
 
-            trend_data.append({
-                "month": month_date.strftime("%b"),
-                "income": float(month_income),
-                "expenses": float(month_expenses),
-                "profit": float(profit)
-            })
+    @conditional_get(*ALL_DOMAINS, daily=True)
+    def get(self, request):
+        """
+        Gap-filled income / expense / profit / booking series for charts.
 
-        return Response({"data": trend_data}, status=status.HTTP_200_OK)
+        Query Parameters:
+        - start, end: YYYY-MM-DD (default: the last 12 calendar months)
+        - granularity: day | week | month (default) | quarter | fy
+        - metrics: comma separated, any of income, income_by_source, expenses,
+          expense_by_category, profit, bookings (default: income,expenses,profit)
+
+        Example response (columnar, one value per period):
+        {
+            "granularity": "month",
+            "start": "2025-01-01",
+            "end": "2025-03-31",
+            "periods": ["2025-01-01", "2025-02-01", "2025-03-01"],
+            "series": {
+                "income": [25000.0, 0.0, 31000.0],
+                "expense.messexpense": [1200.0, 900.0, 0.0]
+            }
+        }
+        """
+        today = timezone.localdate()
+
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else today
+            start_date = (
+                datetime.strptime(start, "%Y-%m-%d").date() if start
+                else add_months(end_date, -11)
+            )
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start_date > end_date:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+
+        granularity = request.query_params.get("granularity", GRANULARITY_MONTH).lower()
+        if granularity not in GRANULARITIES:
+            return Response(
+                {"error": f"granularity must be one of {', '.join(GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        metrics = [
+            metric.strip().lower()
+            for metric in request.query_params.get("metrics", "income,expenses,profit").split(",")
+            if metric.strip()
+        ]
+        unknown = [metric for metric in metrics if metric not in METRICS]
+        if unknown or not metrics:
+            return Response(
+                {"error": f"metrics must be from {', '.join(METRICS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(period_starts(start_date, end_date, granularity)) > MAX_SERIES_PERIODS:
+            return Response(
+                {"error": f"At most {MAX_SERIES_PERIODS} periods per request, use a coarser granularity"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def compute():
+            result = ReportService.time_series(start_date, end_date, granularity, set(metrics))
+            return {
+                "granularity": granularity,
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat(),
+                "periods": [period.isoformat() for period in result["periods"]],
+                "series": {
+                    name: [value if isinstance(value, int) else float(value) for value in values]
+                    for name, values in result["series"].items()
+                },
+            }
+
+        data = DashboardCache.get_or_compute(
+            "analytics",
+            {"start": start_date, "end": end_date, "granularity": granularity, "metrics": sorted(metrics)},
+            compute,
+            versions=request.data_versions,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# =============================================
+# 6. OCCUPANCY
+# =============================================
+MAX_OCCUPANCY_DAYS = 3 * 366
+
+
+class OccupancyAPIView(APIView):
+    #permission_classes = [permissions.IsAuthenticated]
+
+    @conditional_get(DataVersion.DOMAIN_BOOKING, DataVersion.DOMAIN_ROOM, daily=True)
+    def get(self, request):
+        """
+        Occupancy %, ADR and RevPAR series.
+
+        Query Parameters:
+        - start, end: YYYY-MM-DD (default: the current calendar year)
+        - granularity: day (default) | week | month
+
+        Response (one value per period):
+        {
+            "granularity": "day",
+            "periods": ["2025-01-01", ...],
+            "occupied": [12, ...],          # room-nights sold
+            "available": [20, ...],         # room-nights in inventory
+            "revenue": [24000.0, ...],      # booking price spread over each stay's nights
+            "occupancy_pct": [60.0, ...],
+            "adr": [2000.0, ...],           # revenue / occupied
+            "revpar": [1200.0, ...]         # revenue / available
+        }
+        """
+        today = timezone.localdate()
+
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else today.replace(month=1, day=1)
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else today.replace(month=12, day=31)
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start_date > end_date:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= MAX_OCCUPANCY_DAYS:
+            return Response({"error": "Range is limited to 3 years"}, status=status.HTTP_400_BAD_REQUEST)
+
+        granularity = request.query_params.get("granularity", GRANULARITY_DAY).lower()
+        if granularity not in (GRANULARITY_DAY, GRANULARITY_WEEK, GRANULARITY_MONTH):
+            return Response({"error": "granularity must be day, week or month"}, status=status.HTTP_400_BAD_REQUEST)
+
+        def as_float(values):
+            return [None if value is None else float(value) for value in values]
+
+        def compute():
+            result = OccupancyService.series(start_date, end_date, granularity)
+            return {
+                "granularity": granularity,
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat(),
+                "periods": [period.isoformat() for period in result["periods"]],
+                "occupied": result["occupied"],
+                "available": result["available"],
+                "revenue": as_float(result["revenue"]),
+                "occupancy_pct": as_float(result["occupancy_pct"]),
+                "adr": as_float(result["adr"]),
+                "revpar": as_float(result["revpar"]),
+            }
+
+        data = DashboardCache.get_or_compute(
+            "occupancy",
+            {"start": start_date, "end": end_date, "granularity": granularity},
+            compute,
+            versions=request.data_versions,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# =============================================
+# 7. INCOME BY CATEGORY
+# =============================================
+class IncomeByCategoryAPIView(APIView):
+    #permission_classes = [permissions.IsAuthenticated]
+
+    @conditional_get(DataVersion.DOMAIN_INCOME, daily=True)
+    def get(self, request):
+        """
+        Sales and other income per category.
+
+        Query Parameters:
+        - start, end: YYYY-MM-DD (default: the current month)
+
+        Response:
+        {
+            "start": "2025-01-01",
+            "end": "2025-01-31",
+            "categories": [{"category": "Cafe", "total": 1200.0, "count": 8}, ...],
+            "total": 1200.0
+        }
+        """
+        today = timezone.localdate()
+
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else today.replace(day=1)
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else today
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start_date > end_date:
+            return Response({"error": "start must not be after end"}, status=status.HTTP_400_BAD_REQUEST)
+
+        def compute():
+            breakdown = ReportService.income_breakdown(start_date, end_date)
+            return {
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat(),
+                "categories": [
+                    {"category": name, "total": float(cell["total"]), "count": cell["count"]}
+                    for name, cell in breakdown.items()
+                ],
+                "total": float(sum((cell["total"] for cell in breakdown.values()), Decimal("0.00"))),
+            }
+
+        data = DashboardCache.get_or_compute(
+            "income_by_category",
+            {"start": start_date, "end": end_date},
+            compute,
+            versions=request.data_versions,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class DashboardCacheStatsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Hit/miss counters of the dashboard response cache across all workers."""
+        return Response(DashboardCache.stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Reset the counters."""
+        DashboardCache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
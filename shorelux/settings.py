@@ -117,6 +117,34 @@ DATABASES = {
     "default": dj_database_url.config(default=os.environ.get("DATABASE_URL"))
 }
 
+# ==========================================
+# CACHE CONFIGURATION
+# ==========================================
+# Shared by every gunicorn worker (dashboard responses, reminder flags).
+# Table is created by `manage.py createcachetable` in build.sh.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+    },
+    # Dashboard responses, per worker. Keys carry the data versions, so a
+    # worker's copy is never stale, and a hit or miss costs no database
+    # round trip on top of the version lookup the view makes anyway.
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "dashboard",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+}
+
+# Optional PostgreSQL range partitioning of the ledger table by date.
+# "" (off), "month" or "fy" (financial year). Ignored on other databases.
+LEDGER_PARTITIONING = os.getenv("LEDGER_PARTITIONING", "")
+LEDGER_PARTITION_ARCHIVE_SCHEMA = os.getenv("LEDGER_PARTITION_ARCHIVE_SCHEMA", "ledger_archive")
+
+# Financial year start month (April for Indian accounting)
+FINANCIAL_YEAR_START_MONTH = 4
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
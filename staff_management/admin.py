@@ -4,10 +4,17 @@
 
 ############### admin.py ##############
 from django.contrib import admin
-from .models import LedgerEntry
+from .models import LedgerEntry, Room
 
 @admin.register(LedgerEntry)
 class LedgerEntryAdmin(admin.ModelAdmin):
     list_display = ("date", "source_type", "source_id", "debit", "credit", "created_at")
     list_filter = ("source_type", "date")
     search_fields = ("source_type", "source_id", "description")
+
+
+@admin.register(Room)
+class RoomAdmin(admin.ModelAdmin):
+    list_display = ("room_no", "room_type", "is_active", "active_from", "active_until")
+    list_filter = ("is_active", "room_type")
+    search_fields = ("room_no",)
@@ -6,6 +6,7 @@ import os
 import sys
 import logging
 from django.apps import AppConfig
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +37,13 @@ class StaffManagementConfig(AppConfig):
         try:
             from apscheduler.schedulers.background import BackgroundScheduler
             from django_apscheduler.jobstores import DjangoJobStore
-            from staff_management.scheduler_jobs import fetch_website_bookings_job
+            from staff_management.scheduler_jobs import (
+                fetch_website_bookings_job,
+                ensure_ledger_partitions_job,
+                reconcile_ledger_job,
+                snapshot_dashboard_job,
+                purge_stale_uploads_job,
+            )
             from staff_management.jobs import send_due_checkin_reminders
 
             scheduler = BackgroundScheduler(timezone="Asia/Kolkata")
@@ -60,6 +67,47 @@ class StaffManagementConfig(AppConfig):
             )
             logger.info("✅ Scheduled: Send check-in reminders (every 5 minutes)")
 
+            scheduler.add_job(
+                reconcile_ledger_job,
+                trigger="cron",
+                hour=3,
+                minute=0,
+                id="reconcile_ledger",
+                replace_existing=True,
+            )
+            logger.info("✅ Scheduled: Ledger reconciliation (daily 03:00)")
+
+            scheduler.add_job(
+                snapshot_dashboard_job,
+                trigger="cron",
+                hour=0,
+                minute=30,
+                id="snapshot_dashboard",
+                replace_existing=True,
+            )
+            logger.info("✅ Scheduled: Dashboard snapshots (daily 00:30)")
+
+            scheduler.add_job(
+                purge_stale_uploads_job,
+                trigger="cron",
+                hour=4,
+                minute=0,
+                id="purge_stale_uploads",
+                replace_existing=True,
+            )
+            logger.info("✅ Scheduled: Stale upload cleanup (daily 04:00)")
+
+            if settings.LEDGER_PARTITIONING:
+                scheduler.add_job(
+                    ensure_ledger_partitions_job,
+                    trigger="cron",
+                    hour=2,
+                    minute=0,
+                    id="ensure_ledger_partitions",
+                    replace_existing=True,
+                )
+                logger.info("✅ Scheduled: Ledger partition maintenance (daily 02:00)")
+
             scheduler.start()
             logger.info("🚀 Background scheduler started successfully")
 
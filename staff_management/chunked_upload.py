@@ -0,0 +1,204 @@
+# staff_management/chunked_upload.py
+
+import hashlib
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from staff_management.models import Expense, FileUpload, StoredBlob
+
+logger = logging.getLogger(__name__)
+
+# Suggested to clients; a chunk may be anything up to MAX_CHUNK_SIZE
+CHUNK_SIZE = 2 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_FILE_SIZE = 100 * 1024 * 1024
+
+COPY_BUFFER = 64 * 1024
+
+
+class UploadError(ValueError):
+    """The upload can't take this request (complete, too big, bad checksum)."""
+
+
+class UploadOffsetError(UploadError):
+    """A chunk didn't start where the upload left off; resume from `received`."""
+
+    def __init__(self, received):
+        super().__init__(f"Expected a chunk at offset {received}")
+        self.received = received
+
+
+def _part_path(upload):
+    return os.path.join(settings.MEDIA_ROOT, "uploads", "partial", f"{upload.id}.part")
+
+
+def _blob_name(sha256, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if not extension[1:].isalnum() or len(extension) > 10:
+        extension = ""
+    return f"blobs/{sha256[:2]}/{sha256}{extension}"
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ChunkedUploadService:
+    """
+    Resumable uploads for expense bills and vouchers. Chunks are appended in
+    order to a part file under MEDIA_ROOT; on completion the received bytes
+    are hashed and stored once per distinct content as a StoredBlob, which
+    expenses reference by upload id. Blobs nothing refers to any more are
+    removed by purge_unreferenced.
+    """
+
+    @staticmethod
+    def start(filename, size, expected_sha256=""):
+        if not 0 < size <= MAX_FILE_SIZE:
+            raise UploadError(f"size must be between 1 and {MAX_FILE_SIZE} bytes")
+
+        # Never completed from a checksum alone: knowing a stored file's hash
+        # must not be enough to attach (and then download) it
+        return FileUpload.objects.create(
+            filename=os.path.basename(filename)[:255],
+            size=size,
+            expected_sha256=expected_sha256.lower(),
+        )
+
+    @staticmethod
+    def append(upload_id, offset, stream):
+        """
+        Write the chunk read from `stream` at `offset`, which must equal the
+        bytes received so far. The row lock keeps concurrent chunks of one
+        upload in order; a chunk that failed half way is overwritten by the
+        retry, since writes start at `received`.
+        """
+        with transaction.atomic():
+            upload = FileUpload.objects.select_for_update().get(pk=upload_id)
+            if upload.status == FileUpload.STATUS_COMPLETE:
+                raise UploadError("Upload is already complete")
+            if offset != upload.received:
+                raise UploadOffsetError(upload.received)
+
+            path = _part_path(upload)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            limit = min(MAX_CHUNK_SIZE, upload.size - offset)
+
+            with open(path, "r+b" if os.path.exists(path) else "wb") as part:
+                part.seek(offset)
+                written = 0
+                while True:
+                    block = stream.read(COPY_BUFFER)
+                    if not block:
+                        break
+                    written += len(block)
+                    if written > limit:
+                        part.truncate(offset)
+                        raise UploadError(f"Chunk is larger than the {limit} bytes allowed here")
+                    part.write(block)
+                part.truncate()
+
+            upload.received = offset + written
+            upload.save(update_fields=["received", "updated_at"])
+        return upload
+
+    @staticmethod
+    def complete(upload_id):
+        """Hash the assembled file and attach it to its (possibly existing) blob."""
+        with transaction.atomic():
+            upload = FileUpload.objects.select_for_update().get(pk=upload_id)
+            if upload.status == FileUpload.STATUS_COMPLETE:
+                return upload
+            if upload.received != upload.size:
+                raise UploadError(f"Only {upload.received} of {upload.size} bytes received")
+
+            path = _part_path(upload)
+            digest = hashlib.sha256()
+            with open(path, "rb") as part:
+                for block in iter(lambda: part.read(COPY_BUFFER), b""):
+                    digest.update(block)
+            sha256 = digest.hexdigest()
+
+            if upload.expected_sha256 and sha256 != upload.expected_sha256:
+                upload.received = 0
+                upload.save(update_fields=["received", "updated_at"])
+                _remove(path)
+                raise UploadError("Checksum mismatch; upload the file again")
+
+            blob = StoredBlob.objects.filter(sha256=sha256).first()
+            if blob is None:
+                with open(path, "rb") as part:
+                    name = default_storage.save(_blob_name(sha256, upload.filename), File(part))
+                try:
+                    with transaction.atomic():
+                        blob = StoredBlob.objects.create(sha256=sha256, file=name, size=upload.size)
+                except IntegrityError:
+                    # Same content completed concurrently; keep theirs
+                    default_storage.delete(name)
+                    blob = StoredBlob.objects.get(sha256=sha256)
+
+            upload.blob = blob
+            upload.status = FileUpload.STATUS_COMPLETE
+            upload.save(update_fields=["blob", "status", "updated_at"])
+
+        _remove(path)
+        return upload
+
+    @staticmethod
+    def stored_name(upload_id):
+        """Storage name of a completed upload's file, or None."""
+        return (
+            FileUpload.objects.filter(pk=upload_id, status=FileUpload.STATUS_COMPLETE)
+            .values_list("blob__file", flat=True)
+            .first()
+        )
+
+    @staticmethod
+    def purge_stale(days=2):
+        """Drop uploads left pending for `days` and their part files."""
+        cutoff = timezone.now() - timedelta(days=days)
+        stale = FileUpload.objects.filter(status=FileUpload.STATUS_PENDING, updated_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            _remove(_part_path(upload))
+            upload.delete()
+            count += 1
+        if count:
+            logger.info(f"Purged {count} stale uploads")
+        return count
+
+    @staticmethod
+    def purge_unreferenced(days=7):
+        """
+        Drop uploads completed more than `days` ago (an expense that used one
+        holds the file name itself), then every blob older than that which no
+        upload and no expense bill or voucher refers to, with its file.
+        Returns the number of blobs removed.
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+        FileUpload.objects.filter(status=FileUpload.STATUS_COMPLETE, updated_at__lt=cutoff).delete()
+
+        in_use = Q(Exists(FileUpload.objects.filter(blob=OuterRef("pk")))) | Q(Exists(
+            Expense.objects.filter(Q(bill_file=OuterRef("file")) | Q(voucher_file=OuterRef("file")))
+        ))
+        count = 0
+        for blob_id, name in StoredBlob.objects.filter(created_at__lt=cutoff).exclude(in_use).values_list("id", "file"):
+            # Checked again in the DELETE, so a blob attached since the scan stays
+            deleted, _ = StoredBlob.objects.filter(pk=blob_id).exclude(in_use).delete()
+            if deleted:
+                default_storage.delete(name)
+                count += 1
+        if count:
+            logger.info(f"Removed {count} unreferenced blobs")
+        return count
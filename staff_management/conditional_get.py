@@ -0,0 +1,74 @@
+# staff_management/conditional_get.py
+
+import hashlib
+import json
+from datetime import datetime, time
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from staff_management.models import DataVersion
+
+
+def data_versions(*domains):
+    """
+    ({domain: version}, last change as a datetime or None) for the given
+    domains in one query; domains never written to are 0.
+    """
+    rows = DataVersion.objects.filter(domain__in=domains).values_list("domain", "version", "updated_at")
+    versions = {domain: 0 for domain in domains}
+    last_modified = None
+    for domain, version, updated_at in rows:
+        versions[domain] = version
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return versions, last_modified
+
+
+def conditional_get(*domains, daily=False):
+    """
+    Decorator for an APIView's get(): answers If-None-Match / If-Modified-Since
+    with 304 from the DataVersion of `domains`, before the view runs, and adds
+    a strong ETag and Last-Modified to full responses.
+
+    The ETag covers the path, the query string and the versions, so it only
+    fits views whose output depends on nothing else. daily=True also folds in
+    today's date for views whose default period is relative to today.
+
+    The versions read are left on request.data_versions so the view can reuse
+    them (e.g. for DashboardCache) without a second lookup.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            versions, last_modified = data_versions(*domains)
+            request.data_versions = versions
+
+            key = {
+                "path": request.path,
+                "query": sorted(request.query_params.lists()),
+                "versions": versions,
+            }
+            if daily:
+                today = timezone.localdate()
+                key["day"] = today.isoformat()
+                midnight = timezone.make_aware(datetime.combine(today, time.min))
+                last_modified = max(last_modified, midnight) if last_modified else midnight
+
+            raw = json.dumps(key, sort_keys=True)
+            etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                if timestamp and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
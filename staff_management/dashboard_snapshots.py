@@ -0,0 +1,108 @@
+# staff_management/dashboard_snapshots.py
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from staff_management.models import (
+    Booking, SalesIncome, OtherIncome, ExpenseDailyRollup,
+    DashboardSnapshot, OccupancySnapshot, SnapshotWatermark,
+)
+from staff_management.occupancy_service import OccupancyService, local_date
+from staff_management.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+REVENUE_PLACES = Decimal("0.0001")
+
+
+class DashboardSnapshotService:
+    """
+    Writes closed days (up to yesterday) into DashboardSnapshot and
+    OccupancySnapshot and advances the SnapshotWatermark, so dashboard reads
+    only scan source rows dated after it. Snapshots always run contiguously
+    from the first day that has any data; writes dated on or before the
+    watermark move it back (see signals) and the next run recomputes from
+    there.
+    """
+
+    @staticmethod
+    def first_day():
+        """Earliest date any booking, stay, income or expense falls on, or None."""
+        days = []
+        booking = Booking.objects.aggregate(booked=Min("booking_date"), checkin=Min("checkin_date"))
+        days.append(booking["booked"])
+        if booking["checkin"]:
+            days.append(local_date(booking["checkin"]))
+        for model in (SalesIncome, OtherIncome, ExpenseDailyRollup):
+            days.append(model.objects.aggregate(first=Min("date"))["first"])
+        days = [day for day in days if day]
+        return min(days) if days else None
+
+    @staticmethod
+    def run(through=None, batch_size=1000):
+        """
+        Snapshot every unsnapshotted day up to `through` (default and at
+        most yesterday; today always stays live). Returns the number of days
+        written.
+        """
+        yesterday = timezone.localdate() - timedelta(days=1)
+        through = min(through or yesterday, yesterday)
+
+        with transaction.atomic():
+            watermark, _ = SnapshotWatermark.objects.select_for_update().get_or_create(
+                name=SnapshotWatermark.DASHBOARD
+            )
+            closed_through = watermark.closed_through
+            if closed_through and closed_through >= through:
+                return 0
+
+            if closed_through:
+                start = closed_through + timedelta(days=1)
+                DashboardSnapshot.objects.filter(date__gte=start).delete()
+                OccupancySnapshot.objects.filter(date__gte=start).delete()
+            else:
+                start = DashboardSnapshotService.first_day()
+                DashboardSnapshot.objects.all().delete()
+                OccupancySnapshot.objects.all().delete()
+
+            days = 0
+            if start and start <= through:
+                DashboardSnapshot.objects.bulk_create(
+                    [
+                        DashboardSnapshot(date=day, kind=kind, source=source, total=total or ZERO, count=count or 0)
+                        for kind, source, day, total, count in ReportService._union(
+                            start, through, trunc=TruncDay, snapshots=False
+                        )
+                    ],
+                    batch_size=batch_size,
+                )
+                rows = OccupancyService.daily(start, through, snapshots=False)
+                OccupancySnapshot.objects.bulk_create(
+                    [
+                        OccupancySnapshot(
+                            date=row["date"], occupied=row["occupied"],
+                            available=row["available"], revenue=row["revenue"].quantize(REVENUE_PLACES),
+                        )
+                        for row in rows
+                    ],
+                    batch_size=batch_size,
+                )
+                days = len(rows)
+
+            watermark.closed_through = through
+            watermark.save(update_fields=["closed_through", "updated_at"])
+
+        logger.info(f"Dashboard snapshots written for {days} days, closed through {through}")
+        return days
+
+    @staticmethod
+    def reset():
+        """Drop the watermark so the next run rebuilds every snapshot."""
+        SnapshotWatermark.reopen(None)
@@ -0,0 +1,166 @@
+# staff_management/expense_import.py
+
+import codecs
+import csv
+import logging
+from datetime import date, datetime
+
+from django.db import transaction
+
+from staff_management.models import Expense
+from staff_management.serializers import (
+    LaundryExpenseSerializer, CleaningExpenseSerializer, MessExpenseSerializer,
+    SalaryExpenseSerializer, CafeteriaExpenseSerializer, RentalExpenseSerializer,
+    MiscExpenseSerializer, MaintenanceExpenseSerializer, CapitalExpenseSerializer,
+    OtherExpenseSerializer,
+)
+from staff_management.signals import expenses_bulk_created
+
+logger = logging.getLogger(__name__)
+
+SERIALIZERS = [
+    LaundryExpenseSerializer, CleaningExpenseSerializer, MessExpenseSerializer,
+    SalaryExpenseSerializer, CafeteriaExpenseSerializer, RentalExpenseSerializer,
+    MiscExpenseSerializer, MaintenanceExpenseSerializer, CapitalExpenseSerializer,
+    OtherExpenseSerializer,
+]
+
+# Category cell ("Mess" or "messexpense") -> serializer validating the row
+SERIALIZER_BY_CATEGORY = {}
+for _serializer in SERIALIZERS:
+    _category = _serializer.Meta.model.CATEGORY
+    SERIALIZER_BY_CATEGORY[_category] = _serializer
+    SERIALIZER_BY_CATEGORY[dict(Expense.CATEGORY_CHOICES)[_category]] = _serializer
+
+COLUMNS = (
+    "category", "date", "amount", "description", "voucher_no", "staff_code",
+    "bill_upload_id", "voucher_upload_id",
+)
+
+# Per-row errors kept for the report; the rest are only counted
+MAX_ERRORS = 1000
+
+
+class ImportFileError(ValueError):
+    """The file as a whole can't be read (unknown format, missing columns)."""
+
+
+def _csv_rows(stream):
+    # Decodes line by line; works on an open file and on an UploadedFile
+    yield from csv.reader(codecs.iterdecode(stream, "utf-8-sig"))
+
+
+def _xlsx_rows(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import needs openpyxl installed; upload a CSV instead")
+
+    # read_only streams the sheet instead of building it in memory
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for values in workbook.active.iter_rows(values_only=True):
+            yield list(values)
+    finally:
+        workbook.close()
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+class ExpenseImporter:
+    """
+    Streams expense rows out of a CSV or XLSX file, validates each one with
+    its category's serializer and inserts the valid rows chunk by chunk with
+    bulk_create. Only the current chunk and the first MAX_ERRORS row errors
+    are held in memory, whatever the file size.
+
+    bulk_create skips the save signals, so each chunk runs their batched
+    form (signals.expenses_bulk_created) in its own transaction.
+
+    Rows may reference completed chunked uploads (bill_upload_id,
+    voucher_upload_id); rows without one get their bill or voucher attached
+    later through the edit endpoint.
+    """
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, stream, filename):
+        """Import the whole file. Returns the report (see `report`)."""
+        if filename.lower().endswith(".csv"):
+            rows = _csv_rows(stream)
+        elif filename.lower().endswith(".xlsx"):
+            rows = _xlsx_rows(stream)
+        else:
+            raise ImportFileError("File must be .csv or .xlsx")
+
+        header = [_cell(name).lower() for name in next(rows, [])]
+        missing = {"category", "date", "amount"} - set(header)
+        if missing:
+            raise ImportFileError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        chunk = []
+        # Row numbers as the spreadsheet shows them; the header is row 1
+        for number, values in enumerate(rows, start=2):
+            data = {
+                name: _cell(value) for name, value in zip(header, values)
+                if name in COLUMNS and _cell(value) != ""
+            }
+            if not data:
+                continue
+
+            expense = self._validate(number, data)
+            if expense is not None:
+                chunk.append(expense)
+            if len(chunk) >= self.chunk_size:
+                self._insert(chunk)
+                chunk = []
+
+        if chunk:
+            self._insert(chunk)
+        return self.report()
+
+    def report(self):
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    def _validate(self, number, data):
+        serializer_class = SERIALIZER_BY_CATEGORY.get(data.get("category", ""))
+        if serializer_class is None:
+            self._error(number, {"category": [f"Invalid category: {data.get('category', '')}"]})
+            return None
+
+        serializer = serializer_class(data=data, context={"files_optional": True})
+        if not serializer.is_valid():
+            self._error(number, serializer.errors)
+            return None
+
+        return Expense(category=serializer_class.Meta.model.CATEGORY, **serializer.validated_data)
+
+    def _error(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"row": number, "errors": errors})
+
+    def _insert(self, chunk):
+        with transaction.atomic():
+            Expense.objects.bulk_create(chunk)
+            expenses_bulk_created(chunk)
+
+        self.imported += len(chunk)
+        logger.info(f"Imported {len(chunk)} expenses ({self.imported} so far)")
@@ -0,0 +1,108 @@
+# staff_management/expense_rollup.py
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from staff_management.models import Expense, ExpenseDailyRollup
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+
+
+class ExpenseRollupService:
+    """Keeps ExpenseDailyRollup in step with the Expense table."""
+
+    @staticmethod
+    def apply_deltas(deltas):
+        """
+        Add {(date, category): [total, count]} movements to the rollup.
+        Must run in the same transaction as the expense write it mirrors.
+        """
+        with transaction.atomic(savepoint=False):
+            for (day, category), (total, count) in deltas.items():
+                if not total and not count:
+                    continue
+
+                rows = ExpenseDailyRollup.objects.filter(date=day, category=category)
+                changes = {"total": F("total") + total, "count": F("count") + count}
+
+                if not rows.update(**changes):
+                    try:
+                        with transaction.atomic():
+                            ExpenseDailyRollup.objects.create(
+                                date=day, category=category, total=total, count=count,
+                            )
+                    except IntegrityError:
+                        # Created concurrently; add on top of it instead
+                        rows.update(**changes)
+
+                if count < 0:
+                    rows.filter(count__lte=0).delete()
+
+    @staticmethod
+    def deltas_for_change(old, new, deltas=None):
+        """
+        Movements for one expense going from `old` to `new` (date, amount,
+        category) tuples; either may be None for a create or a delete.
+        Added to `deltas` when given, so a batch folds into one dict.
+        """
+        if deltas is None:
+            deltas = defaultdict(lambda: [ZERO, 0])
+        if old:
+            deltas[(old[0], old[2])][0] -= Decimal(str(old[1] or ZERO))
+            deltas[(old[0], old[2])][1] -= 1
+        if new:
+            deltas[(new[0], new[2])][0] += Decimal(str(new[1] or ZERO))
+            deltas[(new[0], new[2])][1] += 1
+        return deltas
+
+    @staticmethod
+    def raw_totals(start_date=None, end_date=None):
+        """{(date, category): (total, count)} straight from the Expense table."""
+        rows = Expense.objects.all()
+        if start_date:
+            rows = rows.filter(date__gte=start_date)
+        if end_date:
+            rows = rows.filter(date__lte=end_date)
+        rows = rows.values("date", "category").annotate(total=Sum("amount"), count=Count("id")).order_by()
+        return {
+            (row["date"], row["category"]): (row["total"] or ZERO, row["count"])
+            for row in rows.iterator()
+        }
+
+    @staticmethod
+    def verify(repair=True, batch_size=1000):
+        """
+        Compare the rollup with the Expense table. Returns a list of
+        (date, category, stored, expected) mismatches; with repair=True the
+        table is rewritten from the raw totals.
+        """
+        expected = ExpenseRollupService.raw_totals()
+        stored = {
+            (row.date, row.category): (row.total, row.count)
+            for row in ExpenseDailyRollup.objects.all().iterator()
+        }
+
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            if expected.get(key) != stored.get(key):
+                mismatches.append((key[0], key[1], stored.get(key), expected.get(key)))
+
+        if repair and mismatches:
+            with transaction.atomic():
+                ExpenseDailyRollup.objects.all().delete()
+                ExpenseDailyRollup.objects.bulk_create(
+                    [
+                        ExpenseDailyRollup(date=day, category=category, total=total, count=count)
+                        for (day, category), (total, count) in expected.items()
+                    ],
+                    batch_size=batch_size,
+                )
+            logger.info(f"Expense rollup repaired ({len(mismatches)} mismatched days)")
+
+        return mismatches
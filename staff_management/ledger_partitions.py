@@ -0,0 +1,308 @@
+# staff_management/ledger_partitions.py
+
+import hashlib
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from staff_management.models import LedgerEntry, SnapshotWatermark
+
+logger = logging.getLogger(__name__)
+
+SCHEME_MONTH = "month"
+SCHEME_FY = "fy"
+SCHEMES = (SCHEME_MONTH, SCHEME_FY)
+
+
+def _add_months(day, months):
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class LedgerPartitionManager:
+    """
+    PostgreSQL declarative range partitioning of LedgerEntry by `date`.
+
+    The parent table keeps its name, so the ORM is unaware of it; every
+    date-bounded query (ledger, daybook, reports) is pruned to the partitions
+    that overlap the range. Rows outside any partition land in a DEFAULT
+    partition and are moved out when their partition is created.
+
+    On any other database (SQLite in development/tests) every method is a
+    no-op and `is_supported()` is False.
+    """
+
+    @staticmethod
+    def table():
+        return LedgerEntry._meta.db_table
+
+    @staticmethod
+    def scheme():
+        scheme = getattr(settings, "LEDGER_PARTITIONING", "") or ""
+        return scheme if scheme in SCHEMES else ""
+
+    @staticmethod
+    def is_supported():
+        return connection.vendor == "postgresql"
+
+    @staticmethod
+    def is_partitioned():
+        if not LedgerPartitionManager.is_supported():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [LedgerPartitionManager.table()],
+            )
+            return cursor.fetchone() is not None
+
+    # ------------------------------------------------------------------
+    # Naming and bounds
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def bounds(day, scheme):
+        """[start, end) of the partition that holds `day`."""
+        if scheme == SCHEME_MONTH:
+            start = day.replace(day=1)
+            return start, _add_months(start, 1)
+
+        start_month = settings.FINANCIAL_YEAR_START_MONTH
+        year = day.year if day.month >= start_month else day.year - 1
+        start = date(year, start_month, 1)
+        return start, _add_months(start, 12)
+
+    @staticmethod
+    def partition_name(start, scheme):
+        table = LedgerPartitionManager.table()
+        if scheme == SCHEME_MONTH:
+            return f"{table}_p{start.year}_{start.month:02d}"
+        return f"{table}_fy{start.year}"
+
+    @staticmethod
+    def default_partition_name():
+        return f"{LedgerPartitionManager.table()}_default"
+
+    @staticmethod
+    def legacy_index_name(name):
+        """
+        Name an index takes while its table is being converted. Long names
+        are cut to fit PostgreSQL's 63 characters, so a digest of the full
+        name keeps two that share a prefix apart.
+        """
+        digest = hashlib.md5(name.encode()).hexdigest()[:8]
+        return f"{name[:44]}_{digest}_legacy"
+
+    @staticmethod
+    def list_partitions():
+        """[(name, start, end)] of the attached range partitions, oldest first."""
+        if not LedgerPartitionManager.is_partitioned():
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+                "FROM pg_inherits i "
+                "JOIN pg_class parent ON parent.oid = i.inhparent "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+                [LedgerPartitionManager.table()],
+            )
+            rows = cursor.fetchall()
+
+        partitions = []
+        for name, bound in rows:
+            # FOR VALUES FROM ('2025-04-01') TO ('2025-05-01')  /  DEFAULT
+            if "FROM" not in bound:
+                continue
+            start, end = [part.split("'")[1] for part in bound.split("TO")]
+            partitions.append((name, date.fromisoformat(start), date.fromisoformat(end)))
+        return sorted(partitions, key=lambda row: row[1])
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def convert(scheme):
+        """
+        Turn the plain ledger table into a partitioned one, copying every
+        existing row. Runs in one transaction and holds an exclusive lock on
+        the ledger for its duration, so run it in a quiet window, through
+        `manage_ledger_partitions --convert`; migrations never partition.
+        """
+        if not LedgerPartitionManager.is_supported():
+            return False
+        if LedgerPartitionManager.is_partitioned():
+            return False
+
+        table = LedgerPartitionManager.table()
+        legacy = f"{table}_legacy"
+        sequence = f"{table}_part_id_seq"
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+
+            # Secondary indexes are recreated on the parent under the same
+            # names so later migrations can still find them.
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = %s AND schemaname = current_schema()",
+                [table],
+            )
+            indexes = cursor.fetchall()
+
+            # Index (and primary key) names are unique per schema: free them up
+            cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+            for name, _definition in indexes:
+                cursor.execute(
+                    f'ALTER INDEX "{name}" RENAME TO "{LedgerPartitionManager.legacy_index_name(name)}"'
+                )
+
+            cursor.execute(
+                f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                f"PARTITION BY RANGE (date)"
+            )
+            # The primary key of a partitioned table must contain the partition key
+            cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, date)')
+            cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+            cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{sequence}"\')')
+            cursor.execute(
+                f'CREATE TABLE "{LedgerPartitionManager.default_partition_name()}" '
+                f'PARTITION OF "{table}" DEFAULT'
+            )
+
+            cursor.execute(f'SELECT MIN(date), MAX(date), MAX(id) FROM "{legacy}"')
+            first_day, last_day, max_id = cursor.fetchone()
+
+            today = timezone.localdate()
+            LedgerPartitionManager._create_range(
+                cursor, scheme, first_day or today, max(last_day or today, today)
+            )
+
+            cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+            if max_id:
+                cursor.execute("SELECT setval(%s, %s)", [sequence, max_id])
+
+            cursor.execute(f'DROP TABLE "{legacy}"')
+            for name, definition in indexes:
+                if not name.endswith("_pkey"):
+                    cursor.execute(definition)
+
+        logger.info(f"Ledger table partitioned by {scheme}")
+        return True
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def ensure_partitions(months_ahead=3, scheme=None):
+        """
+        Create partitions from the current one up to `months_ahead` months in
+        the future. Returns the names of the partitions created.
+        """
+        scheme = scheme or LedgerPartitionManager.scheme()
+        if not scheme or not LedgerPartitionManager.is_partitioned():
+            return []
+
+        today = timezone.localdate()
+        with transaction.atomic(), connection.cursor() as cursor:
+            return LedgerPartitionManager._create_range(
+                cursor, scheme, today, _add_months(today.replace(day=1), months_ahead)
+            )
+
+    @staticmethod
+    def _create_range(cursor, scheme, first_day, last_day):
+        existing = {name for name, _start, _end in LedgerPartitionManager.list_partitions()}
+        created = []
+
+        start, end = LedgerPartitionManager.bounds(first_day, scheme)
+        while start <= last_day:
+            name = LedgerPartitionManager.partition_name(start, scheme)
+            if name not in existing:
+                LedgerPartitionManager._create_partition(cursor, name, start, end)
+                created.append(name)
+            start, end = end, LedgerPartitionManager.bounds(end, scheme)[1]
+        return created
+
+    @staticmethod
+    def _create_partition(cursor, name, start, end):
+        table = LedgerPartitionManager.table()
+        default = LedgerPartitionManager.default_partition_name()
+
+        # Attaching fails while the DEFAULT partition holds rows in the new
+        # range, so build the partition standalone, move those rows into it
+        # and attach it afterwards.
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE date >= %s AND date < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        logger.info(f"Created ledger partition {name} [{start}, {end})")
+
+    @staticmethod
+    def archived_through():
+        """Last day whose entries were archived out of the ledger, or None."""
+        return (
+            SnapshotWatermark.objects.filter(name=SnapshotWatermark.LEDGER_ARCHIVE)
+            .values_list("closed_through", flat=True)
+            .first()
+        )
+
+    @staticmethod
+    def archive_before(cutoff, schema=None, drop=False):
+        """
+        Detach every partition that ends on or before `cutoff` and move it to
+        the archive schema (or drop it). Balance snapshots and rollups keep
+        their totals, so opening balances stay correct; the detached entries
+        simply stop showing up in the ledger.
+
+        The source rows of those days stay, so the archived range is recorded
+        (archived_through): reconciliation skips it rather than reporting the
+        missing entries as drift, and a full ledger rebuild is refused, since
+        it would rebuild snapshots and rollups without the archived totals.
+        """
+        if not LedgerPartitionManager.is_partitioned():
+            return []
+
+        table = LedgerPartitionManager.table()
+        schema = schema or settings.LEDGER_PARTITION_ARCHIVE_SCHEMA
+        archived = []
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not drop:
+                cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+
+            for name, start, end in LedgerPartitionManager.list_partitions():
+                if end > cutoff:
+                    break
+                cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+                if drop:
+                    cursor.execute(f'DROP TABLE "{name}"')
+                else:
+                    cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"')
+                archived.append(name)
+                last_archived = end - timedelta(days=1)
+                logger.info(f"Archived ledger partition {name} [{start}, {end})")
+
+            if archived:
+                previous = LedgerPartitionManager.archived_through()
+                SnapshotWatermark.objects.update_or_create(
+                    name=SnapshotWatermark.LEDGER_ARCHIVE,
+                    defaults={"closed_through": max(last_archived, previous or last_archived)},
+                )
+
+        return archived
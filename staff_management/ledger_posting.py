@@ -0,0 +1,186 @@
+# staff_management/ledger_posting.py
+
+import logging
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from staff_management.ledger_reconciliation import LedgerReconciliation
+from staff_management.ledger_service import LedgerService, LEDGER_SOURCES
+from staff_management.models import LedgerEntry
+
+logger = logging.getLogger(__name__)
+
+MODEL_BY_SOURCE_TYPE = {source_type: model for model, source_type in LEDGER_SOURCES}
+SOURCE_TYPE_BY_MODEL = {model: source_type for model, source_type in LEDGER_SOURCES}
+
+_state = threading.local()
+
+
+def _pending():
+    if not hasattr(_state, "pending"):
+        _state.pending = defaultdict(set)   # source_type -> {source_id}
+    return _state.pending
+
+
+class LedgerPostingQueue:
+    """
+    Collects "this source object changed" notices for the current transaction
+    and posts them to the ledger once, after commit.
+
+    Only (source_type, source_id) keys are queued, so saving the same object
+    ten times in one request costs one posting. The flush re-reads the
+    committed source rows, which keeps it correct even when a savepoint that
+    queued a key was rolled back:
+
+    - income/expense: existing entries are replaced by one entry built from
+      the current row (or just removed if the row is gone)
+    - booking: amounts are append-only; a credit is posted for whatever has
+      been paid beyond what the ledger already holds and a debit when the paid
+      amount was lowered. A changed booking_date moves the existing entries.
+    """
+
+    @staticmethod
+    def enqueue(source_type, source_ids):
+        pending = _pending()
+        pending[source_type].update(source_ids)
+
+        # A hook registered inside an atomic block that later rolls back is
+        # discarded by Django without notice, so every enqueue registers its
+        # own. Only the first flush to run finds anything pending; the rest
+        # return straight away.
+        transaction.on_commit(LedgerPostingQueue.flush)
+
+    @staticmethod
+    def flush():
+        pending = _pending()
+        if not pending:
+            return
+
+        batch = {source_type: set(ids) for source_type, ids in pending.items()}
+        pending.clear()
+
+        try:
+            LedgerPostingQueue.post(batch)
+        except Exception as e:
+            # Ledger drift is recoverable with rebuild_ledger; never fail the request
+            logger.error(f"Ledger posting failed for {batch}: {str(e)}")
+            try:
+                LedgerReconciliation.mark_sources_dirty(batch)
+            except Exception as e:
+                logger.error(f"Could not flag ledger days for reconciliation: {str(e)}")
+
+    @staticmethod
+    def post(batch):
+        """Bring the ledger in line with the given {source_type: {source_id}} rows."""
+        to_delete = Q()
+        new_entries = []
+        deltas = []
+
+        with transaction.atomic():
+            for source_type, ids in batch.items():
+                model = MODEL_BY_SOURCE_TYPE[source_type]
+                # Row locks order this posting against others for the same rows
+                # and against a ledger rebuild chunk holding them
+                rows = LedgerService.source_rows(model).select_for_update(of=("self",)).in_bulk(ids)
+
+                if source_type == "booking":
+                    missing = set(ids) - set(rows)
+                    if missing:
+                        to_delete |= Q(source_type=source_type, source_id__in=missing)
+                    deltas += LedgerPostingQueue._move_booking_entries(rows.values())
+                    new_entries += LedgerPostingQueue._booking_payments(rows.values())
+                    continue
+
+                to_delete |= Q(source_type=source_type, source_id__in=ids)
+                for instance in rows.values():
+                    new_entries += LedgerService.build_entries(source_type, instance)
+
+            if to_delete:
+                stale = LedgerEntry.objects.filter(to_delete)
+                removed = list(stale.values("id", "source_type", "date", "debit", "credit"))
+                if removed:
+                    LedgerEntry.objects.filter(id__in=[row["id"] for row in removed]).delete()
+                    deltas += LedgerService.collect_deltas(removed, sign=-1).items()
+
+            if new_entries:
+                LedgerEntry.objects.bulk_create(new_entries)
+                deltas += LedgerService.collect_deltas(new_entries).items()
+
+            # Net out per (account, day) so an unchanged re-save touches nothing
+            combined = defaultdict(lambda: [Decimal("0.00"), Decimal("0.00"), 0])
+            for key, (debit, credit, count) in deltas:
+                combined[key][0] += debit
+                combined[key][1] += credit
+                combined[key][2] += count
+            LedgerService.apply_deltas(combined)
+            LedgerReconciliation.mark_dirty(day for _source_type, day in combined)
+
+        return new_entries
+
+    @staticmethod
+    def _move_booking_entries(bookings):
+        """Re-date entries of bookings whose booking_date changed; returns the deltas."""
+        day_by_id = {b.id: LedgerService.build_entry_date("booking", b) for b in bookings}
+        if not day_by_id:
+            return []
+
+        moved = [
+            row for row in LedgerEntry.objects.filter(
+                source_type="booking", source_id__in=day_by_id
+            ).values("id", "source_id", "source_type", "date", "debit", "credit")
+            if row["date"] != day_by_id[row["source_id"]]
+        ]
+        if not moved:
+            return []
+
+        ids_by_day = defaultdict(set)
+        for row in moved:
+            ids_by_day[day_by_id[row["source_id"]]].add(row["id"])
+        for day, entry_ids in ids_by_day.items():
+            LedgerEntry.objects.filter(id__in=entry_ids).update(date=day)
+        # Both the old and the new day are touched, so both are marked dirty
+        deltas = list(LedgerService.collect_deltas(moved, sign=-1).items())
+        deltas += LedgerService.collect_deltas(
+            [{**row, "date": day_by_id[row["source_id"]]} for row in moved]
+        ).items()
+        return deltas
+
+    @staticmethod
+    def _booking_payments(bookings):
+        bookings = list(bookings)
+        if not bookings:
+            return []
+
+        posted = dict(
+            LedgerEntry.objects.filter(
+                source_type="booking", source_id__in=[b.id for b in bookings]
+            )
+            .values_list("source_id")
+            .annotate(total=Sum("credit") - Sum("debit"))
+        )
+
+        entries = []
+        for booking in bookings:
+            already = posted.get(booking.id) or Decimal("0.00")
+            diff = (booking.paid_amount or Decimal("0.00")) - already
+            if not diff:
+                continue
+
+            entry = LedgerEntry(
+                date=LedgerService.build_entry_date("booking", booking),
+                source_type="booking",
+                source_id=booking.id,
+                description=f"Booking payment ({booking.guest_name})",
+                credit=max(diff, Decimal("0.00")),
+                debit=max(-diff, Decimal("0.00")),
+            )
+            if diff < 0:
+                entry.description = f"Payment reduced ({booking.guest_name})"
+            elif already:
+                entry.description = f"Additional payment ({booking.guest_name})"
+            entries.append(entry)
+        return entries
@@ -0,0 +1,251 @@
+# staff_management/ledger_rebuild.py
+
+import logging
+import threading
+import time
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from staff_management.ledger_partitions import LedgerPartitionManager
+from staff_management.ledger_service import LedgerService, LEDGER_SOURCES
+from staff_management.models import (
+    LedgerEntry, LedgerBalanceSnapshot, LedgerDailyRollup, LedgerRebuildJob,
+    LedgerDayDigest,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RebuildInProgress(RuntimeError):
+    """Another rebuild job is running; `job` is that job when it could be read."""
+
+    def __init__(self, job=None):
+        super().__init__(
+            f"Ledger rebuild #{job.id} is already running" if job else "A ledger rebuild is already running"
+        )
+        self.job = job
+
+
+class LedgerArchived(RuntimeError):
+    """Ledger history has been archived; a rebuild would lose its totals."""
+
+
+class LedgerRebuilder:
+    """
+    Set-based ledger rebuild.
+
+    Source rows are read in primary-key order, `chunk_size` at a time; their
+    ledger entries are written with one bulk_create and the job checkpoint is
+    saved in the same transaction, so a crash loses at most the chunk in flight
+    and `run()` on the same job picks up where it stopped. Rows created after
+    the job started are left alone: they post their own entries on save.
+
+    Each chunk locks its source rows and replaces whatever entries they have,
+    so a row edited (and posted) while the rebuild runs is never counted twice.
+    """
+
+    def __init__(self, job, progress=None):
+        self.job = job
+        self.progress = progress or (lambda message: logger.info(message))
+
+    @classmethod
+    def start(cls, chunk_size=1000, progress=None):
+        job = cls.claim(LedgerRebuildJob(chunk_size=chunk_size))
+        return cls(job, progress).run()
+
+    @classmethod
+    def resume(cls, job_id=None, progress=None):
+        job = cls.resumable(job_id)
+        if job is None:
+            raise LedgerRebuildJob.DoesNotExist("No unfinished ledger rebuild to resume")
+        return cls(cls.claim(job), progress).run()
+
+    @staticmethod
+    def resumable(job_id=None):
+        """The given (or latest) job that stopped before completing, or None."""
+        LedgerRebuilder.expire_stale()
+        jobs = LedgerRebuildJob.objects.exclude(
+            status__in=[LedgerRebuildJob.STATUS_COMPLETED, LedgerRebuildJob.STATUS_RUNNING]
+        )
+        return jobs.filter(pk=job_id).first() if job_id else jobs.first()
+
+    @staticmethod
+    def expire_stale():
+        """Fail running jobs that stopped checkpointing; returns how many."""
+        now = timezone.now()
+        count = LedgerRebuildJob.objects.filter(
+            status=LedgerRebuildJob.STATUS_RUNNING,
+            updated_at__lt=now - LedgerRebuildJob.STALE_AFTER,
+        ).update(
+            status=LedgerRebuildJob.STATUS_FAILED,
+            error="Worker stopped responding; resume to continue",
+            updated_at=now,
+        )
+        if count:
+            logger.warning(f"Expired {count} stale ledger rebuild job(s)")
+        return count
+
+    @staticmethod
+    def claim(job):
+        """
+        Mark `job` (new or stopped) running. The database allows one running
+        job, so this is the only check that counts; raises RebuildInProgress
+        when another job holds it, LedgerArchived once history is archived.
+        """
+        archived_through = LedgerPartitionManager.archived_through()
+        if archived_through:
+            raise LedgerArchived(
+                f"Ledger entries through {archived_through} are archived; a rebuild would drop their totals"
+            )
+
+        LedgerRebuilder.expire_stale()
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                if job.pk is None:
+                    job.status = LedgerRebuildJob.STATUS_RUNNING
+                    job.started_at = now
+                    job.save()
+                    return job
+                claimed = LedgerRebuildJob.objects.filter(pk=job.pk).exclude(
+                    status__in=[LedgerRebuildJob.STATUS_COMPLETED, LedgerRebuildJob.STATUS_RUNNING]
+                ).update(status=LedgerRebuildJob.STATUS_RUNNING, error="", updated_at=now)
+        except IntegrityError:
+            claimed = 0
+
+        if not claimed:
+            raise RebuildInProgress(
+                LedgerRebuildJob.objects.filter(status=LedgerRebuildJob.STATUS_RUNNING).first()
+            )
+        job.refresh_from_db()
+        return job
+
+    def run(self):
+        """Run a job taken with claim() to completion."""
+        job = self.job
+        started = time.monotonic()
+        processed_before = job.processed
+
+        try:
+            if not job.cleared:
+                self._clear()
+
+            for index in range(job.source_index, len(LEDGER_SOURCES)):
+                self._rebuild_source(index)
+
+            self.progress("Rebuilding balance snapshots and daily rollup")
+            self._heartbeat()
+            LedgerService.rebuild_balance_snapshots()
+            self._heartbeat()
+            LedgerService.verify_daily_rollup(repair=True)
+
+        except Exception as e:
+            logger.exception(f"Ledger rebuild #{job.id} failed: {str(e)}")
+            job.status = LedgerRebuildJob.STATUS_FAILED
+            job.error = str(e)
+            try:
+                job.save(update_fields=["status", "error", "updated_at"])
+            except Exception:
+                # Left running; expire_stale() fails it once STALE_AFTER passes
+                logger.exception(f"Could not record the failure of ledger rebuild #{job.id}")
+            raise
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        job.status = LedgerRebuildJob.STATUS_COMPLETED
+        job.finished_at = timezone.now()
+        job.rows_per_second = round((job.processed - processed_before) / elapsed, 1)
+        job.save(update_fields=["status", "finished_at", "rows_per_second", "updated_at"])
+
+        self.progress(
+            f"Ledger rebuild #{job.id} done: {job.processed} source rows, "
+            f"{job.entries_created} entries, {job.rows_per_second} rows/s"
+        )
+        return job
+
+    def _heartbeat(self):
+        self.job.save(update_fields=["updated_at"])
+
+    def _clear(self):
+        job = self.job
+        with transaction.atomic():
+            # No signal receivers on these models, so each is one DELETE statement
+            LedgerEntry.objects.all().delete()
+            LedgerBalanceSnapshot.objects.all().delete()
+            LedgerDailyRollup.objects.all().delete()
+            # Every day changes; the next reconciliation does a full pass
+            LedgerDayDigest.objects.all().delete()
+
+            # Read after the delete: a row whose posting slipped past it is at
+            # or below its mark and gets its entries replaced by its chunk
+            job.high_water_marks = {
+                source_type: model.objects.aggregate(top=Max("pk"))["top"] or 0
+                for model, source_type in LEDGER_SOURCES
+            }
+
+            job.cleared = True
+            job.source_index = 0
+            job.last_pk = 0
+            job.save(update_fields=[
+                "high_water_marks", "cleared", "source_index", "last_pk", "updated_at",
+            ])
+        self.progress("Existing ledger entries cleared")
+
+    def _rebuild_source(self, index):
+        job = self.job
+        model, source_type = LEDGER_SOURCES[index]
+        high_water = job.high_water_marks.get(source_type, 0)
+
+        while True:
+            chunk_started = time.monotonic()
+
+            with transaction.atomic():
+                # Locked like LedgerPostingQueue.post locks them, so a posting
+                # for one of these rows lands either wholly before or after
+                chunk = list(
+                    LedgerService.source_rows(model).select_for_update(of=("self",))
+                    .filter(pk__gt=job.last_pk, pk__lte=high_water)
+                    .order_by("pk")[:job.chunk_size]
+                )
+                if not chunk:
+                    break
+
+                entries = [
+                    entry
+                    for instance in chunk
+                    for entry in LedgerService.build_entries(source_type, instance)
+                ]
+                # Drop what postings made since the clear; the locked rows are current
+                LedgerEntry.objects.filter(
+                    source_type=source_type, source_id__in=[instance.pk for instance in chunk]
+                ).delete()
+                LedgerEntry.objects.bulk_create(entries, batch_size=job.chunk_size)
+                job.last_pk = chunk[-1].pk
+                job.processed += len(chunk)
+                job.entries_created += len(entries)
+                job.save(update_fields=["last_pk", "processed", "entries_created", "updated_at"])
+
+            rate = len(chunk) / max(time.monotonic() - chunk_started, 1e-6)
+            self.progress(f"{source_type}: up to pk {job.last_pk} ({job.processed} rows, {rate:.0f} rows/s)")
+
+        with transaction.atomic():
+            job.source_index = index + 1
+            job.last_pk = 0
+            job.save(update_fields=["source_index", "last_pk", "updated_at"])
+
+
+def run_rebuild_async(job):
+    """Run a claimed rebuild job on a background thread (admin-triggered)."""
+    def _run():
+        try:
+            LedgerRebuilder(job).run()
+        except Exception:
+            # run() has logged it with its traceback and recorded it on the job
+            pass
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return thread
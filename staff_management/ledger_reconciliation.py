@@ -0,0 +1,220 @@
+# staff_management/ledger_reconciliation.py
+
+import hashlib
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from staff_management.ledger_partitions import LedgerPartitionManager
+from staff_management.ledger_service import LEDGER_SOURCES, INCOME_SOURCES
+from staff_management.models import LedgerEntry, LedgerDailyRollup, LedgerDayDigest
+
+logger = logging.getLogger(__name__)
+
+ZERO_PAIR = ("0.00", "0.00")
+INCOME_TYPES = {source_type for _model, source_type in INCOME_SOURCES}
+MODEL_BY_SOURCE_TYPE = {source_type: model for model, source_type in LEDGER_SOURCES}
+
+
+def _date_field(source_type):
+    return "booking_date" if source_type == "booking" else "date"
+
+
+def _pair(debit, credit):
+    return (f"{debit or 0:.2f}", f"{credit or 0:.2f}")
+
+
+def _net_pair(debit, credit):
+    """Bookings post payment increases and reductions separately; compare what they net to."""
+    net = (credit or 0) - (debit or 0)
+    return _pair(0, net) if net >= 0 else _pair(-net, 0)
+
+
+def _digest(items):
+    """Totals and a stable hash of {(source_type, source_id): (debit, credit)}."""
+    sha = hashlib.sha256()
+    debit = credit = Decimal("0.00")
+    for (source_type, source_id), (d, c) in sorted(items.items()):
+        sha.update(f"{source_type}:{source_id}:{d}:{c}\n".encode())
+        debit += Decimal(d)
+        credit += Decimal(c)
+    return debit, credit, len(items), sha.hexdigest()
+
+
+class LedgerReconciliation:
+    """
+    Compares, per day, what the source tables (bookings, incomes, expenses)
+    should have posted with what LedgerEntry holds. Each side is reduced to
+    {(source_type, source_id): (debit, credit)}; equal hashes mean the day is
+    in sync, otherwise the differing source objects are reported.
+    Descriptions are not compared.
+
+    The first run (or `full=True`) checks every day; later runs only check the
+    days ledger postings have marked dirty since, plus days still in drift.
+    Changes made behind the posting pipeline (raw SQL, queryset.update) are
+    only seen by a full run. Days archived out of the ledger are not checked.
+    """
+
+    @staticmethod
+    def mark_dirty(days):
+        days = {day for day in days if day}
+        if not days:
+            return
+        now = timezone.now()
+        LedgerDayDigest.objects.filter(date__in=days).update(is_dirty=True, dirtied_at=now)
+        LedgerDayDigest.objects.bulk_create(
+            [LedgerDayDigest(date=day, dirtied_at=now) for day in days], ignore_conflicts=True
+        )
+
+    @staticmethod
+    def mark_sources_dirty(batch):
+        """
+        Mark the current and previously posted days of {source_type: {source_id}}
+        dirty. Used when a posting failed and the ledger was left as it was.
+        """
+        days = set()
+        for source_type, ids in batch.items():
+            model = MODEL_BY_SOURCE_TYPE[source_type]
+            days.update(
+                model.objects.filter(pk__in=ids).values_list(_date_field(source_type), flat=True)
+            )
+            days.update(
+                LedgerEntry.objects.filter(source_type=source_type, source_id__in=ids)
+                .values_list("date", flat=True)
+            )
+        LedgerReconciliation.mark_dirty(days)
+
+    @staticmethod
+    def all_days():
+        days = set(LedgerDailyRollup.objects.values_list("date", flat=True).distinct())
+        for model, source_type in LEDGER_SOURCES:
+            days.update(
+                model.objects.order_by().values_list(_date_field(source_type), flat=True).distinct()
+            )
+        return days
+
+    @staticmethod
+    def expected_postings(days):
+        """{day: {(source_type, source_id): (debit, credit)}} derived from source rows."""
+        expected = defaultdict(dict)
+        for model, source_type in LEDGER_SOURCES:
+            date_field = _date_field(source_type)
+            amount_field = "paid_amount" if source_type == "booking" else "amount"
+            rows = model.objects.filter(**{f"{date_field}__in": days}).values_list(
+                "id", date_field, amount_field
+            )
+            for source_id, day, amount in rows.iterator():
+                if source_type == "booking":
+                    pair = _net_pair(0, amount)
+                elif source_type in INCOME_TYPES:
+                    pair = _pair(0, amount)
+                else:
+                    pair = _pair(amount, 0)
+                if pair != ZERO_PAIR:
+                    expected[day][(source_type, source_id)] = pair
+        return expected
+
+    @staticmethod
+    def posted(days):
+        """{day: {(source_type, source_id): (debit, credit)}} from LedgerEntry."""
+        posted = defaultdict(dict)
+        rows = (
+            LedgerEntry.objects.filter(date__in=days)
+            .values("date", "source_type", "source_id")
+            .annotate(debit=Sum("debit"), credit=Sum("credit"))
+            .order_by()
+        )
+        for row in rows.iterator():
+            pair_of = _net_pair if row["source_type"] == "booking" else _pair
+            pair = pair_of(row["debit"], row["credit"])
+            if pair != ZERO_PAIR:
+                posted[row["date"]][(row["source_type"], row["source_id"])] = pair
+        return posted
+
+    @staticmethod
+    def run(full=False, chunk_days=100):
+        """
+        Verify dirty days (every day with `full=True` or on the first run).
+        Returns {day: [mismatch, ...]} for the days that are out of sync.
+        """
+        if full or not LedgerDayDigest.objects.filter(checked_at__isnull=False).exists():
+            days = LedgerReconciliation.all_days()
+            days |= set(LedgerDayDigest.objects.values_list("date", flat=True))
+        else:
+            # Days still out of sync are re-checked until they are fixed
+            days = set(
+                LedgerDayDigest.objects.filter(Q(is_dirty=True) | Q(in_sync=False))
+                .values_list("date", flat=True)
+            )
+
+        # Archived days have no live entries to compare
+        archived_through = LedgerPartitionManager.archived_through()
+        days = sorted(day for day in days if not archived_through or day > archived_through)
+        drift = {}
+        for start in range(0, len(days), chunk_days):
+            drift.update(LedgerReconciliation._check(days[start:start + chunk_days]))
+
+        logger.info(f"Ledger reconciliation checked {len(days)} days, {len(drift)} out of sync")
+        return drift
+
+    @staticmethod
+    def _check(days):
+        started = timezone.now()
+        expected = LedgerReconciliation.expected_postings(days)
+        posted = LedgerReconciliation.posted(days)
+        now = timezone.now()
+
+        digests = []
+        drift = {}
+        for day in days:
+            source_items = expected.get(day, {})
+            ledger_items = posted.get(day, {})
+            source_debit, source_credit, source_count, source_hash = _digest(source_items)
+            ledger_debit, ledger_credit, ledger_count, ledger_hash = _digest(ledger_items)
+
+            mismatches = []
+            if source_hash != ledger_hash:
+                for key in sorted(set(source_items) | set(ledger_items)):
+                    if source_items.get(key) != ledger_items.get(key):
+                        mismatches.append({
+                            "source_type": key[0],
+                            "source_id": key[1],
+                            "expected": list(source_items.get(key, ZERO_PAIR)),
+                            "posted": list(ledger_items.get(key, ZERO_PAIR)),
+                        })
+                drift[day] = mismatches
+
+            digests.append(LedgerDayDigest(
+                date=day,
+                source_debit=source_debit,
+                source_credit=source_credit,
+                source_count=source_count,
+                source_hash=source_hash,
+                ledger_debit=ledger_debit,
+                ledger_credit=ledger_credit,
+                ledger_count=ledger_count,
+                ledger_hash=ledger_hash,
+                is_dirty=False,
+                in_sync=not mismatches,
+                mismatches=mismatches,
+                checked_at=now,
+            ))
+
+        with transaction.atomic():
+            LedgerDayDigest.objects.bulk_create(
+                digests,
+                update_conflicts=True,
+                unique_fields=["date"],
+                update_fields=[
+                    "source_debit", "source_credit", "source_count", "source_hash",
+                    "ledger_debit", "ledger_credit", "ledger_count", "ledger_hash",
+                    "is_dirty", "in_sync", "mismatches", "checked_at",
+                ],
+            )
+            # Days posted to while this chunk was being read stay dirty
+            LedgerDayDigest.objects.filter(date__in=days, dirtied_at__gte=started).update(is_dirty=True)
+        return drift
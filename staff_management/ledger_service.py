@@ -0,0 +1,340 @@
+# staff_management/ledger_service.py
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from staff_management.models import (
+    LedgerEntry, LedgerBalanceSnapshot, LedgerDailyRollup,
+    Booking, SalesIncome, OtherIncome, Expense,
+    LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
+    RentalExpense, SalaryExpense, MiscellaneousExpense,
+    MaintenanceExpense, CapitalExpense, OtherExpense,
+)
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+
+INCOME_SOURCES = [
+    (SalesIncome, "salesincome"),
+    (OtherIncome, "otherincome"),
+]
+
+EXPENSE_SOURCES = [
+    (LaundryExpense, "laundryexpense"),
+    (CleaningExpense, "cleaningexpense"),
+    (MessExpense, "messexpense"),
+    (CafeteriaExpense, "cafeteriaexpense"),
+    (RentalExpense, "rentalexpense"),
+    (SalaryExpense, "salaryexpense"),
+    (MiscellaneousExpense, "miscexpense"),
+    (MaintenanceExpense, "maintenanceexpense"),
+    (CapitalExpense, "capitalexpense"),
+    (OtherExpense, "otherexpense"),
+]
+
+# Every class an expense can be saved or deleted through. All of them share
+# the Expense table, and an expense's source_type is its category.
+EXPENSE_MODELS = [Expense] + [model for model, _source_type in EXPENSE_SOURCES]
+
+# Every model that posts to the ledger, with its LedgerEntry.source_type
+LEDGER_SOURCES = [(Booking, "booking")] + INCOME_SOURCES + EXPENSE_SOURCES
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+class LedgerService:
+    """Keeps derived ledger tables in step with LedgerEntry writes."""
+
+    @staticmethod
+    def source_rows(model):
+        """Queryset for building a source's entries; incomes join the category their description names."""
+        if model in (SalesIncome, OtherIncome):
+            return model.objects.select_related("category")
+        return model.objects.all()
+
+    @staticmethod
+    def build_entry_date(source_type, instance):
+        """Day a source object's entries are posted on."""
+        if source_type == "booking":
+            return _as_date(instance.booking_date or instance.checkin_date)
+        return instance.date
+
+    @staticmethod
+    def build_entries(source_type, instance):
+        """
+        Unsaved LedgerEntry rows representing the current state of a source
+        object: bookings credit what has been paid, incomes credit their
+        amount and expenses debit theirs.
+        """
+        if source_type == "booking":
+            if not instance.paid_amount:
+                return []
+            return [LedgerEntry(
+                date=LedgerService.build_entry_date(source_type, instance),
+                source_type=source_type,
+                source_id=instance.id,
+                description=f"Booking payment ({instance.guest_name})",
+                credit=instance.paid_amount,
+                debit=ZERO,
+            )]
+
+        if source_type in ("salesincome", "otherincome"):
+            label = "Sales Income" if source_type == "salesincome" else "Other Income"
+            return [LedgerEntry(
+                date=instance.date,
+                source_type=source_type,
+                source_id=instance.id,
+                description=instance.description or f"{label} ({instance.category})",
+                credit=instance.amount or ZERO,
+                debit=ZERO,
+            )]
+
+        return [LedgerEntry(
+            date=instance.date,
+            source_type=source_type,
+            source_id=instance.id,
+            description=instance.description or f"{source_type} expense",
+            debit=instance.amount or ZERO,
+            credit=ZERO,
+        )]
+
+    @staticmethod
+    def collect_deltas(entries, sign=1):
+        """
+        Fold LedgerEntry objects (or dicts with the same keys, optionally with a
+        pre-aggregated "count") into {(source_type, date): [debit, credit, count]}
+        so each account/day is touched once.
+        """
+        deltas = defaultdict(lambda: [ZERO, ZERO, 0])
+        for entry in entries:
+            if isinstance(entry, dict):
+                source_type, day = entry["source_type"], entry["date"]
+                debit, credit = entry["debit"], entry["credit"]
+                count = entry.get("count", 1)
+            else:
+                source_type, day = entry.source_type, entry.date
+                debit, credit = entry.debit, entry.credit
+                count = 1
+
+            key = (source_type, _as_date(day))
+            deltas[key][0] += sign * (debit or ZERO)
+            deltas[key][1] += sign * (credit or ZERO)
+            deltas[key][2] += sign * count
+        return deltas
+
+    @staticmethod
+    def apply_deltas(deltas):
+        """Apply ledger movements to every derived table."""
+        with transaction.atomic(savepoint=False):
+            LedgerService.apply_balance_deltas(deltas)
+            LedgerService.apply_rollup_deltas(deltas)
+
+    @staticmethod
+    def apply_balance_deltas(deltas):
+        """
+        Add the given debit/credit movements to the day and month snapshots
+        they fall in. Later periods are left alone, so a backdated posting
+        costs the same two rows as one dated today. Must run in the same
+        transaction as the LedgerEntry write it mirrors.
+        """
+        now = timezone.now()
+
+        with transaction.atomic(savepoint=False):
+            for (source_type, day), (debit, credit, _count) in deltas.items():
+                if not debit and not credit:
+                    continue
+
+                day = _as_date(day)
+                periods = (
+                    (LedgerBalanceSnapshot.PERIOD_DAY, day),
+                    (LedgerBalanceSnapshot.PERIOD_MONTH, day.replace(day=1)),
+                )
+
+                for period, period_start in periods:
+                    rows = LedgerBalanceSnapshot.objects.filter(
+                        source_type=source_type, period=period, period_start=period_start
+                    )
+                    changes = {
+                        "debit": F("debit") + debit,
+                        "credit": F("credit") + credit,
+                        "balance": F("balance") + (credit - debit),
+                        "updated_at": now,
+                    }
+
+                    if not rows.update(**changes):
+                        try:
+                            with transaction.atomic():
+                                LedgerBalanceSnapshot.objects.create(
+                                    source_type=source_type, period=period, period_start=period_start,
+                                    debit=debit, credit=credit, balance=credit - debit,
+                                )
+                        except IntegrityError:
+                            # Created concurrently; add on top of it instead
+                            rows.update(**changes)
+
+    @staticmethod
+    def apply_rollup_deltas(deltas):
+        """Add ledger movements to the (date, source_type) rollup rows."""
+        with transaction.atomic(savepoint=False):
+            for (source_type, day), (debit, credit, count) in deltas.items():
+                if not debit and not credit and not count:
+                    continue
+
+                day = _as_date(day)
+                rows = LedgerDailyRollup.objects.filter(date=day, source_type=source_type)
+                changes = {
+                    "debit": F("debit") + debit,
+                    "credit": F("credit") + credit,
+                    "entry_count": F("entry_count") + count,
+                }
+
+                if not rows.update(**changes):
+                    try:
+                        with transaction.atomic():
+                            LedgerDailyRollup.objects.create(
+                                date=day, source_type=source_type,
+                                debit=debit, credit=credit, entry_count=count,
+                            )
+                    except IntegrityError:
+                        # Created concurrently; add on top of it instead
+                        rows.update(**changes)
+
+                if count < 0:
+                    rows.filter(entry_count__lte=0).delete()
+
+    @staticmethod
+    def raw_daily_totals(start_date=None, end_date=None):
+        """{(date, source_type): (debit, credit, count)} straight from LedgerEntry."""
+        entries = LedgerEntry.objects.all()
+        if start_date:
+            entries = entries.filter(date__gte=start_date)
+        if end_date:
+            entries = entries.filter(date__lte=end_date)
+
+        rows = entries.values("date", "source_type").annotate(
+            total_debit=Sum("debit"), total_credit=Sum("credit"), count=Count("id")
+        ).order_by()
+        return {
+            (row["date"], row["source_type"]): (
+                row["total_debit"] or ZERO, row["total_credit"] or ZERO, row["count"]
+            )
+            for row in rows.iterator()
+        }
+
+    @staticmethod
+    def verify_daily_rollup(repair=True, batch_size=1000):
+        """
+        Recompute the rollup from raw entries and compare with the stored rows.
+        Returns a list of (date, source_type, stored, expected) mismatches; with
+        repair=True the table is rewritten from the raw totals.
+        """
+        expected = LedgerService.raw_daily_totals()
+        stored = {
+            (row.date, row.source_type): (row.debit, row.credit, row.entry_count)
+            for row in LedgerDailyRollup.objects.all().iterator()
+        }
+
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            if expected.get(key) != stored.get(key):
+                mismatches.append((key[0], key[1], stored.get(key), expected.get(key)))
+
+        if repair and mismatches:
+            with transaction.atomic():
+                LedgerDailyRollup.objects.all().delete()
+                LedgerDailyRollup.objects.bulk_create(
+                    [
+                        LedgerDailyRollup(
+                            date=day, source_type=source_type,
+                            debit=debit, credit=credit, entry_count=count,
+                        )
+                        for (day, source_type), (debit, credit, count) in expected.items()
+                    ],
+                    batch_size=batch_size,
+                )
+            logger.info(f"Ledger rollup repaired ({len(mismatches)} mismatched days)")
+
+        return mismatches
+
+    @staticmethod
+    def opening_balance(source_type, on_date):
+        """
+        Balance of an account before any entry dated `on_date`: the months
+        before its month plus the days of its month before it, in one query.
+        """
+        month_start = on_date.replace(day=1)
+        total = LedgerBalanceSnapshot.objects.filter(
+            Q(period=LedgerBalanceSnapshot.PERIOD_MONTH, period_start__lt=month_start)
+            | Q(period=LedgerBalanceSnapshot.PERIOD_DAY, period_start__gte=month_start, period_start__lt=on_date),
+            source_type=source_type,
+        ).aggregate(total=Sum("balance"))["total"]
+        return (total or ZERO).quantize(ZERO)
+
+    @staticmethod
+    def closing_balance(source_type, on_date):
+        """Balance of an account after every entry dated `on_date`."""
+        return LedgerService.opening_balance(source_type, on_date + timedelta(days=1))
+
+    @staticmethod
+    def rebuild_balance_snapshots(source_type=None, batch_size=1000):
+        """
+        Recompute snapshots from LedgerEntry. Returns the number of rows written.
+        """
+        entries = LedgerEntry.objects.all()
+        snapshots = LedgerBalanceSnapshot.objects.all()
+        if source_type:
+            entries = entries.filter(source_type=source_type)
+            snapshots = snapshots.filter(source_type=source_type)
+
+        daily = (
+            entries.values("source_type", "date")
+            .annotate(total_debit=Sum("debit"), total_credit=Sum("credit"))
+            .order_by("source_type", "date")
+        )
+
+        rows = []
+        months = defaultdict(lambda: [ZERO, ZERO])
+
+        for row in daily.iterator():
+            debit = row["total_debit"] or ZERO
+            credit = row["total_credit"] or ZERO
+
+            rows.append(LedgerBalanceSnapshot(
+                source_type=row["source_type"],
+                period=LedgerBalanceSnapshot.PERIOD_DAY,
+                period_start=row["date"],
+                debit=debit,
+                credit=credit,
+                balance=credit - debit,
+            ))
+            month = months[(row["source_type"], row["date"].replace(day=1))]
+            month[0] += debit
+            month[1] += credit
+
+        for (account, month_start), (m_debit, m_credit) in months.items():
+            rows.append(LedgerBalanceSnapshot(
+                source_type=account,
+                period=LedgerBalanceSnapshot.PERIOD_MONTH,
+                period_start=month_start,
+                debit=m_debit,
+                credit=m_credit,
+                balance=m_credit - m_debit,
+            ))
+
+        with transaction.atomic():
+            snapshots.delete()
+            LedgerBalanceSnapshot.objects.bulk_create(rows, batch_size=batch_size)
+
+        logger.info(f"Rebuilt {len(rows)} ledger balance snapshots")
+        return len(rows)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from staff_management.expense_import import ExpenseImporter, ImportFileError
+
+
+class Command(BaseCommand):
+    help = 'Import expenses from a CSV or XLSX file, reporting rows that fail validation'
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file with category, date and amount columns")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows inserted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        importer = ExpenseImporter(chunk_size=options["chunk_size"])
+        try:
+            with open(options["path"], "rb") as stream:
+                report = importer.run(stream, options["path"])
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stdout.write(f"Row {error['row']}: {error['errors']}")
+        if report["errors_truncated"]:
+            self.stdout.write(f"... {report['failed'] - len(report['errors'])} more rows failed")
+
+        message = f"{report['imported']} expenses imported, {report['failed']} rows failed"
+        if report["failed"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ {message}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {message}"))
@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from staff_management.ledger_partitions import LedgerPartitionManager, SCHEMES
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming ledger partitions and archive old ones (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Partition the existing ledger table (copies every row under an exclusive lock)",
+        )
+        parser.add_argument("--scheme", choices=SCHEMES, help="Defaults to LEDGER_PARTITIONING")
+        parser.add_argument("--months-ahead", type=int, default=3)
+        parser.add_argument(
+            "--archive-before",
+            type=date.fromisoformat,
+            help="Detach partitions ending on or before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument("--schema", help="Archive schema (defaults to LEDGER_PARTITION_ARCHIVE_SCHEMA)")
+        parser.add_argument("--drop", action="store_true", help="Drop archived partitions instead of moving them")
+        parser.add_argument("--list", action="store_true", help="Only list the current partitions")
+
+    def handle(self, *args, **options):
+        if not LedgerPartitionManager.is_supported():
+            self.stdout.write(self.style.WARNING("⚠️ Ledger partitioning needs PostgreSQL, nothing to do"))
+            return
+
+        scheme = options["scheme"] or LedgerPartitionManager.scheme()
+
+        if options["convert"]:
+            if not scheme:
+                raise CommandError("Pass --scheme or set LEDGER_PARTITIONING")
+            if LedgerPartitionManager.convert(scheme):
+                self.stdout.write(self.style.SUCCESS(f"✅ Ledger table partitioned by {scheme}"))
+            else:
+                self.stdout.write("Ledger table is already partitioned")
+
+        if not LedgerPartitionManager.is_partitioned():
+            raise CommandError("Ledger table is not partitioned, run with --convert first")
+
+        if not options["list"]:
+            if scheme:
+                created = LedgerPartitionManager.ensure_partitions(options["months_ahead"], scheme)
+                self.stdout.write(self.style.SUCCESS(f"✅ {len(created)} partitions created"))
+
+            if options["archive_before"]:
+                archived = LedgerPartitionManager.archive_before(
+                    options["archive_before"], schema=options["schema"], drop=options["drop"]
+                )
+                action = "dropped" if options["drop"] else "archived"
+                self.stdout.write(self.style.SUCCESS(f"✅ {len(archived)} partitions {action}"))
+
+        for name, start, end in LedgerPartitionManager.list_partitions():
+            self.stdout.write(f"{name}: {start} → {end}")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from staff_management.expense_rollup import ExpenseRollupService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild ExpenseDailyRollup from the Expense table and report days that did not match'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report mismatches, do not rewrite the rollup",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = ExpenseRollupService.verify(repair=not options["dry_run"])
+
+        for day, category, stored, expected in mismatches:
+            self.stdout.write(f"{day} {category}: stored={stored} expected={expected}")
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("✅ Expense rollup matches the Expense table"))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.ERROR(f"❌ {len(mismatches)} mismatched rollup rows"))
+        else:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(mismatches)} mismatched rollup rows repaired"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from staff_management.ledger_rebuild import LedgerArchived, LedgerRebuilder, RebuildInProgress
+from staff_management.models import LedgerRebuildJob
+
+
+class Command(BaseCommand):
+    help = 'Regenerate all ledger entries from bookings, income and expenses in committed chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--resume",
+            nargs="?",
+            const=0,
+            type=int,
+            help="Resume an unfinished rebuild (latest one if no job id is given)",
+        )
+
+    def handle(self, *args, **options):
+        progress = lambda message: self.stdout.write(message)
+
+        try:
+            if options["resume"] is not None:
+                job = LedgerRebuilder.resume(options["resume"] or None, progress=progress)
+            else:
+                job = LedgerRebuilder.start(chunk_size=options["chunk_size"], progress=progress)
+        except (LedgerRebuildJob.DoesNotExist, LedgerArchived, RebuildInProgress) as e:
+            raise CommandError(str(e))
+        except Exception as e:
+            raise CommandError(f"Ledger rebuild failed, run with --resume to continue: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuild #{job.id}: {job.processed} rows, {job.entries_created} entries, "
+            f"{job.rows_per_second} rows/s"
+        ))
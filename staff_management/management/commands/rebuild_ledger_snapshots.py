@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from staff_management.ledger_service import LedgerService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-account daily and monthly ledger balance snapshots from LedgerEntry'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", help="Only rebuild this source_type")
+
+    def handle(self, *args, **options):
+        count = LedgerService.rebuild_balance_snapshots(source_type=options.get("account"))
+        self.stdout.write(self.style.SUCCESS(f"✅ {count} ledger balance snapshots rebuilt"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from staff_management.ledger_reconciliation import LedgerReconciliation
+
+
+class Command(BaseCommand):
+    help = 'Compare per-day ledger postings with bookings, income and expenses and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Check every day instead of only the days changed since the last run",
+        )
+
+    def handle(self, *args, **options):
+        drift = LedgerReconciliation.run(full=options["full"])
+
+        for day, mismatches in sorted(drift.items()):
+            self.stdout.write(self.style.ERROR(f"❌ {day}"))
+            for item in mismatches:
+                self.stdout.write(
+                    f"   {item['source_type']} #{item['source_id']}: "
+                    f"expected D:{item['expected'][0]} C:{item['expected'][1]}, "
+                    f"posted D:{item['posted'][0]} C:{item['posted'][1]}"
+                )
+
+        if drift:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {len(drift)} days out of sync, fix with rebuild_ledger"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Ledger matches source records"))
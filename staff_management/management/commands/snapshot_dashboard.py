@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from staff_management.dashboard_snapshots import DashboardSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Write dashboard snapshots for every closed day not yet snapshotted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Discard existing snapshots and rebuild them from the first day with data",
+        )
+
+    def handle(self, *args, **options):
+        if options["full"]:
+            DashboardSnapshotService.reset()
+
+        days = DashboardSnapshotService.run()
+        self.stdout.write(self.style.SUCCESS(f"✅ Dashboard snapshots written for {days} days"))
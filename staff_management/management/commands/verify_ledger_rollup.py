@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from staff_management.ledger_service import LedgerService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild LedgerDailyRollup from LedgerEntry and report days that did not match'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report mismatches, do not rewrite the rollup",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = LedgerService.verify_daily_rollup(repair=not options["dry_run"])
+
+        for day, source_type, stored, expected in mismatches:
+            self.stdout.write(
+                f"{day} {source_type}: stored={stored} expected={expected}"
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("✅ Ledger rollup matches raw entries"))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.ERROR(f"❌ {len(mismatches)} mismatched rollup rows"))
+        else:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(mismatches)} mismatched rollup rows repaired"))
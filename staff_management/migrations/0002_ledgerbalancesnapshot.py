@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:52
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def seed_snapshots(apps, schema_editor):
+    """Build closing snapshots for ledger history that predates this table."""
+    LedgerEntry = apps.get_model('staff_management', 'LedgerEntry')
+    LedgerBalanceSnapshot = apps.get_model('staff_management', 'LedgerBalanceSnapshot')
+
+    daily = (
+        LedgerEntry.objects.values('source_type', 'date')
+        .annotate(total_debit=Sum('debit'), total_credit=Sum('credit'))
+        .order_by('source_type', 'date')
+    )
+
+    rows, months = [], {}
+    account, debit, credit = None, Decimal('0.00'), Decimal('0.00')
+    for row in daily.iterator():
+        if row['source_type'] != account:
+            account, debit, credit = row['source_type'], Decimal('0.00'), Decimal('0.00')
+        debit += row['total_debit'] or Decimal('0.00')
+        credit += row['total_credit'] or Decimal('0.00')
+        rows.append(LedgerBalanceSnapshot(
+            source_type=account, period='day', period_start=row['date'],
+            debit=debit, credit=credit, balance=credit - debit,
+        ))
+        months[(account, row['date'].replace(day=1))] = (debit, credit)
+
+    for (month_account, month_start), (m_debit, m_credit) in months.items():
+        rows.append(LedgerBalanceSnapshot(
+            source_type=month_account, period='month', period_start=month_start,
+            debit=m_debit, credit=m_credit, balance=m_credit - m_debit,
+        ))
+
+    LedgerBalanceSnapshot.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(max_length=100)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['source_type', 'period', 'period_start'],
+                'constraints': [models.UniqueConstraint(fields=('source_type', 'period', 'period_start'), name='uniq_ledger_snapshot_period')],
+            },
+        ),
+        migrations.RunPython(seed_snapshots, migrations.RunPython.noop),
+    ]
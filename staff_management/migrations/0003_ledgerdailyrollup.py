@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:52
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def seed_rollup(apps, schema_editor):
+    LedgerEntry = apps.get_model('staff_management', 'LedgerEntry')
+    LedgerDailyRollup = apps.get_model('staff_management', 'LedgerDailyRollup')
+
+    rows = (
+        LedgerEntry.objects.values('date', 'source_type')
+        .annotate(total_debit=Sum('debit'), total_credit=Sum('credit'), count=Count('id'))
+        .order_by()
+    )
+    LedgerDailyRollup.objects.bulk_create(
+        [
+            LedgerDailyRollup(
+                date=row['date'], source_type=row['source_type'],
+                debit=row['total_debit'], credit=row['total_credit'],
+                entry_count=row['count'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0002_ledgerbalancesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source_type', models.CharField(max_length=100)),
+                ('debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('entry_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'source_type'],
+                'indexes': [models.Index(fields=['source_type', 'date'], name='staff_manag_source__ae9154_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'source_type'), name='uniq_ledger_rollup_day')],
+            },
+        ),
+        migrations.RunPython(seed_rollup, migrations.RunPython.noop),
+    ]
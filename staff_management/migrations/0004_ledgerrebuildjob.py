@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0003_ledgerdailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerRebuildJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('chunk_size', models.PositiveIntegerField(default=1000)),
+                ('cleared', models.BooleanField(default=False)),
+                ('high_water_marks', models.JSONField(default=dict)),
+                ('source_index', models.PositiveIntegerField(default=0)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('entries_created', models.PositiveIntegerField(default=0)),
+                ('rows_per_second', models.FloatField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:00
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0004_ledgerrebuildjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerDayDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('source_debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('source_credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('source_count', models.IntegerField(default=0)),
+                ('source_hash', models.CharField(blank=True, max_length=64)),
+                ('ledger_debit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('ledger_credit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('ledger_count', models.IntegerField(default=0)),
+                ('ledger_hash', models.CharField(blank=True, max_length=64)),
+                ('is_dirty', models.BooleanField(db_index=True, default=True)),
+                ('dirtied_at', models.DateTimeField(blank=True, null=True)),
+                ('in_sync', models.BooleanField(default=False)),
+                ('mismatches', models.JSONField(blank=True, default=list)),
+                ('checked_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:03
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+EXPENSE_MODELS = {
+    'LaundryExpense': 'laundryexpense',
+    'CleaningExpense': 'cleaningexpense',
+    'MessExpense': 'messexpense',
+    'CafeteriaExpense': 'cafeteriaexpense',
+    'RentalExpense': 'rentalexpense',
+    'SalaryExpense': 'salaryexpense',
+    'MiscellaneousExpense': 'miscexpense',
+    'MaintenanceExpense': 'maintenanceexpense',
+    'CapitalExpense': 'capitalexpense',
+    'OtherExpense': 'otherexpense',
+}
+
+
+def seed_rollup(apps, schema_editor):
+    ExpenseDailyRollup = apps.get_model('staff_management', 'ExpenseDailyRollup')
+
+    rows = []
+    for model_name, category in EXPENSE_MODELS.items():
+        model = apps.get_model('staff_management', model_name)
+        totals = model.objects.values('date').annotate(total=Sum('amount'), count=Count('id')).order_by()
+        rows += [
+            ExpenseDailyRollup(date=row['date'], category=category, total=row['total'], count=row['count'])
+            for row in totals.iterator()
+        ]
+    ExpenseDailyRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0007_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'category'],
+                'indexes': [models.Index(fields=['category', 'date'], name='staff_manag_categor_e12753_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'category'), name='uniq_expense_rollup_day')],
+            },
+        ),
+        migrations.RunPython(seed_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+def seed_rooms(apps, schema_editor):
+    """Start the inventory with every room number bookings have used."""
+    Booking = apps.get_model('staff_management', 'Booking')
+    Room = apps.get_model('staff_management', 'Room')
+
+    room_numbers = {
+        room_no.strip()
+        for room_no in Booking.objects.exclude(room_no__isnull=True).values_list('room_no', flat=True).distinct()
+        if room_no.strip()
+    }
+    Room.objects.bulk_create(
+        [Room(room_no=room_no) for room_no in sorted(room_numbers)], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0008_expensedailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Room',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_no', models.CharField(max_length=50, unique=True)),
+                ('room_type', models.CharField(blank=True, max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('active_from', models.DateField(blank=True, null=True)),
+                ('active_until', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['room_no'],
+            },
+        ),
+        migrations.RunPython(seed_rooms, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['checkin_date', 'checkout_date'], name='staff_manag_checkin_0d77f1_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0009_room_inventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('closed_through', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(max_length=20)),
+                ('source', models.CharField(max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'kind', 'source'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'kind', 'source'), name='uniq_dashboard_snapshot')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('occupied', models.IntegerField(default=0)),
+                ('available', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=4, default=Decimal('0.00'), max_digits=16)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
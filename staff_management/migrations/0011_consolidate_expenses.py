@@ -0,0 +1,200 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:10
+
+from django.db import migrations, models
+from django.db.models import Case, Exists, OuterRef, Subquery, When
+
+
+# Old per-category table -> Expense.category (its ledger source_type)
+EXPENSE_MODELS = {
+    'LaundryExpense': 'laundryexpense',
+    'CleaningExpense': 'cleaningexpense',
+    'MessExpense': 'messexpense',
+    'CafeteriaExpense': 'cafeteriaexpense',
+    'RentalExpense': 'rentalexpense',
+    'SalaryExpense': 'salaryexpense',
+    'MiscellaneousExpense': 'miscexpense',
+    'MaintenanceExpense': 'maintenanceexpense',
+    'CapitalExpense': 'capitalexpense',
+    'OtherExpense': 'otherexpense',
+}
+
+CATEGORY_CHOICES = [
+    ('laundryexpense', 'Laundry'),
+    ('cleaningexpense', 'Cleaning'),
+    ('messexpense', 'Mess'),
+    ('salaryexpense', 'Salary'),
+    ('cafeteriaexpense', 'Cafeteria'),
+    ('rentalexpense', 'Rental'),
+    ('miscexpense', 'Miscellaneous'),
+    ('maintenanceexpense', 'Maintenance'),
+    ('capitalexpense', 'Capital'),
+    ('otherexpense', 'Other Expenses'),
+]
+
+BATCH_SIZE = 1000
+
+
+def copy_expenses(apps, schema_editor):
+    """
+    Copy every per-category row into Expense (file names and voucher numbers
+    as stored) and point its ledger entries at the new id.
+    """
+    Expense = apps.get_model('staff_management', 'Expense')
+    LedgerEntry = apps.get_model('staff_management', 'LedgerEntry')
+    LedgerDayDigest = apps.get_model('staff_management', 'LedgerDayDigest')
+    LedgerRebuildJob = apps.get_model('staff_management', 'LedgerRebuildJob')
+
+    for model_name, category in EXPENSE_MODELS.items():
+        model = apps.get_model('staff_management', model_name)
+        rows = []
+        for old in model.objects.order_by('id').iterator(chunk_size=BATCH_SIZE):
+            rows.append(Expense(
+                legacy_id=old.id,
+                category=category,
+                date=old.date,
+                amount=old.amount,
+                description=old.description,
+                bill_file=old.bill_file.name or None,
+                voucher_file=old.voucher_file.name or None,
+                voucher_no=old.voucher_no,
+                staff_code=getattr(old, 'staff_code', '') or '',
+            ))
+            if len(rows) >= BATCH_SIZE:
+                Expense.objects.bulk_create(rows)
+                rows = []
+        Expense.objects.bulk_create(rows)
+
+        match = Expense.objects.filter(category=category, legacy_id=OuterRef('source_id'))
+        LedgerEntry.objects.filter(source_type=category).filter(Exists(match)).update(
+            source_id=Subquery(match.values('id')[:1])
+        )
+
+    # Stored digests hash the old ids; re-check every day on the next run
+    LedgerDayDigest.objects.update(is_dirty=True)
+    # Unfinished rebuilds checkpointed old primary keys
+    LedgerRebuildJob.objects.exclude(status='completed').update(
+        status='failed', error='Expense tables were consolidated; start a new rebuild',
+    )
+
+
+def restore_expenses(apps, schema_editor):
+    """
+    Copy Expense rows back into the per-category tables (under new ids) and
+    point their ledger entries at them.
+    """
+    Expense = apps.get_model('staff_management', 'Expense')
+    LedgerEntry = apps.get_model('staff_management', 'LedgerEntry')
+    LedgerDayDigest = apps.get_model('staff_management', 'LedgerDayDigest')
+    LedgerRebuildJob = apps.get_model('staff_management', 'LedgerRebuildJob')
+
+    for model_name, category in EXPENSE_MODELS.items():
+        model = apps.get_model('staff_management', model_name)
+        has_staff_code = any(field.name == 'staff_code' for field in model._meta.fields)
+
+        new_ids = {}
+        expenses = list(Expense.objects.filter(category=category).order_by('id'))
+        for start in range(0, len(expenses), BATCH_SIZE):
+            chunk = expenses[start:start + BATCH_SIZE]
+            rows = []
+            for expense in chunk:
+                row = model(
+                    date=expense.date,
+                    amount=expense.amount,
+                    description=expense.description,
+                    bill_file=expense.bill_file.name or None,
+                    voucher_file=expense.voucher_file.name or None,
+                    voucher_no=expense.voucher_no,
+                )
+                if has_staff_code:
+                    row.staff_code = expense.staff_code
+                rows.append(row)
+            created = model.objects.bulk_create(rows)
+            new_ids.update({expense.id: row.id for expense, row in zip(chunk, created)})
+
+        # Old and new ids overlap, so entries are matched by their own pk
+        entries = list(
+            LedgerEntry.objects.filter(source_type=category, source_id__in=new_ids)
+            .values_list('id', 'source_id')
+        )
+        for start in range(0, len(entries), BATCH_SIZE):
+            chunk = entries[start:start + BATCH_SIZE]
+            LedgerEntry.objects.filter(id__in=[entry_id for entry_id, _ in chunk]).update(
+                source_id=Case(*[
+                    When(id=entry_id, then=new_ids[source_id]) for entry_id, source_id in chunk
+                ])
+            )
+
+    LedgerDayDigest.objects.update(is_dirty=True)
+    LedgerRebuildJob.objects.exclude(status='completed').update(
+        status='failed', error='Expense tables were split back per category; start a new rebuild',
+    )
+
+
+def proxy(name):
+    return migrations.CreateModel(
+        name=name,
+        fields=[],
+        options={
+            'proxy': True,
+            'indexes': [],
+            'constraints': [],
+        },
+        bases=('staff_management.expense',),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0010_dashboard_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Expense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=CATEGORY_CHOICES, max_length=30)),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('description', models.TextField(blank=True)),
+                ('bill_file', models.FileField(blank=True, null=True, upload_to='expenses/bills/')),
+                ('voucher_file', models.FileField(blank=True, null=True, upload_to='expenses/vouchers/')),
+                ('voucher_no', models.CharField(blank=True, max_length=50, null=True)),
+                ('staff_code', models.CharField(blank=True, default='', max_length=50)),
+                # Old per-table id, only while ledger entries are re-pointed
+                ('legacy_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['category', 'date'], name='staff_manag_categor_84d87e_idx'),
+                    models.Index(fields=['date', 'id'], name='staff_manag_date_9189c6_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(copy_expenses, restore_expenses, elidable=False),
+        migrations.RemoveField(
+            model_name='expense',
+            name='legacy_id',
+        ),
+        migrations.DeleteModel(name='LaundryExpense'),
+        migrations.DeleteModel(name='CleaningExpense'),
+        migrations.DeleteModel(name='MessExpense'),
+        migrations.DeleteModel(name='CafeteriaExpense'),
+        migrations.DeleteModel(name='RentalExpense'),
+        migrations.DeleteModel(name='SalaryExpense'),
+        migrations.DeleteModel(name='MiscellaneousExpense'),
+        migrations.DeleteModel(name='MaintenanceExpense'),
+        migrations.DeleteModel(name='CapitalExpense'),
+        migrations.DeleteModel(name='OtherExpense'),
+        proxy('LaundryExpense'),
+        proxy('CleaningExpense'),
+        proxy('MessExpense'),
+        proxy('CafeteriaExpense'),
+        proxy('RentalExpense'),
+        proxy('SalaryExpense'),
+        proxy('MiscellaneousExpense'),
+        proxy('MaintenanceExpense'),
+        proxy('CapitalExpense'),
+        proxy('OtherExpense'),
+    ]
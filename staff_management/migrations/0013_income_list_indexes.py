@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0012_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['booking_date', 'id'], name='staff_manag_booking_06f6c7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherincome',
+            index=models.Index(fields=['date', 'id'], name='staff_manag_date_0ec4c7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesincome',
+            index=models.Index(fields=['date', 'id'], name='staff_manag_date_48c274_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def resolve_booking_types(apps, schema_editor):
+    """
+    Point every booking at the BookingTypeMaster its text names, by id or
+    (case-insensitively) by name; values matching neither are kept in
+    booking_type_legacy. One UPDATE per distinct value.
+    """
+    Booking = apps.get_model('staff_management', 'Booking')
+    BookingTypeMaster = apps.get_model('staff_management', 'BookingTypeMaster')
+
+    ids = set(BookingTypeMaster.objects.values_list('id', flat=True))
+    by_name = {name.strip().lower(): type_id for type_id, name in BookingTypeMaster.objects.values_list('id', 'name')}
+
+    values = Booking.objects.exclude(booking_type=None).exclude(booking_type='').values_list('booking_type', flat=True).distinct()
+    for value in list(values):
+        text = value.strip()
+        if text.isdigit() and int(text) in ids:
+            type_id = int(text)
+        else:
+            type_id = by_name.get(text.lower())
+
+        rows = Booking.objects.filter(booking_type=value)
+        if type_id:
+            rows.update(booking_type_ref=type_id)
+        else:
+            rows.update(booking_type_legacy=text[:50])
+
+
+def restore_booking_types(apps, schema_editor):
+    Booking = apps.get_model('staff_management', 'Booking')
+
+    type_ids = Booking.objects.exclude(booking_type_ref=None).values_list('booking_type_ref', flat=True).distinct()
+    for type_id in list(type_ids):
+        Booking.objects.filter(booking_type_ref=type_id).update(booking_type=str(type_id))
+    Booking.objects.filter(booking_type_ref=None).exclude(booking_type_legacy='').update(
+        booking_type=models.F('booking_type_legacy')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0013_income_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='booking_type_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='staff_management.bookingtypemaster'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='booking_type_legacy',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.RunPython(resolve_booking_types, restore_booking_types),
+        migrations.RemoveField(
+            model_name='booking',
+            name='booking_type',
+        ),
+        migrations.RenameField(
+            model_name='booking',
+            old_name='booking_type_ref',
+            new_name='booking_type',
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:55
+
+import django.db.models.deletion
+from collections import Counter, defaultdict
+from django.db import migrations, models
+from django.db.models import Count
+
+
+INCOME_MODELS = ('SalesIncome', 'OtherIncome')
+
+# Name given to incomes saved with a blank category
+UNCATEGORISED = 'Uncategorised'
+
+
+def cluster_categories(apps, schema_editor):
+    """
+    Group every category text used by sales and other incomes by its
+    normalised form (case and spacing), create one IncomeCategory per group
+    named after its most used spelling, and point the incomes at it. One
+    UPDATE per distinct text.
+    """
+    IncomeCategory = apps.get_model('staff_management', 'IncomeCategory')
+
+    spellings = defaultdict(Counter)     # key -> {spelling: rows}
+    texts = defaultdict(set)             # key -> raw texts as stored
+    for model_name in INCOME_MODELS:
+        model = apps.get_model('staff_management', model_name)
+        for row in model.objects.values('category').annotate(rows=Count('id')).order_by():
+            name = ' '.join(row['category'].split()) or UNCATEGORISED
+            spellings[name.lower()][name] += row['rows']
+            texts[name.lower()].add(row['category'])
+
+    for key, counts in spellings.items():
+        # Most used spelling; ties go to the alphabetically first
+        name = min(counts, key=lambda spelling: (-counts[spelling], spelling))
+        category = IncomeCategory.objects.create(name=name, key=key)
+        for model_name in INCOME_MODELS:
+            model = apps.get_model('staff_management', model_name)
+            model.objects.filter(category__in=texts[key]).update(category_ref=category.id)
+
+
+def restore_categories(apps, schema_editor):
+    IncomeCategory = apps.get_model('staff_management', 'IncomeCategory')
+    for category_id, name in IncomeCategory.objects.values_list('id', 'name'):
+        for model_name in INCOME_MODELS:
+            model = apps.get_model('staff_management', model_name)
+            model.objects.filter(category_ref=category_id).update(category=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0014_booking_type_foreign_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncomeCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='salesincome',
+            name='category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='staff_management.incomecategory'),
+        ),
+        migrations.AddField(
+            model_name='otherincome',
+            name='category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='staff_management.incomecategory'),
+        ),
+        migrations.RunPython(cluster_categories, restore_categories),
+        migrations.RemoveField(
+            model_name='salesincome',
+            name='category',
+        ),
+        migrations.RemoveField(
+            model_name='otherincome',
+            name='category',
+        ),
+        migrations.RenameField(
+            model_name='salesincome',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.RenameField(
+            model_name='otherincome',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.AlterField(
+            model_name='salesincome',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sales_incomes', to='staff_management.incomecategory'),
+        ),
+        migrations.AlterField(
+            model_name='otherincome',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='other_incomes', to='staff_management.incomecategory'),
+        ),
+        migrations.AddIndex(
+            model_name='salesincome',
+            index=models.Index(fields=['category', 'date'], name='staff_manag_categor_5d870a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otherincome',
+            index=models.Index(fields=['category', 'date'], name='staff_manag_categor_d518b5_idx'),
+        ),
+    ]
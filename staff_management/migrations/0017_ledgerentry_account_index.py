@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0016_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['source_type', 'date', 'id'], name='staff_manag_source__6f6747_idx'),
+        ),
+    ]
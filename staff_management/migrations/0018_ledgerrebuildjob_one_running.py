@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+def fail_extra_running_jobs(apps, schema_editor):
+    """Only the newest running job can keep that status; earlier ones lost their worker."""
+    LedgerRebuildJob = apps.get_model('staff_management', 'LedgerRebuildJob')
+    running = LedgerRebuildJob.objects.filter(status='running').order_by('-id')
+    newest = running.values_list('id', flat=True).first()
+    if newest:
+        running.exclude(id=newest).update(status='failed', error='Superseded by a later rebuild')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0017_ledgerentry_account_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_extra_running_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ledgerrebuildjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('status',), name='one_running_ledger_rebuild'),
+        ),
+    ]
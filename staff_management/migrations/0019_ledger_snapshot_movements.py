@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+def _convert(apps, to_movements):
+    """
+    Rewrite every account/period series in place: cumulative closing totals
+    into per-period movements, or back.
+    """
+    LedgerBalanceSnapshot = apps.get_model('staff_management', 'LedgerBalanceSnapshot')
+    changed = []
+    series = None
+
+    for row in LedgerBalanceSnapshot.objects.order_by('source_type', 'period', 'period_start').iterator():
+        if (row.source_type, row.period) != series:
+            series = (row.source_type, row.period)
+            debit = credit = 0
+
+        if to_movements:
+            row.debit, debit = row.debit - debit, row.debit
+            row.credit, credit = row.credit - credit, row.credit
+        else:
+            debit += row.debit
+            credit += row.credit
+            row.debit, row.credit = debit, credit
+        row.balance = row.credit - row.debit
+        changed.append(row)
+
+    LedgerBalanceSnapshot.objects.bulk_update(changed, ['debit', 'credit', 'balance'], batch_size=1000)
+
+
+def to_movements(apps, schema_editor):
+    _convert(apps, True)
+
+
+def to_closing_totals(apps, schema_editor):
+    _convert(apps, False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff_management', '0018_ledgerrebuildjob_one_running'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_movements, to_closing_totals),
+    ]
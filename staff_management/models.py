@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DEFERRED, F, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Length
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from decimal import Decimal
+import uuid
 
 
 class CategoryMaster(models.Model):
@@ -80,21 +83,81 @@ class LaundryLog(models.Model):
 
         ############################## models.py #####################
 
+# ---------------------------
+#  INCOME CATEGORY MASTER
+# ---------------------------
+class IncomeCategory(models.Model):
+    """
+    Category shared by sales and other incomes. `key` is the name with case
+    and spacing normalised, so "Cafe" and "cafe " are one category.
+    """
+    name = models.CharField(max_length=200)
+    key = models.CharField(max_length=200, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(str(text).split()).lower()
+
+    @classmethod
+    def resolve(cls, text):
+        """The category for a typed name, created on first use."""
+        name = " ".join(str(text).split())
+        category, _created = cls.objects.get_or_create(key=name.lower(), defaults={"name": name})
+        return category
+
+
 # ---------------------------
 #  OTHER INCOME MODEL
 # ---------------------------
 class OtherIncome(models.Model):
     date = models.DateField()
 
-    # simple category text
-    category = models.CharField(max_length=200)
+    category = models.ForeignKey(IncomeCategory, on_delete=models.PROTECT, related_name="other_incomes")
 
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     description = models.TextField(blank=True)
 
+    # Fields whose loaded values are remembered so dashboard snapshots can
+    # tell which days an edit touched without a re-read
+    TRACKED_FIELDS = ("date", "amount")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "id"]),
+            # Income-by-category reports
+            models.Index(fields=["category", "date"]),
+        ]
+
     def __str__(self):
         return f"{self.category} - {self.amount}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        loaded = getattr(self, "_loaded_values", {})
+        for name in self.TRACKED_FIELDS:
+            if update_fields is None or name in update_fields:
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
+
 
 # ---------------------------
 #  SALES INCOME MODEL
@@ -102,14 +165,44 @@ class OtherIncome(models.Model):
 class SalesIncome(models.Model):
     date = models.DateField()
 
-    # simple category text
-    category = models.CharField(max_length=200)
+    category = models.ForeignKey(IncomeCategory, on_delete=models.PROTECT, related_name="sales_incomes")
 
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     description = models.TextField(blank=True)
 
+    # Fields whose loaded values are remembered so dashboard snapshots can
+    # tell which days an edit touched without a re-read
+    TRACKED_FIELDS = ("date", "amount")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "id"]),
+            # Income-by-category reports
+            models.Index(fields=["category", "date"]),
+        ]
+
     def __str__(self):
         return f"{self.category} - {self.amount}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        loaded = getattr(self, "_loaded_values", {})
+        for name in self.TRACKED_FIELDS:
+            if update_fields is None or name in update_fields:
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
     
 
 
@@ -169,30 +262,58 @@ class PaymentVoucher(models.Model):
 
     # For saving
     def generate_voucher_no(self):
-        prefix = self.VOUCHER_PREFIX
-        last = PaymentVoucher.objects.order_by("id").last()
-        if not last:
-            return f"{prefix}001"
-        last_number = int(last.voucher_no.replace(prefix, ""))
-        new_number = last_number + 1
-        return f"{prefix}{new_number:03d}"
+        return self.reserve_voucher_nos()[0]
+
+    # For bulk creates, which skip save()
+    @classmethod
+    def reserve_voucher_nos(cls, count=1):
+        numbers = DocumentSequence.reserve(DocumentSequence.VOUCHER, count, start=cls._last_voucher_number)
+        return [f"{cls.VOUCHER_PREFIX}{number:03d}" for number in numbers]
 
     # For frontend preview before saving
     @classmethod
     def get_next_voucher_no(cls):
-        prefix = cls.VOUCHER_PREFIX
-        last = cls.objects.order_by("id").last()
-        if not last:
-            return f"{prefix}001"
-        last_number = int(last.voucher_no.replace(prefix, ""))
-        new_number = last_number + 1
-        return f"{prefix}{new_number:03d}"
+        number = DocumentSequence.peek(DocumentSequence.VOUCHER, start=cls._last_voucher_number)
+        return f"{cls.VOUCHER_PREFIX}{number:03d}"
+
+    @classmethod
+    def _last_voucher_number(cls):
+        return DocumentSequence.last_used(cls.objects.all(), "voucher_no", cls.VOUCHER_PREFIX)
 
 
 
 ############ models #######
 
-class BaseExpense(models.Model):
+class Expense(models.Model):
+    """
+    Every expense, whatever its category. `category` is the category's ledger
+    source_type; the per-category classes below are proxies that fix it.
+    """
+    CATEGORY_LAUNDRY = "laundryexpense"
+    CATEGORY_CLEANING = "cleaningexpense"
+    CATEGORY_MESS = "messexpense"
+    CATEGORY_CAFETERIA = "cafeteriaexpense"
+    CATEGORY_RENTAL = "rentalexpense"
+    CATEGORY_SALARY = "salaryexpense"
+    CATEGORY_MISC = "miscexpense"
+    CATEGORY_MAINTENANCE = "maintenanceexpense"
+    CATEGORY_CAPITAL = "capitalexpense"
+    CATEGORY_OTHER = "otherexpense"
+
+    CATEGORY_CHOICES = (
+        (CATEGORY_LAUNDRY, "Laundry"),
+        (CATEGORY_CLEANING, "Cleaning"),
+        (CATEGORY_MESS, "Mess"),
+        (CATEGORY_SALARY, "Salary"),
+        (CATEGORY_CAFETERIA, "Cafeteria"),
+        (CATEGORY_RENTAL, "Rental"),
+        (CATEGORY_MISC, "Miscellaneous"),
+        (CATEGORY_MAINTENANCE, "Maintenance"),
+        (CATEGORY_CAPITAL, "Capital"),
+        (CATEGORY_OTHER, "Other Expenses"),
+    )
+
+    category = models.CharField(max_length=30, choices=CATEGORY_CHOICES)
     date = models.DateField()
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     description = models.TextField(blank=True)
@@ -200,50 +321,136 @@ class BaseExpense(models.Model):
     voucher_file = models.FileField(upload_to="expenses/vouchers/", blank=True, null=True)
     voucher_no = models.CharField(max_length=50, blank=True, null=True)
 
+    # Salary expenses only
+    staff_code = models.CharField(max_length=50, blank=True, default="")
+
+    # Fields whose loaded values are remembered so the expense rollup can
+    # move an edited row out of its old day/amount without a re-read
+    TRACKED_FIELDS = ("date", "amount", "category")
+
+    # Set by the per-category proxies
+    CATEGORY = None
 
     class Meta:
-        abstract = True
+        indexes = [
+            models.Index(fields=["category", "date"]),
+            models.Index(fields=["date", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.amount} - {self.date}"
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.CATEGORY:
+            self.category = self.CATEGORY
+
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        loaded = getattr(self, "_loaded_values", {})
+        for name in self.TRACKED_FIELDS:
+            if update_fields is None or name in update_fields:
+                loaded[name] = getattr(self, name)
+        self._loaded_values = loaded
+
+
+# Former abstract base of the per-category tables
+BaseExpense = Expense
+
+
+class CategoryExpenseManager(models.Manager):
+    """Restricts a per-category proxy to its own rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(category=self.model.CATEGORY)
+
 
     # ---------------------------
 #  INDIVIDUAL CATEGORY MODELS
 # ---------------------------
 
-class LaundryExpense(BaseExpense):
-    pass
+class LaundryExpense(Expense):
+    CATEGORY = Expense.CATEGORY_LAUNDRY
+    objects = CategoryExpenseManager()
+
+    class Meta:
+        proxy = True
+
+class CleaningExpense(Expense):
+    CATEGORY = Expense.CATEGORY_CLEANING
+    objects = CategoryExpenseManager()
+
+    class Meta:
+        proxy = True
 
-class CleaningExpense(BaseExpense):
-    pass
+class MessExpense(Expense):
+    CATEGORY = Expense.CATEGORY_MESS
+    objects = CategoryExpenseManager()
 
-class MessExpense(BaseExpense):
-    pass
+    class Meta:
+        proxy = True
 
-class CafeteriaExpense(BaseExpense):
-    pass
+class CafeteriaExpense(Expense):
+    CATEGORY = Expense.CATEGORY_CAFETERIA
+    objects = CategoryExpenseManager()
 
-class RentalExpense(BaseExpense):
-    pass
+    class Meta:
+        proxy = True
+
+class RentalExpense(Expense):
+    CATEGORY = Expense.CATEGORY_RENTAL
+    objects = CategoryExpenseManager()
+
+    class Meta:
+        proxy = True
 
 ############### models.py ##############
 
-class SalaryExpense(BaseExpense):
-    staff_code = models.CharField(max_length=50)
+class SalaryExpense(Expense):
+    CATEGORY = Expense.CATEGORY_SALARY
+    objects = CategoryExpenseManager()
 
+    class Meta:
+        proxy = True
 
-class MiscellaneousExpense(BaseExpense):
-    pass
 
-class MaintenanceExpense(BaseExpense):
-    pass
+class MiscellaneousExpense(Expense):
+    CATEGORY = Expense.CATEGORY_MISC
+    objects = CategoryExpenseManager()
 
-class CapitalExpense(BaseExpense):
-    pass
+    class Meta:
+        proxy = True
 
-class OtherExpense(BaseExpense):
-    pass
+class MaintenanceExpense(Expense):
+    CATEGORY = Expense.CATEGORY_MAINTENANCE
+    objects = CategoryExpenseManager()
+
+    class Meta:
+        proxy = True
+
+class CapitalExpense(Expense):
+    CATEGORY = Expense.CATEGORY_CAPITAL
+    objects = CategoryExpenseManager()
+
+    class Meta:
+        proxy = True
+
+class OtherExpense(Expense):
+    CATEGORY = Expense.CATEGORY_OTHER
+    objects = CategoryExpenseManager()
+
+    class Meta:
+        proxy = True
 
 
 
@@ -267,6 +474,28 @@ class BookingTypeMaster(models.Model):
     
 
 
+# ---------------------------
+#  ROOM INVENTORY
+# ---------------------------
+class Room(models.Model):
+    """
+    One sellable room. A room counts towards the inventory of every day from
+    active_from to active_until (both optional, inclusive) while is_active.
+    """
+    room_no = models.CharField(max_length=50, unique=True)
+    room_type = models.CharField(max_length=100, blank=True)
+    is_active = models.BooleanField(default=True)
+    active_from = models.DateField(blank=True, null=True)
+    active_until = models.DateField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["room_no"]
+
+    def __str__(self):
+        return f"{self.room_no} ({self.room_type})" if self.room_type else self.room_no
+
+
 class Booking(models.Model):
     INVOICE_PREFIX = "SHLINV"
     
@@ -283,8 +512,11 @@ class Booking(models.Model):
     room_no = models.CharField(max_length=50, blank=True, null=True)
     phone_number = models.CharField(max_length=20, blank=True, null=True)
 
-    # Stores booking type name or ID (your current setup)
-    booking_type = models.CharField(max_length=50, blank=True, null=True)
+    booking_type = models.ForeignKey(
+        BookingTypeMaster, on_delete=models.PROTECT, null=True, blank=True, related_name="bookings"
+    )
+    # Old free-text booking_type values that matched no BookingTypeMaster
+    booking_type_legacy = models.CharField(max_length=50, blank=True, default="")
 
     checkin_date = models.DateTimeField() # data type changed from DateField to DateTimeField
     checkout_date = models.DateTimeField() # data type changed from DateField to DateTimeField
@@ -303,48 +535,86 @@ class Booking(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Fields whose loaded values are remembered so saves can tell what changed
+    TRACKED_FIELDS = ("paid_amount", "booking_date", "checkin_date", "checkout_date", "booking_price")
+
+    class Meta:
+        indexes = [
+            # Stay-overlap lookups for occupancy
+            models.Index(fields=["checkin_date", "checkout_date"]),
+            # Newest-first keyset pages of the income list
+            models.Index(fields=["booking_date", "id"]),
+        ]
+
     def __str__(self):
         return f"{self.guest_name} - {self.room_no}"
 
+    @property
+    def booking_type_name(self):
+        """Booking type name, or the legacy text for rows that never resolved to one."""
+        if self.booking_type_id:
+            return self.booking_type.name
+        return self.booking_type_legacy or None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not DEFERRED
+        }
+        return instance
+
+    def has_changed(self, *fields):
+        """True for new bookings, or if any field differs from what was loaded."""
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding or loaded is None:
+            return True
+        return any(
+            name not in loaded or loaded[name] != getattr(self, name)
+            for name in fields
+        )
+
     # Auto-generate invoice number only if not already assigned
     def save(self, *args, **kwargs):
         if not self.invoice_no:
             self.invoice_no = self.generate_invoice_no()
+
+        # pending_amount is always derived, so it goes out with the same write
+        self.pending_amount = (
+            (self.booking_price or Decimal("0.00")) -
+            (self.paid_amount or Decimal("0.00"))
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            "paid_amount" in update_fields or "booking_price" in update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "pending_amount"}
+
         super().save(*args, **kwargs)
 
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
     # BACKEND GENERATOR
     def generate_invoice_no(self):
-        prefix = self.INVOICE_PREFIX
-        last = Booking.objects.order_by("id").last()
+        return self.reserve_invoice_nos()[0]
 
-        # No previous invoice — start at 001
-        if not last or not last.invoice_no:
-            return f"{prefix}001"
-
-        # Extract number from last invoice_no
-        try:
-            last_number = int(last.invoice_no.replace(prefix, ""))
-        except:
-            last_number = 0
-
-        new_number = last_number + 1
-        return f"{prefix}{new_number:03d}"
+    # For bulk creates, which skip save()
+    @classmethod
+    def reserve_invoice_nos(cls, count=1):
+        numbers = DocumentSequence.reserve(DocumentSequence.INVOICE, count, start=cls._last_invoice_number)
+        return [f"{cls.INVOICE_PREFIX}{number:03d}" for number in numbers]
 
     # FRONTEND PREVIEW (Without saving)
     @classmethod
     def get_next_invoice_no(cls):
-        prefix = cls.INVOICE_PREFIX
-        last = cls.objects.order_by("id").last()
-
-        if not last or not last.invoice_no:
-            return f"{prefix}001"
+        number = DocumentSequence.peek(DocumentSequence.INVOICE, start=cls._last_invoice_number)
+        return f"{cls.INVOICE_PREFIX}{number:03d}"
 
-        try:
-            last_number = int(last.invoice_no.replace(prefix, ""))
-        except:
-            last_number = 0
-
-        return f"{prefix}{last_number + 1:03d}"
+    @classmethod
+    def _last_invoice_number(cls):
+        return DocumentSequence.last_used(cls.objects.all(), "invoice_no", cls.INVOICE_PREFIX)
 
 #----------------------
 #  Ledger Model
@@ -353,6 +623,11 @@ class LedgerEntry(models.Model):
     """
     Unified ledger entry. Each source object (income/expense/booking) will create one
     or more LedgerEntry rows. Use source_type+source_id to find & manage entries.
+
+    On PostgreSQL the table can be range partitioned by `date` with
+    `manage_ledger_partitions --convert` (see
+    staff_management/ledger_partitions.py); the database primary key is
+    then (id, date).
     """
     date = models.DateField()
     # source_type values: 'salesincome', 'otherincome', 'booking', 'laundryexpense', ...
@@ -370,8 +645,460 @@ class LedgerEntry(models.Model):
         indexes = [
             models.Index(fields=["date"]),
             models.Index(fields=["source_type", "source_id"]),
+            # Account ledger pages: WHERE source_type = ... ORDER BY date, id
+            models.Index(fields=["source_type", "date", "id"]),
         ]
         ordering = ["date", "id"]
 
     def __str__(self):
-        return f"{self.date} | {self.source_type}:{self.source_id} | D:{self.debit} C:{self.credit}"
\ No newline at end of file
+        return f"{self.date} | {self.source_type}:{self.source_id} | D:{self.debit} C:{self.credit}"
+
+#----------------------
+#  Ledger Balance Snapshot
+#----------------------
+class LedgerBalanceSnapshot(models.Model):
+    """
+    Movement of one ledger account (LedgerEntry.source_type) over a day or a
+    month: debit/credit are the period's totals and balance = credit - debit.
+    A posting only touches the two periods it falls in; the opening balance
+    of a date is the sum of the months before it and the days of its month
+    (LedgerService.opening_balance), so a date-ranged ledger never replays
+    the account from its first row.
+    """
+    PERIOD_DAY = "day"
+    PERIOD_MONTH = "month"
+    PERIOD_CHOICES = (
+        (PERIOD_DAY, "Day"),
+        (PERIOD_MONTH, "Month"),
+    )
+
+    source_type = models.CharField(max_length=100)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    # First day of the period (the day itself, or the 1st of the month)
+    period_start = models.DateField()
+
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_type", "period", "period_start"],
+                name="uniq_ledger_snapshot_period",
+            ),
+        ]
+        ordering = ["source_type", "period", "period_start"]
+
+    def __str__(self):
+        return f"{self.source_type} | {self.period} {self.period_start} | B:{self.balance}"
+
+
+#----------------------
+#  Ledger Daily Rollup
+#----------------------
+class LedgerDailyRollup(models.Model):
+    """
+    Summed ledger movement per (date, source_type), kept current alongside
+    LedgerEntry writes. Period summaries read this instead of grouping the
+    raw ledger by expressions over `date`.
+    """
+    date = models.DateField()
+    source_type = models.CharField(max_length=100)
+
+    debit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    entry_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "source_type"], name="uniq_ledger_rollup_day"),
+        ]
+        indexes = [
+            models.Index(fields=["source_type", "date"]),
+        ]
+        ordering = ["date", "source_type"]
+
+    def __str__(self):
+        return f"{self.date} | {self.source_type} | D:{self.debit} C:{self.credit}"
+
+
+#----------------------
+#  Ledger Rebuild Job
+#----------------------
+class LedgerRebuildJob(models.Model):
+    """
+    Progress checkpoint for a full ledger rebuild. The rebuild commits one chunk
+    of source rows at a time together with this row, so an interrupted run can
+    resume from (source_index, last_pk).
+
+    At most one job is running at a time (enforced by the database). Every
+    checkpoint touches updated_at; a running job that has not checkpointed
+    for STALE_AFTER is taken to have lost its worker and is failed, so it
+    can be resumed.
+    """
+    STALE_AFTER = timedelta(minutes=30)
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    chunk_size = models.PositiveIntegerField(default=1000)
+
+    # Existing ledger rows have been cleared for this run
+    cleared = models.BooleanField(default=False)
+    # Highest pk per source_type when the run started; later rows post themselves
+    high_water_marks = models.JSONField(default=dict)
+
+    source_index = models.PositiveIntegerField(default=0)
+    last_pk = models.BigIntegerField(default=0)
+
+    processed = models.PositiveIntegerField(default=0)
+    entries_created = models.PositiveIntegerField(default=0)
+    rows_per_second = models.FloatField(default=0)
+
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["status"],
+                condition=Q(status="running"),
+                name="one_running_ledger_rebuild",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Ledger rebuild #{self.id} ({self.status})"
+
+
+#----------------------
+#  Ledger Day Digest
+#----------------------
+class LedgerDayDigest(models.Model):
+    """
+    Reconciliation state of one day: totals and a content hash of what the
+    source tables say should be posted, and of what LedgerEntry holds.
+    Ledger postings mark the days they touch dirty so the nightly check only
+    re-hashes those.
+    """
+    date = models.DateField(unique=True)
+
+    source_debit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    source_credit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    source_count = models.IntegerField(default=0)
+    source_hash = models.CharField(max_length=64, blank=True)
+
+    ledger_debit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    ledger_credit = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    ledger_count = models.IntegerField(default=0)
+    ledger_hash = models.CharField(max_length=64, blank=True)
+
+    is_dirty = models.BooleanField(default=True, db_index=True)
+    dirtied_at = models.DateTimeField(blank=True, null=True)
+    in_sync = models.BooleanField(default=False)
+    # [{"source_type", "source_id", "expected": [debit, credit], "posted": [debit, credit]}]
+    mismatches = models.JSONField(default=list, blank=True)
+
+    checked_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        state = "dirty" if self.is_dirty else ("ok" if self.in_sync else "drift")
+        return f"{self.date} | {state}"
+
+
+#----------------------
+#  Data Version
+#----------------------
+class DataVersion(models.Model):
+    """
+    Monotonic change counter per data domain ("booking", "income",
+    "expense", "room", "voucher", "booking_type", "category"). Bumped in the same
+    transaction as every write to the domain, so a cache key or ETag that
+    embeds the version can never outlive the data.
+    """
+    DOMAIN_BOOKING = "booking"
+    DOMAIN_INCOME = "income"
+    DOMAIN_EXPENSE = "expense"
+    DOMAIN_ROOM = "room"
+    DOMAIN_VOUCHER = "voucher"
+    DOMAIN_BOOKING_TYPE = "booking_type"
+    DOMAIN_CATEGORY = "category"
+
+    domain = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.domain} v{self.version}"
+
+    @classmethod
+    def bump(cls, *domains):
+        now = timezone.now()
+        for domain in domains:
+            if not cls.objects.filter(domain=domain).update(version=F("version") + 1, updated_at=now):
+                obj, created = cls.objects.get_or_create(domain=domain, defaults={"version": 1})
+                if not created:
+                    cls.objects.filter(domain=domain).update(version=F("version") + 1, updated_at=now)
+
+    @classmethod
+    def current(cls, *domains):
+        """{domain: version}; domains never written to are 0."""
+        versions = dict(cls.objects.filter(domain__in=domains).values_list("domain", "version"))
+        return {domain: versions.get(domain, 0) for domain in domains}
+
+
+#----------------------
+#  Document Sequence
+#----------------------
+class DocumentSequence(models.Model):
+    """
+    Last number handed out per document series (invoices, vouchers, staff
+    ids). Numbers are taken with a single UPDATE of the series row, whose
+    row lock serialises concurrent writers until their transaction ends, so
+    two saves can never get the same number. The reservation only rolls back
+    with an outer transaction: called in autocommit it commits at once, and
+    a save that then fails leaves a gap in the series.
+
+    A series that has no row yet starts after the highest number already
+    stored on its documents (`start`), so existing data needs no migration.
+    """
+    INVOICE = "invoice"
+    VOUCHER = "voucher"
+    STAFF = "staff"
+
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.last_value}"
+
+    @classmethod
+    def reserve(cls, name, count=1, start=None):
+        """Allocate `count` consecutive numbers of a series and return them as a range."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        now = timezone.now()
+        with transaction.atomic():
+            if not cls.objects.filter(name=name).update(last_value=F("last_value") + count, updated_at=now):
+                cls.objects.get_or_create(name=name, defaults={"last_value": start() if start else 0})
+                cls.objects.filter(name=name).update(last_value=F("last_value") + count, updated_at=now)
+            last = cls.objects.filter(name=name).values_list("last_value", flat=True).get()
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def peek(cls, name, start=None):
+        """The number the next reserve() would return, without taking it."""
+        last = cls.objects.filter(name=name).values_list("last_value", flat=True).first()
+        if last is None:
+            last = start() if start else 0
+        return last + 1
+
+    @staticmethod
+    def last_used(queryset, field, prefix):
+        """Highest number in `field` values of the form <prefix><digits>; one query, used to seed a series."""
+        last = (
+            queryset.filter(**{f"{field}__regex": rf"^{prefix}[0-9]+$"})
+            .annotate(number_length=Length(field))
+            .order_by("-number_length", f"-{field}")
+            .values_list(field, flat=True)
+            .first()
+        )
+        return int(last[len(prefix):]) if last else 0
+
+
+#----------------------
+#  Expense Daily Rollup
+#----------------------
+class ExpenseDailyRollup(models.Model):
+    """
+    Summed expenses per (date, category), where category is the expense
+    table's ledger source_type ("laundryexpense", "messexpense", ...).
+    Kept current by the expense model signals in the same transaction as the
+    expense write; `rebuild_expense_rollup` recomputes it from the raw tables.
+    """
+    date = models.DateField()
+    category = models.CharField(max_length=50)
+
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "category"], name="uniq_expense_rollup_day"),
+        ]
+        indexes = [
+            models.Index(fields=["category", "date"]),
+        ]
+        ordering = ["date", "category"]
+
+    def __str__(self):
+        return f"{self.date} | {self.category} | {self.total} ({self.count})"
+
+
+#----------------------
+#  Dashboard Snapshots
+#----------------------
+class SnapshotWatermark(models.Model):
+    """
+    Last day whose dashboard snapshots are complete. Snapshot rows after it
+    are stale and ignored; writes dated on or before it move it back, and the
+    nightly snapshot job moves it forward again. Null means nothing is
+    snapshotted.
+
+    LEDGER_ARCHIVE is the last day whose ledger entries were moved out of the
+    live table (see LedgerPartitionManager.archive_before).
+    """
+    DASHBOARD = "dashboard"
+    LEDGER_ARCHIVE = "ledger_archive"
+
+    name = models.CharField(max_length=50, unique=True)
+    closed_through = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} closed through {self.closed_through}"
+
+    @classmethod
+    def closed_through_expression(cls, name=DASHBOARD):
+        """
+        closed_through as a SQL expression, date.min when nothing is
+        snapshotted, so snapshot/live filters stay in the caller's query.
+        """
+        return Coalesce(
+            Subquery(cls.objects.filter(name=name).values("closed_through")[:1]),
+            Value(date.min),
+            output_field=models.DateField(),
+        )
+
+    @classmethod
+    def reopen(cls, day, name=DASHBOARD):
+        """
+        Mark snapshots from `day` on stale; day=None marks all of them stale.
+
+        The watermark row is locked first: a snapshot run holds that lock
+        until it commits, so a write it did not see waits here and then
+        moves back the watermark the run advanced, rather than comparing
+        against the old one and leaving its day stale for good.
+        """
+        rows = cls.objects.filter(name=name)
+        with transaction.atomic():
+            closed_through = rows.select_for_update().values_list("closed_through", flat=True).first()
+            if closed_through is None:
+                return
+            if day is None:
+                rows.update(closed_through=None)
+            elif closed_through >= day:
+                rows.update(closed_through=day - timedelta(days=1))
+
+
+class DashboardSnapshot(models.Model):
+    """
+    One closed day's dashboard totals per (kind, source), in the shape
+    ReportService groups them: bookings ("booking"), incomes ("salesincome",
+    "otherincome") and expense categories ("messexpense", ...).
+    """
+    date = models.DateField()
+    kind = models.CharField(max_length=20)
+    source = models.CharField(max_length=50)
+
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "kind", "source"], name="uniq_dashboard_snapshot"),
+        ]
+        ordering = ["date", "kind", "source"]
+
+    def __str__(self):
+        return f"{self.date} | {self.kind}.{self.source} | {self.total} ({self.count})"
+
+
+class OccupancySnapshot(models.Model):
+    """Occupied and available room-nights and room revenue of one closed day."""
+    date = models.DateField(unique=True)
+    occupied = models.IntegerField(default=0)
+    available = models.IntegerField(default=0)
+    # Booking prices spread per night, kept unrounded enough to sum back exactly
+    revenue = models.DecimalField(max_digits=16, decimal_places=4, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date} | {self.occupied}/{self.available}"
+
+
+#----------------------
+#  Chunked Uploads
+#----------------------
+class StoredBlob(models.Model):
+    """
+    One stored file per distinct content, named by its SHA-256; every
+    expense attaching the same bill points at the same blob. Blobs no upload
+    or expense refers to are removed by ChunkedUploadService.purge_unreferenced.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to="blobs/")
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256} ({self.size} bytes)"
+
+
+class FileUpload(models.Model):
+    """
+    A resumable upload. Chunks are appended to a part file in order until
+    `received` reaches `size`; completing it hashes the file into a
+    StoredBlob, reusing the blob when that content is already stored.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_COMPLETE = "complete"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_COMPLETE, "Complete"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # Optional, sent by the client at start and checked on completion
+    expected_sha256 = models.CharField(max_length=64, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    blob = models.ForeignKey(StoredBlob, on_delete=models.PROTECT, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}, {self.status})"
@@ -0,0 +1,158 @@
+# staff_management/occupancy_service.py
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from staff_management.models import Booking, Room, OccupancySnapshot, SnapshotWatermark
+from staff_management.report_service import period_start, GRANULARITY_DAY
+
+ZERO = Decimal("0.00")
+
+
+def local_date(value):
+    """Local calendar date of a stored check-in/check-out datetime."""
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def _ratio(numerator, denominator, scale=1):
+    if not denominator:
+        return None
+    return (Decimal(numerator) * scale / Decimal(denominator)).quantize(Decimal("0.01"))
+
+
+class OccupancyService:
+    """
+    Room-night occupancy from booking stays and the room inventory.
+
+    A booking occupies one room for every night from its local check-in date
+    up to (not including) its local check-out date, at least one night, and
+    its booking_price is spread evenly over those nights. Stays and inventory
+    changes become +/- events that are swept once in date order, so a range
+    costs two queries however long it is. Days up to the snapshot watermark
+    come from OccupancySnapshot, and only stays after it are read.
+    """
+
+    @staticmethod
+    def _booking_events(start_date, end_date):
+        tz = timezone.get_current_timezone()
+        range_start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+        range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+
+        stays = Booking.objects.filter(
+            checkin_date__lt=range_end, checkout_date__gt=range_start
+        ).values_list("checkin_date", "checkout_date", "booking_price")
+
+        events = []
+        for checkin, checkout, price in stays.iterator():
+            first = local_date(checkin)
+            last = max(local_date(checkout), first + timedelta(days=1))
+            rate = (price or ZERO) / (last - first).days
+            events.append((first, 1, rate))
+            events.append((last, -1, -rate))
+        return events
+
+    @staticmethod
+    def _room_events():
+        rooms = Room.objects.filter(is_active=True).values_list("active_from", "active_until")
+        events = []
+        for active_from, active_until in rooms:
+            events.append((active_from or date.min, 1))
+            if active_until:
+                events.append((active_until + timedelta(days=1), -1))
+        return events
+
+    @staticmethod
+    def _snapshots(start_date, end_date):
+        """{date: (occupied, available, revenue)} of snapshotted days in range."""
+        rows = OccupancySnapshot.objects.filter(
+            date__range=(start_date, end_date),
+            date__lte=SnapshotWatermark.closed_through_expression(),
+        ).values_list("date", "occupied", "available", "revenue")
+        return {day: (occupied, available, revenue) for day, occupied, available, revenue in rows}
+
+    @staticmethod
+    def daily(start_date, end_date, snapshots=True):
+        """
+        [{"date", "occupied", "available", "revenue"}] for every night in
+        [start_date, end_date]. With snapshots=False every night is swept
+        from the bookings.
+        """
+        closed = OccupancyService._snapshots(start_date, end_date) if snapshots else {}
+
+        # Snapshots run contiguously from the first day with any data, so
+        # unsnapshotted days before the last snapshot have no stays
+        live_from = max(closed) + timedelta(days=1) if closed else start_date
+        stay_events = []
+        if live_from <= end_date:
+            stay_events = sorted(OccupancyService._booking_events(live_from, end_date), key=lambda e: e[0])
+        room_events = sorted(OccupancyService._room_events(), key=lambda e: e[0])
+
+        rows = []
+        occupied, revenue, available = 0, ZERO, 0
+        s = r = 0
+        day = start_date
+        while day <= end_date:
+            while r < len(room_events) and room_events[r][0] <= day:
+                available += room_events[r][1]
+                r += 1
+
+            if day in closed:
+                rows.append(dict(zip(("date", "occupied", "available", "revenue"), (day, *closed[day]))))
+            elif day < live_from:
+                rows.append({"date": day, "occupied": 0, "available": available, "revenue": ZERO})
+            else:
+                while s < len(stay_events) and stay_events[s][0] <= day:
+                    occupied += stay_events[s][1]
+                    revenue += stay_events[s][2]
+                    s += 1
+                rows.append({
+                    "date": day,
+                    "occupied": occupied,
+                    "available": available,
+                    "revenue": revenue if occupied else ZERO,
+                })
+            day += timedelta(days=1)
+        return rows
+
+    @staticmethod
+    def series(start_date, end_date, granularity=GRANULARITY_DAY):
+        """
+        Columnar occupancy metrics per period:
+        {"periods", "occupied", "available", "revenue", "occupancy_pct", "adr", "revpar"}.
+        Percentages and rates are None for periods without inventory/sales.
+        """
+        totals = {}
+        for row in OccupancyService.daily(start_date, end_date):
+            bucket = totals.setdefault(period_start(row["date"], granularity), [0, 0, ZERO])
+            bucket[0] += row["occupied"]
+            bucket[1] += row["available"]
+            bucket[2] += row["revenue"]
+
+        periods = sorted(totals)
+        result = {
+            "periods": periods,
+            "occupied": [],
+            "available": [],
+            "revenue": [],
+            "occupancy_pct": [],
+            "adr": [],
+            "revpar": [],
+        }
+        for period in periods:
+            occupied, available, revenue = totals[period]
+            result["occupied"].append(occupied)
+            result["available"].append(available)
+            result["revenue"].append(revenue.quantize(Decimal("0.01")))
+            result["occupancy_pct"].append(_ratio(occupied, available, 100))
+            result["adr"].append(_ratio(revenue, occupied))
+            result["revpar"].append(_ratio(revenue, available))
+        return result
+
+    @staticmethod
+    def tonight():
+        """(occupied rooms, available rooms) for the current local date."""
+        today = timezone.localdate()
+        row = OccupancyService.daily(today, today, snapshots=False)[0]
+        return row["occupied"], row["available"]
@@ -0,0 +1,34 @@
+# staff_management/pagination.py
+
+from django.core import signing
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read ?page_size= from the request, clamped to 1..maximum."""
+    try:
+        size = int(request.query_params.get("page_size", default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(data, salt):
+    """
+    Opaque, signed cursor for keyset pagination.
+    `data` must be JSON serializable (dates as ISO strings, decimals as str).
+    """
+    return signing.dumps(data, salt=salt, compress=True)
+
+
+def decode_cursor(cursor, salt):
+    try:
+        return signing.loads(cursor, salt=salt)
+    except signing.BadSignature:
+        raise InvalidCursor("Invalid cursor")
@@ -0,0 +1,324 @@
+# staff_management/report_service.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import CharField, Count, DateField, DecimalField, F, Sum, Value
+from django.db.models.functions import (
+    Coalesce, TruncDay, TruncWeek, TruncMonth, TruncQuarter,
+)
+
+from staff_management.models import (
+    Booking, SalesIncome, OtherIncome, ExpenseDailyRollup, DashboardSnapshot, SnapshotWatermark,
+)
+
+ZERO = Decimal("0.00")
+
+KIND_BOOKING = "booking"
+KIND_INCOME = "income"
+KIND_EXPENSE = "expense"
+
+# (model, kind, source, date field, amount expression, count expression) for
+# every table the dashboard sums. Booking revenue is counted at booking_price
+# on booking_date; expenses come pre-summed per day and category from
+# ExpenseDailyRollup.
+REPORT_SOURCES = [
+    (Booking, KIND_BOOKING, Value("booking", output_field=CharField()),
+     "booking_date", Sum("booking_price"), Count("id")),
+    (SalesIncome, KIND_INCOME, Value("salesincome", output_field=CharField()),
+     "date", Sum("amount"), Count("id")),
+    (OtherIncome, KIND_INCOME, Value("otherincome", output_field=CharField()),
+     "date", Sum("amount"), Count("id")),
+    (ExpenseDailyRollup, KIND_EXPENSE, F("category"), "date", Sum("total"), Sum("count")),
+]
+
+GRANULARITY_DAY = "day"
+GRANULARITY_WEEK = "week"
+GRANULARITY_MONTH = "month"
+GRANULARITY_QUARTER = "quarter"
+GRANULARITY_FY = "fy"
+GRANULARITIES = (
+    GRANULARITY_DAY, GRANULARITY_WEEK, GRANULARITY_MONTH, GRANULARITY_QUARTER, GRANULARITY_FY,
+)
+
+# Financial years are assembled from months, so any start month works
+TRUNC_BY_GRANULARITY = {
+    GRANULARITY_DAY: TruncDay,
+    GRANULARITY_WEEK: TruncWeek,
+    GRANULARITY_MONTH: TruncMonth,
+    GRANULARITY_QUARTER: TruncQuarter,
+    GRANULARITY_FY: TruncMonth,
+}
+
+METRIC_INCOME = "income"
+METRIC_INCOME_BY_SOURCE = "income_by_source"
+METRIC_EXPENSES = "expenses"
+METRIC_EXPENSE_BY_CATEGORY = "expense_by_category"
+METRIC_PROFIT = "profit"
+METRIC_BOOKINGS = "bookings"
+METRICS = (
+    METRIC_INCOME, METRIC_INCOME_BY_SOURCE, METRIC_EXPENSES,
+    METRIC_EXPENSE_BY_CATEGORY, METRIC_PROFIT, METRIC_BOOKINGS,
+)
+
+
+def add_months(day, months):
+    """First day of the month `months` away from `day`'s month."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_starts(first, last):
+    """Every month start from `first`'s month to `last`'s month, inclusive."""
+    month = first.replace(day=1)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def period_start(day, granularity):
+    """Start of the period (of the given granularity) that contains `day`."""
+    if granularity == GRANULARITY_DAY:
+        return day
+    if granularity == GRANULARITY_WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == GRANULARITY_MONTH:
+        return day.replace(day=1)
+    if granularity == GRANULARITY_QUARTER:
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+
+    start_month = settings.FINANCIAL_YEAR_START_MONTH
+    year = day.year if day.month >= start_month else day.year - 1
+    return date(year, start_month, 1)
+
+
+def next_period(start, granularity):
+    if granularity == GRANULARITY_DAY:
+        return start + timedelta(days=1)
+    if granularity == GRANULARITY_WEEK:
+        return start + timedelta(days=7)
+    if granularity == GRANULARITY_MONTH:
+        return add_months(start, 1)
+    if granularity == GRANULARITY_QUARTER:
+        return add_months(start, 3)
+    return add_months(start, 12)
+
+
+def period_starts(start_date, end_date, granularity):
+    """Every period start overlapping [start_date, end_date], in order."""
+    periods = []
+    current = period_start(start_date, granularity)
+    while current <= end_date:
+        periods.append(current)
+        current = next_period(current, granularity)
+    return periods
+
+
+class ReportService:
+    """
+    Dashboard aggregates over bookings, incomes and expenses.
+
+    Every source table contributes one grouped SELECT and the branches are
+    combined with UNION ALL, so a report costs a single round trip. The ten
+    expense tables are read through their daily rollup. Days up to the
+    snapshot watermark are read from DashboardSnapshot instead, so the source
+    branches only scan the days since the last nightly snapshot.
+    """
+
+    @staticmethod
+    def _union(start_date, end_date, trunc=None, snapshots=True):
+        """
+        UNION ALL of (kind, source, period, total, count) rows, one group per
+        source and period. `trunc` is a Trunc* class bucketing the date into
+        periods; without it each source yields one row for the whole range.
+        With snapshots=False every day is read from the source tables.
+        """
+        closed_through = SnapshotWatermark.closed_through_expression() if snapshots else None
+
+        branches = []
+        for model, kind, source, date_field, amount, count in REPORT_SOURCES:
+            period = trunc(date_field) if trunc else Value(None, output_field=DateField())
+            rows = model.objects.filter(**{f"{date_field}__range": (start_date, end_date)})
+            if closed_through is not None:
+                rows = rows.filter(**{f"{date_field}__gt": closed_through})
+            branches.append(
+                rows
+                .annotate(kind=Value(kind), origin=source, period=period)
+                .values_list("kind", "origin", "period")
+                .annotate(
+                    total=Coalesce(
+                        amount, Value(ZERO),
+                        output_field=DecimalField(max_digits=14, decimal_places=2),
+                    ),
+                    count=Coalesce(count, Value(0)),
+                )
+                .order_by()
+            )
+
+        if closed_through is not None:
+            period = trunc("date") if trunc else Value(None, output_field=DateField())
+            branches.append(
+                DashboardSnapshot.objects.filter(
+                    date__range=(start_date, end_date), date__lte=closed_through,
+                )
+                .annotate(origin=F("source"), period=period)
+                .values_list("kind", "origin", "period")
+                .annotate(
+                    total=Coalesce(
+                        Sum("total"), Value(ZERO),
+                        output_field=DecimalField(max_digits=14, decimal_places=2),
+                    ),
+                    count=Coalesce(Sum("count"), Value(0)),
+                )
+                .order_by()
+            )
+        first, *rest = branches
+        return first.union(*rest, all=True)
+
+    @staticmethod
+    def _grouped(start_date, end_date, granularity):
+        """
+        {period_start: {(kind, source): [total, count]}} for every period of
+        the range, zero periods included as empty dicts.
+        """
+        buckets = {period: {} for period in period_starts(start_date, end_date, granularity)}
+        rows = ReportService._union(start_date, end_date, trunc=TRUNC_BY_GRANULARITY[granularity])
+        for kind, source, period, total, count in rows:
+            bucket = buckets[period_start(period, granularity)]
+            cell = bucket.setdefault((kind, source), [ZERO, 0])
+            cell[0] += total or ZERO
+            cell[1] += count or 0
+        return buckets
+
+    @staticmethod
+    def _summarise(cells):
+        """Income/expense/profit/bookings from {(kind, source): [total, count]}."""
+        sums = {KIND_BOOKING: ZERO, KIND_INCOME: ZERO, KIND_EXPENSE: ZERO}
+        bookings = 0
+        for (kind, _source), (total, count) in cells.items():
+            sums[kind] += total
+            if kind == KIND_BOOKING:
+                bookings += count
+
+        income = sums[KIND_INCOME] + sums[KIND_BOOKING]
+        return {
+            "bookings": bookings,
+            "booking_income": sums[KIND_BOOKING],
+            "income": income,
+            "expenses": sums[KIND_EXPENSE],
+            "profit": income - sums[KIND_EXPENSE],
+        }
+
+    @staticmethod
+    def totals(start_date, end_date):
+        """
+        {"bookings", "booking_income", "income", "expenses", "profit"} for the
+        inclusive date range. `income` includes booking revenue.
+        """
+        cells = {}
+        for kind, source, _period, total, count in ReportService._union(start_date, end_date):
+            cell = cells.setdefault((kind, source), [ZERO, 0])
+            cell[0] += total or ZERO
+            cell[1] += count or 0
+        return ReportService._summarise(cells)
+
+    @staticmethod
+    def monthly_series(first_month, last_month):
+        """
+        One row per calendar month from `first_month` to `last_month`
+        (inclusive, any day within the month), zero-filled:
+        [{"month_start", "bookings", "income", "expenses", "profit"}].
+        """
+        months = month_starts(first_month, last_month)
+        if not months:
+            return []
+
+        end_date = add_months(months[-1], 1) - timedelta(days=1)
+        buckets = ReportService._grouped(months[0], end_date, GRANULARITY_MONTH)
+
+        series = []
+        for month in months:
+            summary = ReportService._summarise(buckets[month])
+            series.append({
+                "month_start": month,
+                "bookings": summary["bookings"],
+                "income": summary["income"],
+                "expenses": summary["expenses"],
+                "profit": summary["profit"],
+            })
+        return series
+
+    @staticmethod
+    def time_series(start_date, end_date, granularity, metrics):
+        """
+        Columnar, gap-filled series for the requested metrics:
+        {"periods": [...], "series": {name: [value per period]}}.
+
+        income_by_source and expense_by_category expand to one series per
+        source ("income.salesincome", "expense.messexpense", ...); only
+        sources with data in the range appear.
+        """
+        buckets = ReportService._grouped(start_date, end_date, granularity)
+        periods = sorted(buckets)
+        summaries = [ReportService._summarise(buckets[period]) for period in periods]
+
+        series = {}
+        for metric in (METRIC_INCOME, METRIC_EXPENSES, METRIC_PROFIT, METRIC_BOOKINGS):
+            if metric in metrics:
+                series[metric] = [summary[metric] for summary in summaries]
+
+        for metric, kinds, prefix in (
+            (METRIC_INCOME_BY_SOURCE, (KIND_BOOKING, KIND_INCOME), "income"),
+            (METRIC_EXPENSE_BY_CATEGORY, (KIND_EXPENSE,), "expense"),
+        ):
+            if metric not in metrics:
+                continue
+            sources = sorted({
+                source for cells in buckets.values() for kind, source in cells if kind in kinds
+            })
+            for source in sources:
+                series[f"{prefix}.{source}"] = [
+                    sum(
+                        (buckets[period][(kind, source)][0]
+                         for kind in kinds if (kind, source) in buckets[period]),
+                        ZERO,
+                    )
+                    for period in periods
+                ]
+
+        return {"periods": periods, "series": series}
+
+    @staticmethod
+    def income_breakdown(start_date, end_date):
+        """
+        {category name: {"total", "count"}} of sales and other incomes in the
+        date range, as one query: a UNION ALL of per-table groups over their
+        (category, date) indexes.
+        """
+        branches = [
+            model.objects.filter(date__range=(start_date, end_date))
+            .values_list("category_id", "category__name")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by()
+            for model in (SalesIncome, OtherIncome)
+        ]
+        totals = {}
+        for _category_id, name, total, count in branches[0].union(branches[1], all=True):
+            cell = totals.setdefault(name, {"total": ZERO, "count": 0})
+            cell["total"] += total or ZERO
+            cell["count"] += count
+        return dict(sorted(totals.items()))
+
+    @staticmethod
+    def expense_breakdown(start_date, end_date):
+        """{category: {"total", "count"}} of expenses in the date range."""
+        rows = (
+            ExpenseDailyRollup.objects.filter(date__range=(start_date, end_date))
+            .values("category")
+            .annotate(total=Sum("total"), count=Sum("count"))
+            .order_by("category")
+        )
+        return {row["category"]: {"total": row["total"], "count": row["count"]} for row in rows}
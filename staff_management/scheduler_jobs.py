@@ -12,3 +12,44 @@ def fetch_website_bookings_job():
         logger.info(message)
     else:
         logger.error(message)
+
+
+def ensure_ledger_partitions_job():
+    from staff_management.ledger_partitions import LedgerPartitionManager
+
+    try:
+        created = LedgerPartitionManager.ensure_partitions()
+        if created:
+            logger.info(f"Created ledger partitions: {', '.join(created)}")
+    except Exception as e:
+        logger.error(f"Ledger partition maintenance failed: {str(e)}")
+
+
+def reconcile_ledger_job():
+    from staff_management.ledger_reconciliation import LedgerReconciliation
+
+    try:
+        drift = LedgerReconciliation.run()
+        if drift:
+            logger.warning(f"Ledger drift on {len(drift)} days: {', '.join(str(day) for day in sorted(drift))}")
+    except Exception as e:
+        logger.error(f"Ledger reconciliation failed: {str(e)}")
+
+
+def snapshot_dashboard_job():
+    from staff_management.dashboard_snapshots import DashboardSnapshotService
+
+    try:
+        DashboardSnapshotService.run()
+    except Exception as e:
+        logger.error(f"Dashboard snapshot failed: {str(e)}")
+
+
+def purge_stale_uploads_job():
+    from staff_management.chunked_upload import ChunkedUploadService
+
+    try:
+        ChunkedUploadService.purge_stale()
+        ChunkedUploadService.purge_unreferenced()
+    except Exception as e:
+        logger.error(f"Upload cleanup failed: {str(e)}")
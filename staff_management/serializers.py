@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import *
+from .chunked_upload import ChunkedUploadService
 
 
 class CategoryMasterSerializer(serializers.ModelSerializer):
@@ -48,13 +50,65 @@ class LaundryLogSerializer(serializers.ModelSerializer):
 
         
 ######################## serializers.py #############################
-class OtherIncomeSerializer(serializers.ModelSerializer):
+class IncomeCategoryField(serializers.RelatedField):
+    """
+    Income category by name, as typed. Validation only looks the name up; a
+    new name comes back unsaved and is created when the income is saved
+    (IncomeCategorySaveMixin), so a rejected payload leaves no category behind.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", IncomeCategory.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data.strip():
+            raise serializers.ValidationError("Enter a category name.")
+        if len(data.strip()) > 200:
+            raise serializers.ValidationError("Ensure this field has no more than 200 characters.")
+        name = " ".join(data.split())
+        category = self.get_queryset().filter(key=IncomeCategory.normalize(name)).first()
+        return category or IncomeCategory(name=name)
+
+    def to_representation(self, value):
+        return value.name
+
+
+class IncomeCategorySaveMixin:
+    """Creates a new category named in the payload in the income's own transaction."""
+
+    def _with_category(self, validated_data):
+        category = validated_data.get("category")
+        if category is not None and category.pk is None:
+            validated_data["category"] = IncomeCategory.resolve(category.name)
+        return validated_data
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(self._with_category(validated_data))
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return super().update(instance, self._with_category(validated_data))
+
+
+class IncomeCategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IncomeCategory
+        fields = ["id", "name"]
+
+
+class OtherIncomeSerializer(IncomeCategorySaveMixin, serializers.ModelSerializer):
+    category = IncomeCategoryField()
+
     class Meta:
         model = OtherIncome
         fields = "__all__"
         
         
-class SalesIncomeSerializer(serializers.ModelSerializer):
+class SalesIncomeSerializer(IncomeCategorySaveMixin, serializers.ModelSerializer):
+    category = IncomeCategoryField()
+
     class Meta:
         model = SalesIncome
         fields = "__all__"
@@ -100,17 +154,30 @@ class PaymentVoucherSerializer(serializers.ModelSerializer):
     ############ serializers.py ############
 class BaseExpenseSerializer(serializers.ModelSerializer):
     class Meta:
-        model = BaseExpense
-        fields = "__all__"
+        model = Expense
+        # category is fixed by the per-category model, staff_code is salary-only
+        exclude = ("category", "staff_code")
+
+    # A completed chunked upload can stand in for the file itself
+    bill_upload_id = serializers.UUIDField(write_only=True, required=False)
+    voucher_upload_id = serializers.UUIDField(write_only=True, required=False)
 
     def validate(self, data):
+        for field in ("bill_file", "voucher_file"):
+            upload_id = data.pop(field.replace("_file", "_upload_id"), None)
+            if upload_id:
+                name = ChunkedUploadService.stored_name(upload_id)
+                if not name:
+                    raise serializers.ValidationError({field: "Upload not found or not complete."})
+                data[field] = name
+
         # When partial update, get existing values from instance
         bill = data.get("bill_file", getattr(self.instance, "bill_file", None))
         voucher = data.get("voucher_file", getattr(self.instance, "voucher_file", None))
         voucher_no = data.get("voucher_no", getattr(self.instance, "voucher_no", None))
 
-        # case 1: none uploaded
-        if not bill and not voucher:
+        # case 1: none uploaded (bulk imports attach files later)
+        if not bill and not voucher and not self.context.get("files_optional"):
             raise serializers.ValidationError("Upload either bill_file or voucher_file.")
 
         # case 2: both uploaded
@@ -153,7 +220,7 @@ class SalaryExpenseSerializer(BaseExpenseSerializer):
 
     class Meta(BaseExpenseSerializer.Meta):
         model = SalaryExpense
-        fields = "__all__"
+        exclude = ("category",)
 
 
 class CafeteriaExpenseSerializer(BaseExpenseSerializer):
@@ -198,31 +265,45 @@ class BookingTypeMasterSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ["created_at"]
 
+class BookingTypeField(serializers.PrimaryKeyRelatedField):
+    """A BookingTypeMaster by id, or by name as older clients send it."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and not data.strip().isdigit():
+            type_id = (
+                BookingTypeMaster.objects.filter(name__iexact=data.strip()).values_list("id", flat=True).first()
+            )
+            if type_id is None:
+                self.fail("does_not_exist", pk_value=data)
+            data = type_id
+        return super().to_internal_value(data)
+
+
 class BookingSerializer(serializers.ModelSerializer):
+    booking_type = BookingTypeField(
+        queryset=BookingTypeMaster.objects.all(), required=False, allow_null=True
+    )
+
     class Meta:
         model = Booking
         fields = "__all__"
-        read_only_fields = ("invoice_no", "created_at","source")
-        
+        read_only_fields = ("invoice_no", "created_at", "source", "booking_type_legacy")
+
+
 class BookingFetchSerializer(serializers.ModelSerializer):
+    """Expects bookings fetched with select_related("booking_type")."""
     gst_percentage = serializers.SerializerMethodField()
     booking_type_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Booking
-        fields = "__all__"
+        exclude = ("booking_type_legacy",)
 
     def get_booking_type_name(self, obj):
-        try:
-            return BookingTypeMaster.objects.get(id=obj.booking_type).name
-        except BookingTypeMaster.DoesNotExist:
-            return None
+        return obj.booking_type_name
 
     def get_gst_percentage(self, obj):
-        try:
-            return BookingTypeMaster.objects.get(id=obj.booking_type).gst_percentage
-        except BookingTypeMaster.DoesNotExist:
-            return None
+        return obj.booking_type.gst_percentage if obj.booking_type_id else None
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -255,3 +336,17 @@ class LedgerEntrySerializer(serializers.ModelSerializer):
 
 
 
+
+
+class LedgerRunningBalanceSerializer(serializers.ModelSerializer):
+    running_balance = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = LedgerEntry
+        fields = ["id", "date", "description", "debit", "credit", "running_balance"]
+
+
+class LedgerRebuildJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LedgerRebuildJob
+        exclude = ["high_water_marks"]
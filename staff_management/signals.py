@@ -1,84 +1,229 @@
-
 # staff_management/signals.py
 
 import logging
-from decimal import Decimal
-from django.db import transaction
-from django.db.models.signals import post_save, pre_delete, pre_save
-from django.dispatch import receiver
+from collections import defaultdict
+
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from django.utils import timezone
 
 from .models import (
-    LedgerEntry, SalesIncome, OtherIncome, Booking,
-    LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
-    RentalExpense, SalaryExpense, MiscellaneousExpense,
-    MaintenanceExpense, CapitalExpense, OtherExpense,
+    Booking, BookingTypeMaster, CategoryMaster, DataVersion, Expense, IncomeCategory, PaymentVoucher,
+    Room, SnapshotWatermark,
 )
+from .ledger_service import INCOME_SOURCES, EXPENSE_MODELS
+from .ledger_posting import LedgerPostingQueue, SOURCE_TYPE_BY_MODEL
+from .expense_rollup import ExpenseRollupService, ZERO
+from .occupancy_service import local_date
 
 logger = logging.getLogger(__name__)
 
 
-def _delete_existing_entries(source_type, source_id):
-    LedgerEntry.objects.filter(
-        source_type=source_type,
-        source_id=source_id
-    ).delete()
+# -------------------------
+# LEDGER POSTING
+# Every source model (booking, sales/other income, expenses) queues its id
+# on save/delete; LedgerPostingQueue posts the whole transaction's changes in
+# one batch after commit.
+# -------------------------
+SOURCE_MODELS = [Booking] + [model for model, _ in INCOME_SOURCES] + EXPENSE_MODELS
 
 
-@receiver(pre_save, sender=Booking)
-def booking_pre_save_capture_old_paid(sender, instance, **kwargs):
-    if not instance.pk:
-        instance._old_paid_amount = Decimal("0.00")
+def _queue_ledger_posting(sender, instance, **kwargs):
+    # Booking edits that leave paid_amount and booking_date alone have nothing to post
+    if (
+        sender is Booking
+        and kwargs.get("signal") is post_save
+        and not kwargs.get("created")
+        and not instance.has_changed("paid_amount", "booking_date")
+    ):
+        return
+
+    if isinstance(instance, Expense):
+        # A category change moves the entry to another source_type
+        loaded = getattr(instance, "_loaded_values", {})
+        source_types = {instance.category, loaded.get("category", instance.category)}
+    else:
+        source_types = {SOURCE_TYPE_BY_MODEL[sender]}
+    for source_type in source_types:
+        LedgerPostingQueue.enqueue(source_type, [instance.pk])
+
+
+for model_class in SOURCE_MODELS:
+    post_save.connect(
+        _queue_ledger_posting, sender=model_class,
+        dispatch_uid=f"ledger_posting_save_{model_class.__name__}",
+    )
+    post_delete.connect(
+        _queue_ledger_posting, sender=model_class,
+        dispatch_uid=f"ledger_posting_delete_{model_class.__name__}",
+    )
+
+
+# -------------------------
+# DATA VERSIONS
+# Dashboard caches and ETags key on these counters; bumping inside the writing
+# transaction makes every cached response built before the write unreachable.
+# -------------------------
+DATA_DOMAINS = {
+    Booking: DataVersion.DOMAIN_BOOKING,
+    Room: DataVersion.DOMAIN_ROOM,
+    PaymentVoucher: DataVersion.DOMAIN_VOUCHER,
+    BookingTypeMaster: DataVersion.DOMAIN_BOOKING_TYPE,
+    CategoryMaster: DataVersion.DOMAIN_CATEGORY,
+}
+DATA_DOMAINS.update({model: DataVersion.DOMAIN_INCOME for model, _ in INCOME_SOURCES})
+# Income lists show category names
+DATA_DOMAINS[IncomeCategory] = DataVersion.DOMAIN_INCOME
+DATA_DOMAINS.update({model: DataVersion.DOMAIN_EXPENSE for model in EXPENSE_MODELS})
+
+
+def _bump_data_version(sender, **kwargs):
+    DataVersion.bump(DATA_DOMAINS[sender])
+
+
+for model_class, domain in DATA_DOMAINS.items():
+    post_save.connect(
+        _bump_data_version, sender=model_class,
+        dispatch_uid=f"data_version_save_{model_class.__name__}",
+    )
+    post_delete.connect(
+        _bump_data_version, sender=model_class,
+        dispatch_uid=f"data_version_delete_{model_class.__name__}",
+    )
+
+
+# -------------------------
+# EXPENSE DAILY ROLLUP
+# Moves each expense's (date, amount, category) into ExpenseDailyRollup
+# inside the writing transaction, using the values the instance was loaded
+# with.
+# -------------------------
+def _load_tracked_state(sender, instance, **kwargs):
+    # Instances not read through the ORM (or with tracked fields deferred)
+    # have no loaded values; read the stored row once so the old day is known
+    if instance.pk is None:
+        return
+    loaded = getattr(instance, "_loaded_values", {})
+    if all(name in loaded for name in sender.TRACKED_FIELDS):
+        return
+    instance._loaded_values = (
+        sender._base_manager.filter(pk=instance.pk).values(*sender.TRACKED_FIELDS).first() or {}
+    )
+
+
+def _update_expense_rollup(sender, instance, **kwargs):
+    loaded = getattr(instance, "_loaded_values", {})
+    old = (loaded["date"], loaded["amount"], loaded["category"]) if "date" in loaded else None
+    current = (instance.date, instance.amount, instance.category)
+    if kwargs.get("signal") is post_delete:
+        new = None
+        old = old or current
+    else:
+        new = current
+        if kwargs.get("created"):
+            old = None
+        elif old == new:
+            return
+
+    ExpenseRollupService.apply_deltas(ExpenseRollupService.deltas_for_change(old, new))
+
+
+for model_class in EXPENSE_MODELS:
+    pre_save.connect(
+        _load_tracked_state, sender=model_class,
+        dispatch_uid=f"expense_rollup_load_{model_class.__name__}",
+    )
+    post_save.connect(
+        _update_expense_rollup, sender=model_class,
+        dispatch_uid=f"expense_rollup_save_{model_class.__name__}",
+    )
+    post_delete.connect(
+        _update_expense_rollup, sender=model_class,
+        dispatch_uid=f"expense_rollup_delete_{model_class.__name__}",
+    )
+
+
+
+# -------------------------
+# DASHBOARD SNAPSHOTS
+# A write dated on or before the snapshot watermark moves it back to the day
+# before, so dashboards read those days live until the nightly job
+# re-snapshots them. Room changes alter every day's inventory.
+# -------------------------
+SNAPSHOT_BOOKING_FIELDS = ("booking_date", "checkin_date", "checkout_date", "booking_price")
+
+
+def _reopen_dashboard_snapshots(sender, instance, **kwargs):
+    if sender is Room:
+        SnapshotWatermark.reopen(None)
+        return
+
+    loaded = getattr(instance, "_loaded_values", {})
+    changed = kwargs.get("signal") is post_delete or kwargs.get("created")
+
+    if sender is Booking:
+        if not (changed or instance.has_changed(*SNAPSHOT_BOOKING_FIELDS)):
+            return
+        days = [instance.booking_date, loaded.get("booking_date")]
+        days += [local_date(value) for value in (instance.checkin_date, loaded.get("checkin_date")) if value]
+    else:
+        if not changed and all(loaded.get(name) == getattr(instance, name) for name in sender.TRACKED_FIELDS):
+            return
+        days = [instance.date, loaded.get("date")]
+
+    _reopen_snapshots_from(days)
+
+
+def _reopen_snapshots_from(days):
+    # Snapshots never include today, so today's writes need no update
+    day = min((day for day in days if day), default=None)
+    if day and day < timezone.localdate():
+        SnapshotWatermark.reopen(day)
+
+
+for model_class, _source_type in INCOME_SOURCES:
+    pre_save.connect(
+        _load_tracked_state, sender=model_class,
+        dispatch_uid=f"dashboard_snapshot_load_{model_class.__name__}",
+    )
+
+for model_class in SOURCE_MODELS + [Room]:
+    post_save.connect(
+        _reopen_dashboard_snapshots, sender=model_class,
+        dispatch_uid=f"dashboard_snapshot_save_{model_class.__name__}",
+    )
+    post_delete.connect(
+        _reopen_dashboard_snapshots, sender=model_class,
+        dispatch_uid=f"dashboard_snapshot_delete_{model_class.__name__}",
+    )
+
+
+# -------------------------
+# BULK EXPENSE INSERTS
+# bulk_create sends no signals; callers hand the created expenses here for
+# the save handlers' work, batched.
+# -------------------------
+def expenses_bulk_created(expenses):
+    """
+    What post_save does for each new expense, once per batch: one ledger
+    enqueue per category, one rollup update per (day, category), one data
+    version bump and one snapshot reopen. Call it inside the inserting
+    transaction.
+    """
+    if not expenses:
         return
 
-    try:
-        old = sender.objects.get(pk=instance.pk)
-        instance._old_paid_amount = old.paid_amount or Decimal("0.00")
-    except sender.DoesNotExist:
-        instance._old_paid_amount = Decimal("0.00")
-
-
-@receiver(post_save, sender=Booking)
-def booking_post_save(sender, instance, created, **kwargs):
-    source_type = "booking"
-
-    with transaction.atomic():
-        calculated_pending = (
-            (instance.booking_price or Decimal("0.00")) -
-            (instance.paid_amount or Decimal("0.00"))
-        )
-
-        if instance.pending_amount != calculated_pending:
-            Booking.objects.filter(pk=instance.pk).update(
-                pending_amount=calculated_pending
-            )
-
-        if created and instance.paid_amount:
-            LedgerEntry.objects.create(
-                date=instance.booking_date or instance.checkin_date,
-                source_type=source_type,
-                source_id=instance.id,
-                description=f"Booking payment ({instance.guest_name})",
-                credit=instance.paid_amount,
-                debit=Decimal("0.00"),
-            )
-
-        old_paid = getattr(instance, "_old_paid_amount", Decimal("0.00"))
-        diff = (instance.paid_amount or Decimal("0.00")) - old_paid
-
-        if diff > 0:
-            LedgerEntry.objects.create(
-                date=instance.booking_date or instance.checkin_date,
-                source_type=source_type,
-                source_id=instance.id,
-                description=f"Additional payment ({instance.guest_name})",
-                credit=diff,
-                debit=Decimal("0.00"),
-            )
-
-
-@receiver(pre_delete, sender=Booking)
-def booking_pre_delete(sender, instance, **kwargs):
-    _delete_existing_entries("booking", instance.id)
+    ids_by_category = defaultdict(list)
+    deltas = defaultdict(lambda: [ZERO, 0])
+    for expense in expenses:
+        ids_by_category[expense.category].append(expense.pk)
+        ExpenseRollupService.deltas_for_change(None, (expense.date, expense.amount, expense.category), deltas)
+
+    for category, ids in ids_by_category.items():
+        LedgerPostingQueue.enqueue(category, ids)
+    ExpenseRollupService.apply_deltas(deltas)
+    DataVersion.bump(DATA_DOMAINS[Expense])
+    _reopen_snapshots_from(expense.date for expense in expenses)
 
 
 # import logging
@@ -1,3 +1,819 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_management.models import User
+from staff_management.models import (
+    Booking, BookingTypeMaster, CategoryMaster, DashboardSnapshot, DocumentSequence, Expense,
+    ExpenseDailyRollup, FileUpload, IncomeCategory, LedgerBalanceSnapshot, LedgerDailyRollup, LedgerDayDigest,
+    LedgerEntry, LedgerRebuildJob, MessExpense, OtherIncome, PaymentVoucher, SalaryExpense, SalesIncome,
+    SnapshotWatermark, StockItem, StoredBlob,
+)
+from staff_management.chunked_upload import ChunkedUploadService
+from staff_management.expense_import import ExpenseImporter
+from staff_management.ledger_partitions import LedgerPartitionManager, SCHEME_FY, SCHEME_MONTH
+from staff_management.ledger_posting import LedgerPostingQueue
+from staff_management.ledger_reconciliation import LedgerReconciliation
+from staff_management.ledger_rebuild import LedgerArchived, LedgerRebuilder, RebuildInProgress, run_rebuild_async
+from staff_management.ledger_service import LedgerService
+from staff_management.serializers import SalaryExpenseSerializer, SalesIncomeSerializer
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        now = timezone.now()
+        self.booking_type = BookingTypeMaster.objects.create(name="Deluxe", default_price=Decimal("1000.00"))
+        Booking.objects.create(
+            booking_date=timezone.localdate(), guest_name="Guest", booking_type=self.booking_type,
+            checkin_date=now, checkout_date=now + timedelta(days=1),
+            booking_price=Decimal("1000.00"), paid_amount=Decimal("0.00"), pending_amount=Decimal("1000.00"),
+        )
+
+    def test_list_sends_validators_and_answers_304(self):
+        response = self.client.get(reverse("list-bookings"))
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        # Only the data version lookup; no bookings are read or serialized
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("list-bookings"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_data_and_query(self):
+        etag = self.client.get(reverse("unified-income-list"))["ETag"]
+        self.assertNotEqual(self.client.get(reverse("unified-income-list"), {"page": 2})["ETag"], etag)
+
+        SalesIncome.objects.create(
+            date=timezone.localdate(), category=IncomeCategory.resolve("Food"), amount=Decimal("50.00"),
+        )
+
+        response = self.client.get(reverse("unified-income-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_booking_type_rename_changes_booking_list_etag(self):
+        etag = self.client.get(reverse("list-bookings"))["ETag"]
+
+        self.booking_type.name = "Suite"
+        self.booking_type.save()
+
+        response = self.client.get(reverse("list-bookings"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"][0]["booking_type"], "Suite")
+
+
+class ExpenseTableTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.today = timezone.localdate()
+        self.mess = MessExpense.objects.create(date=self.today, amount=Decimal("40.00"))
+        self.salary = SalaryExpense.objects.create(date=self.today, amount=Decimal("900.00"), staff_code="ST01")
+
+    def test_category_models_share_one_table(self):
+        self.assertNotEqual(self.mess.id, self.salary.id)
+        self.assertEqual(Expense.objects.get(pk=self.salary.id).category, Expense.CATEGORY_SALARY)
+        self.assertEqual(list(MessExpense.objects.values_list("id", flat=True)), [self.mess.id])
+        self.assertFalse(SalaryExpense.objects.filter(pk=self.mess.id).exists())
+
+    def test_list_is_one_query_newest_first(self):
+        # data version + expenses
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("list-expenses"))
+        rows = response.data["data"]
+        self.assertEqual([row["id"] for row in rows], [self.salary.id, self.mess.id])
+        self.assertEqual([row["category"] for row in rows], ["Salary", "Mess"])
+
+    def test_list_pages_filters_and_fields(self):
+        older = MessExpense.objects.create(
+            date=self.today - timedelta(days=3), amount=Decimal("15.00"), voucher_no="V-7",
+        )
+        first = self.client.get(reverse("list-expenses"), {"page_size": 2}).data
+        self.assertEqual([row["id"] for row in first["data"]], [self.salary.id, self.mess.id])
+        second = self.client.get(
+            reverse("list-expenses"), {"page_size": 2, "cursor": first["next_cursor"]}
+        ).data
+        self.assertEqual([row["id"] for row in second["data"]], [older.id])
+        self.assertIsNone(second["next_cursor"])
+
+        response = self.client.get(reverse("list-expenses"), {
+            "category": "Mess", "max_amount": "20", "has_bill": "false", "fields": "id,voucher_no",
+        })
+        self.assertEqual(response.data["data"], [{"id": older.id, "voucher_no": "V-7"}])
+
+        response = self.client.get(reverse("list-expenses"), {"ordering": "date", "fields": "id"})
+        self.assertEqual([row["id"] for row in response.data["data"]], [older.id, self.mess.id, self.salary.id])
+        self.assertEqual(self.client.get(reverse("list-expenses"), {"fields": "staff_code"}).status_code, 400)
+
+    def test_salary_serializer_keeps_staff_code(self):
+        data = SalaryExpenseSerializer(self.salary).data
+        self.assertEqual(data["staff_code"], "ST01")
+        self.assertNotIn("category", data)
+
+    def test_category_change_moves_rollup(self):
+        expense = Expense.objects.get(pk=self.mess.id)
+        expense.category = Expense.CATEGORY_LAUNDRY
+        expense.save()
+
+        totals = dict(ExpenseDailyRollup.objects.filter(date=self.today).values_list("category", "total"))
+        self.assertNotIn(Expense.CATEGORY_MESS, totals)
+        self.assertEqual(totals[Expense.CATEGORY_LAUNDRY], Decimal("40.00"))
+
+
+class ExpenseImportTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="accounts", role="ADMIN"))
+
+    def test_valid_rows_are_inserted_and_invalid_rows_reported(self):
+        day = timezone.localdate() - timedelta(days=2)
+        content = (
+            "category,date,amount,description,staff_code\n"
+            f"Mess,{day},40.00,Vegetables,\n"
+            f"Salary,{day},900.00,,\n"
+            f"Salary,{day},900.00,,ST01\n"
+            f"Travel,{day},10.00,,\n"
+            f"messexpense,{day},not-a-number,,\n"
+        )
+        upload = SimpleUploadedFile("expenses.csv", content.encode(), content_type="text/csv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("import-expenses"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3, 5, 6])
+        self.assertIn("staff_code", response.data["errors"][0]["errors"])
+
+        self.assertEqual(SalaryExpense.objects.get().staff_code, "ST01")
+        totals = dict(ExpenseDailyRollup.objects.filter(date=day).values_list("category", "total"))
+        self.assertEqual(totals, {
+            Expense.CATEGORY_MESS: Decimal("40.00"), Expense.CATEGORY_SALARY: Decimal("900.00"),
+        })
+        self.assertEqual(
+            LedgerEntry.objects.filter(source_type=Expense.CATEGORY_MESS).get().source_id,
+            MessExpense.objects.get().id,
+        )
+
+    @mock.patch("staff_management.serializers.ChunkedUploadService.stored_name", return_value="expenses/vouchers/v.pdf")
+    def test_voucher_rows_need_their_own_voucher_no(self, _stored_name):
+        upload_id = "7f6c1b1e-2f8a-4b7e-9a59-0d6a3d1c2b10"
+        content = "category,date,amount,voucher_no,voucher_upload_id\n" + "".join(
+            f"Mess,{timezone.localdate()},5.00,{voucher_no},{upload_id}\n" for voucher_no in ("", "V-17")
+        )
+        upload = SimpleUploadedFile("expenses.csv", content.encode(), content_type="text/csv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = ExpenseImporter().run(upload, upload.name)
+
+        self.assertEqual((report["imported"], [error["row"] for error in report["errors"]]), (1, [2]))
+        self.assertEqual(list(Expense.objects.values_list("voucher_no", flat=True)), ["V-17"])
+        self.assertFalse(DocumentSequence.objects.exists())
+
+    def test_unknown_format_is_rejected(self):
+        upload = SimpleUploadedFile("expenses.txt", b"category,date,amount\n")
+        response = self.client.post(reverse("import-expenses"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+
+class ChunkedUploadTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="accounts", role="ADMIN"))
+        self.content = b"%PDF-1.4 scanned bill " * 100
+
+    def _put(self, upload_id, offset, chunk):
+        return self.client.generic(
+            "PUT", f"{reverse('upload-detail', args=[upload_id])}?offset={offset}",
+            chunk, content_type="application/octet-stream",
+        )
+
+    def test_resumable_upload_is_stored_once_and_attached_to_expense(self):
+        upload_id = self.client.post(
+            reverse("start-upload"), {"filename": "bill.pdf", "size": len(self.content)}, format="json"
+        ).data["upload_id"]
+
+        self.assertEqual(self._put(upload_id, 0, self.content[:1000]).data["received"], 1000)
+        # A retried chunk at the wrong offset says where to resume
+        response = self._put(upload_id, 0, self.content[:1000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["received"], 1000)
+        self._put(upload_id, 1000, self.content[1000:])
+
+        response = self.client.post(reverse("complete-upload", args=[upload_id]))
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(response.data["sha256"], sha256)
+
+        # Knowing the hash is not enough: the same bill again has to be sent,
+        # and only then shares the stored file
+        copy_id = self.client.post(reverse("start-upload"), {
+            "filename": "copy.pdf", "size": len(self.content), "sha256": sha256,
+        }, format="json").data["upload_id"]
+        self.assertEqual(self.client.post(reverse("complete-upload", args=[copy_id])).status_code, 400)
+        self._put(copy_id, 0, self.content)
+        self.assertEqual(self.client.post(reverse("complete-upload", args=[copy_id])).data["sha256"], sha256)
+        self.assertEqual(StoredBlob.objects.count(), 1)
+
+        response = self.client.post(reverse("add-expense"), {
+            "category": "Mess", "date": timezone.localdate().isoformat(), "amount": "40.00",
+            "bill_upload_id": copy_id,
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        expense = MessExpense.objects.get()
+        self.assertEqual(expense.bill_file.name, StoredBlob.objects.get().file.name)
+        self.assertEqual(expense.bill_file.read(), self.content)
+
+    def test_incomplete_upload_cannot_be_attached(self):
+        upload_id = self.client.post(
+            reverse("start-upload"), {"filename": "bill.pdf", "size": len(self.content)}, format="json"
+        ).data["upload_id"]
+        self.assertEqual(self.client.post(reverse("complete-upload", args=[upload_id])).status_code, 400)
+
+        response = self.client.post(reverse("add-expense"), {
+            "category": "Mess", "date": timezone.localdate().isoformat(), "amount": "40.00",
+            "bill_upload_id": upload_id,
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def _stored(self, content):
+        upload_id = self.client.post(
+            reverse("start-upload"), {"filename": "bill.pdf", "size": len(content)}, format="json"
+        ).data["upload_id"]
+        self._put(upload_id, 0, content)
+        self.client.post(reverse("complete-upload", args=[upload_id]))
+        return FileUpload.objects.get(pk=upload_id)
+
+    def test_blobs_nothing_refers_to_are_removed(self):
+        attached = self._stored(self.content)
+        self.client.post(reverse("add-expense"), {
+            "category": "Mess", "date": timezone.localdate().isoformat(), "amount": "40.00",
+            "bill_upload_id": str(attached.pk),
+        }, format="json")
+        orphan = self._stored(b"a bill nobody filed")
+        orphan_path = orphan.blob.file.path
+
+        # Nothing is old enough yet
+        self.assertEqual(ChunkedUploadService.purge_unreferenced(), 0)
+
+        long_ago = timezone.now() - timedelta(days=30)
+        FileUpload.objects.update(updated_at=long_ago)
+        StoredBlob.objects.update(created_at=long_ago)
+        self.assertEqual(ChunkedUploadService.purge_unreferenced(), 1)
+
+        self.assertFalse(FileUpload.objects.exists())
+        self.assertEqual(StoredBlob.objects.get(), attached.blob)
+        self.assertFalse(os.path.exists(orphan_path))
+        self.assertEqual(MessExpense.objects.get().bill_file.read(), self.content)
+
+
+class UnifiedIncomeListTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.today = timezone.localdate()
+        now = timezone.now()
+        booking_type = BookingTypeMaster.objects.create(name="Deluxe", default_price=Decimal("1000.00"))
+        self.bookings = [
+            Booking.objects.create(
+                booking_date=self.today, guest_name=f"Guest {i}", booking_type=booking_type,
+                checkin_date=now, checkout_date=now + timedelta(days=1),
+                booking_price=Decimal("1000.10"), paid_amount=Decimal("0.00"), pending_amount=Decimal("1000.10"),
+            )
+            for i in range(2)
+        ]
+        self.sale = SalesIncome.objects.create(
+            date=self.today, category=IncomeCategory.resolve("Cafe"), amount=Decimal("0.20"),
+        )
+        self.other = OtherIncome.objects.create(
+            date=self.today - timedelta(days=1), category=IncomeCategory.resolve("Parking"),
+            amount=Decimal("50.00"),
+        )
+
+    def test_pages_in_date_type_id_order_with_exact_total(self):
+        seen = []
+        params = {"page_size": 2}
+        # data versions + page + totals, then the bookings (joined to their
+        # types) on the first page and sales + other incomes on the second
+        for queries in (4, 5):
+            with self.assertNumQueries(queries):
+                response = self.client.get(reverse("unified-income-list"), params)
+            seen += [(row["type"], row["id"]) for row in response.data["data"]]
+            self.assertEqual(response.data["total_income"], Decimal("2050.40"))
+            self.assertEqual(response.data["count"], 4)
+            params["cursor"] = response.data["next_cursor"]
+        self.assertIsNone(params["cursor"])
+
+        self.assertEqual(seen, [
+            ("Booking", self.bookings[1].id), ("Booking", self.bookings[0].id),
+            ("Sales Income", self.sale.id), ("Other Income", self.other.id),
+        ])
+        self.assertEqual(
+            self.client.get(reverse("unified-income-list")).data["data"][0]["details"]["booking_type"],
+            "Deluxe",
+        )
+
+    def test_totals_match_the_rows_whatever_the_snapshots_hold(self):
+        # A closed day whose snapshot missed a later write
+        yesterday = self.today - timedelta(days=1)
+        SnapshotWatermark.objects.create(name=SnapshotWatermark.DASHBOARD, closed_through=yesterday)
+        DashboardSnapshot.objects.create(
+            date=yesterday, kind="income", source="otherincome", total=Decimal("1.00"), count=1,
+        )
+
+        response = self.client.get(reverse("unified-income-list"), {"type": "Other Income"})
+        self.assertEqual(response.data["total_income"], Decimal("50.00"))
+
+    def test_type_and_category_filters(self):
+        response = self.client.get(reverse("unified-income-list"), {"category": "cafe"})
+        self.assertEqual([row["id"] for row in response.data["data"]], [self.sale.id])
+        self.assertEqual(response.data["total_income"], Decimal("0.20"))
+
+        response = self.client.get(reverse("unified-income-list"), {
+            "type": "Other Income,Sales Income", "end_date": (self.today - timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual([row["type"] for row in response.data["data"]], ["Other Income"])
+        self.assertEqual(response.data["count"], 1)
+
+    def test_income_category_is_only_created_with_its_income(self):
+        self.client.force_authenticate(User.objects.create(username="accounts", role="ADMIN"))
+        response = self.client.post(reverse("sales-income"), {"category": "Spa", "amount": "12.00"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IncomeCategory.objects.filter(key="spa").exists())
+
+        response = self.client.post(reverse("sales-income"), {
+            "category": " spa ", "date": self.today.isoformat(), "amount": "12.00",
+        }, format="json")
+        self.assertEqual(response.data["data"]["category"], "spa")
+        serializer = SalesIncomeSerializer(self.sale, data={"category": "SPA"}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.save().category.name, "spa")
+        self.assertEqual(IncomeCategory.objects.filter(key="spa").count(), 1)
+
+
+class MasterLookupTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.booking_type = BookingTypeMaster.objects.create(
+            name="Deluxe", default_price=Decimal("1000.00"), gst_percentage=Decimal("12.00"),
+        )
+        now = timezone.now()
+        for i in range(5):
+            Booking.objects.create(
+                booking_date=timezone.localdate(), guest_name=f"Guest {i}", booking_type=self.booking_type,
+                checkin_date=now, checkout_date=now + timedelta(days=1),
+                booking_price=Decimal("1000.00"), paid_amount=Decimal("0.00"), pending_amount=Decimal("1000.00"),
+            )
+
+    def test_booking_list_is_one_joined_query(self):
+        # data versions + bookings joined to their types
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("list-bookings"))
+        self.assertEqual({row["booking_type"] for row in response.data["data"]}, {"Deluxe"})
+        self.assertEqual(response.data["data"][0]["gst_percentage"], Decimal("12.00"))
+
+    def test_rename_is_seen_by_the_next_read(self):
+        self.client.get(reverse("list-bookings"))
+        self.booking_type.name = "Suite"
+        self.booking_type.save()
+        response = self.client.get(reverse("list-bookings"))
+        self.assertEqual(response.data["data"][0]["booking_type"], "Suite")
+
+    def test_new_booking_can_name_its_type(self):
+        user = User.objects.create(username="frontdesk", role="ADMIN")
+        self.client.force_authenticate(user)
+        now = timezone.now()
+        response = self.client.post(reverse("create-booking"), {
+            "booking_date": timezone.localdate().isoformat(), "guest_name": "Walk-in", "booking_type": "deluxe",
+            "checkin_date": now.isoformat(), "checkout_date": (now + timedelta(days=1)).isoformat(),
+            "booking_price": "1000.00", "paid_amount": "0.00", "pending_amount": "1000.00",
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.get(guest_name="Walk-in").booking_type, self.booking_type)
+
+
+    def test_stock_items_are_listed_by_category_name(self):
+        laundry = CategoryMaster.objects.create(name="Laundry")
+        StockItem.objects.create(date=timezone.localdate(), category=laundry, item_name="Towel", quantity=4)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("list-laundry-items"))
+        self.assertEqual([row["item_name"] for row in response.data["data"]], ["Towel"])
+        self.assertEqual(self.client.get(reverse("list-room-cleanings")).status_code, 404)
+
+
+class DocumentSequenceTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+        self.now = timezone.now()
+        self.book(invoice_no="SHLINV009")
+        self.book(invoice_no="SHLINV041")
+        self.book(invoice_no="MANUAL-99")
+
+    def book(self, **fields):
+        return Booking.objects.create(
+            booking_date=timezone.localdate(), guest_name="Guest",
+            checkin_date=self.now, checkout_date=self.now + timedelta(days=1),
+            booking_price=Decimal("1000.00"), paid_amount=Decimal("0.00"), pending_amount=Decimal("1000.00"),
+            **fields,
+        )
+
+    def test_series_continues_from_existing_numbers(self):
+        self.assertEqual(self.client.get(reverse("generate-invoice-number")).data["next_invoice_no"], "SHLINV042")
+
+        booking = self.book()
+        self.assertEqual(booking.invoice_no, "SHLINV042")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("generate-invoice-number"))
+        self.assertEqual(response.data["next_invoice_no"], "SHLINV043")
+
+    def test_batch_reservation_and_no_reuse_after_delete(self):
+        self.assertEqual(Booking.reserve_invoice_nos(3), ["SHLINV042", "SHLINV043", "SHLINV044"])
+
+        self.book().delete()
+        self.assertEqual(self.book().invoice_no, "SHLINV046")
+
+    def test_staff_ids_and_vouchers_have_their_own_series(self):
+        first = User.objects.create(username="staff1", role="STAFF")
+        second = User.objects.create(username="staff2", role="STAFF")
+        self.assertEqual((first.staff_unique_id, second.staff_unique_id), ("SHORELUXSTAFF001", "SHORELUXSTAFF002"))
+        self.assertEqual(PaymentVoucher.get_next_voucher_no(), "SHLVR001")
+
+
+class LedgerRunningBalanceTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+        for day, debit, credit in (
+            (date(2025, 1, 1), "0.00", "100.00"),
+            (date(2025, 1, 1), "30.00", "0.00"),
+            (date(2025, 1, 2), "0.00", "50.00"),
+            (date(2025, 1, 3), "0.00", "10.00"),
+        ):
+            LedgerEntry.objects.create(
+                date=day, source_type="salesincome", source_id=1, debit=Decimal(debit), credit=Decimal(credit),
+            )
+        LedgerEntry.objects.create(
+            date=date(2025, 1, 2), source_type="messexpense", source_id=1, debit=Decimal("5.00"),
+        )
+
+    def test_running_balance_carries_across_cursor_pages(self):
+        balances = []
+        params = {"account": "salesincome", "page_size": 3}
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("ledger-entries"), params)
+
+        while True:
+            self.assertEqual(response.status_code, 200)
+            balances += [row["running_balance"] for row in response.data["results"]]
+            if not response.data["next_cursor"]:
+                break
+            params["cursor"] = response.data["next_cursor"]
+            response = self.client.get(reverse("ledger-entries"), params)
+
+        self.assertEqual(balances, ["100.00", "70.00", "120.00", "130.00"])
+
+    def test_start_date_opens_from_snapshot(self):
+        LedgerService.rebuild_balance_snapshots()
+        response = self.client.get(reverse("ledger-entries"), {"account": "salesincome", "start_date": "2025-01-02"})
+        self.assertEqual(response.data["opening_balance"], "70.00")
+        self.assertEqual([row["running_balance"] for row in response.data["results"]], ["120.00", "130.00"])
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get(reverse("ledger-entries"), {"account": "salesincome", "cursor": "bogus"})
+        self.assertEqual(response.status_code, 400)
+
+
+class LedgerSummaryTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+        food = IncomeCategory.resolve("Food")
+        with self.captureOnCommitCallbacks(execute=True):
+            SalesIncome.objects.create(date=date(2024, 12, 31), category=food, amount=Decimal("40.00"))
+            SalesIncome.objects.create(date=date(2025, 1, 5), category=food, amount=Decimal("100.00"))
+            SalesIncome.objects.create(date=date(2025, 2, 1), category=food, amount=Decimal("25.00"))
+            MessExpense.objects.create(date=date(2025, 1, 9), amount=Decimal("30.00"))
+
+    def test_monthly_totals_come_from_the_rollup(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("monthly-ledger-summary"), {"year": "2025"})
+        self.assertEqual(response.data["results"], [
+            {"year": 2025, "month": "January", "credit": 100.0, "debit": 30.0},
+            {"year": 2025, "month": "February", "credit": 25.0, "debit": 0.0},
+        ])
+
+    def test_range_total_for_one_account(self):
+        response = self.client.get(reverse("monthly-ledger-summary"), {
+            "account": "salesincome", "group_by": "range", "start_date": "2024-12-01", "end_date": "2025-01-31",
+        })
+        self.assertEqual((response.data["credit"], response.data["debit"]), (140.0, 0.0))
+
+    def test_bad_year_is_a_400(self):
+        for year in ("abc", "0"):
+            response = self.client.get(reverse("monthly-ledger-summary"), {"year": year})
+            self.assertEqual(response.status_code, 400)
+
+
+class LedgerBalanceSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN"))
+        self.food = IncomeCategory.resolve("Food")
+        with self.captureOnCommitCallbacks(execute=True):
+            SalesIncome.objects.create(date=date(2025, 1, 10), category=self.food, amount=Decimal("100.00"))
+            SalesIncome.objects.create(date=date(2025, 2, 3), category=self.food, amount=Decimal("50.00"))
+
+    def snapshots(self):
+        return list(
+            LedgerBalanceSnapshot.objects.order_by("source_type", "period", "period_start")
+            .values_list("source_type", "period", "period_start", "debit", "credit", "balance")
+        )
+
+    def test_backdated_posting_touches_only_its_own_periods(self):
+        february = LedgerBalanceSnapshot.objects.filter(period_start__gte=date(2025, 2, 1))
+        untouched = list(february.values_list("period", "credit", "updated_at"))
+        with self.captureOnCommitCallbacks(execute=True):
+            SalesIncome.objects.create(date=date(2025, 1, 20), category=self.food, amount=Decimal("7.00"))
+        self.assertEqual(list(february.values_list("period", "credit", "updated_at")), untouched)
+
+        response = self.client.get(reverse("daybook-entries"), {"date": "2025-02-03", "account": "salesincome"})
+        self.assertEqual(response.data["opening_balance"], "107.00")
+        self.assertEqual(response.data["closing_balance"], "157.00")
+
+        incremental = self.snapshots()
+        LedgerService.rebuild_balance_snapshots()
+        self.assertEqual(self.snapshots(), incremental)
+
+    def test_deleted_source_leaves_snapshots_matching_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SalesIncome.objects.get(date=date(2025, 1, 10)).delete()
+
+        self.assertEqual(LedgerService.opening_balance("salesincome", date(2025, 2, 3)), Decimal("0.00"))
+        # Emptied periods stay behind at zero; a rebuild simply has no row for them
+        incremental = [row for row in self.snapshots() if row[3] or row[4]]
+        LedgerService.rebuild_balance_snapshots()
+        self.assertEqual(self.snapshots(), incremental)
+
+
+class LedgerPostingQueueTests(TransactionTestCase):
+    """Runs outside a test transaction so on_commit hooks fire as in production."""
+
+    def setUp(self):
+        self.food = IncomeCategory.resolve("Food")
+
+    def income(self, amount):
+        return SalesIncome.objects.create(date=date(2025, 1, 1), category=self.food, amount=Decimal(amount))
+
+    def posted(self):
+        return sorted(LedgerEntry.objects.values_list("source_id", "credit"))
+
+    def test_posting_continues_after_a_rolled_back_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.income("10.00")
+                raise RuntimeError
+
+        saved = self.income("50.00")
+        with transaction.atomic():
+            in_block = self.income("7.00")
+
+        self.assertEqual(self.posted(), [(saved.id, Decimal("50.00")), (in_block.id, Decimal("7.00"))])
+
+    def test_rolled_back_savepoint_is_not_posted(self):
+        with transaction.atomic():
+            kept = self.income("20.00")
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.income("99.00")
+                    raise RuntimeError
+
+        self.assertEqual(self.posted(), [(kept.id, Decimal("20.00"))])
+
+    def test_repeated_saves_post_once_per_transaction(self):
+        with transaction.atomic():
+            income = self.income("20.00")
+            for amount in ("30.00", "35.00"):
+                income.amount = Decimal(amount)
+                income.save()
+
+        self.assertEqual(self.posted(), [(income.id, Decimal("35.00"))])
+
+
+class LedgerBookingPostingTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking = Booking.objects.create(
+                booking_date=date(2025, 1, 1), guest_name="Guest", checkin_date=now,
+                checkout_date=now + timedelta(days=1), booking_price=Decimal("1000.00"),
+                paid_amount=Decimal("500.00"), pending_amount=Decimal("0.00"),
+            )
+        LedgerReconciliation.run(full=True)
+
+    def update(self, **fields):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        for name, value in fields.items():
+            setattr(booking, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+
+    def rollup(self):
+        return sorted(
+            LedgerDailyRollup.objects.exclude(entry_count=0).values_list("date", "debit", "credit")
+        )
+
+    def test_lowered_payment_posts_a_reversal(self):
+        self.update(paid_amount=Decimal("300.00"))
+
+        self.assertEqual(
+            sorted(LedgerEntry.objects.values_list("debit", "credit")),
+            [(Decimal("0.00"), Decimal("500.00")), (Decimal("200.00"), Decimal("0.00"))],
+        )
+        self.assertEqual(LedgerReconciliation.run(), {})
+
+    def test_moved_booking_date_moves_its_entries(self):
+        self.update(paid_amount=Decimal("600.00"))
+        self.update(booking_date=date(2025, 2, 1))
+
+        self.assertEqual(set(LedgerEntry.objects.values_list("date", flat=True)), {date(2025, 2, 1)})
+        self.assertEqual(self.rollup(), [(date(2025, 2, 1), Decimal("0.00"), Decimal("600.00"))])
+        self.assertFalse(
+            LedgerDayDigest.objects.filter(date__in=[date(2025, 1, 1), date(2025, 2, 1)], is_dirty=False).exists()
+        )
+        self.assertEqual(LedgerReconciliation.run(), {})
+
+class BookingDerivedFieldTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.booking = Booking.objects.create(
+            booking_date=timezone.localdate(), guest_name="Guest", checkin_date=now,
+            checkout_date=now + timedelta(days=1), booking_price=Decimal("1000.00"),
+            paid_amount=Decimal("200.00"), pending_amount=Decimal("0.00"),
+        )
+
+    def test_pending_amount_goes_out_with_the_write(self):
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).pending_amount, Decimal("800.00"))
+
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.paid_amount = Decimal("700.00")
+        booking.save(update_fields=["paid_amount"])
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).pending_amount, Decimal("300.00"))
+
+    def test_only_payment_edits_queue_a_ledger_posting(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        self.assertFalse(booking.has_changed("paid_amount"))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking.guest_name = "Renamed"
+            booking.save()
+        self.assertNotIn(LedgerPostingQueue.flush, callbacks)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            booking.paid_amount = Decimal("250.00")
+            booking.save()
+        self.assertIn(LedgerPostingQueue.flush, callbacks)
+
+
+class LedgerRebuildTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(User.objects.create(username="admin", role="ADMIN", is_staff=True))
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking = Booking.objects.create(
+                booking_date=date(2025, 1, 1), guest_name="Guest", checkin_date=now,
+                checkout_date=now + timedelta(days=1), booking_price=Decimal("1000.00"),
+                paid_amount=Decimal("200.00"), pending_amount=Decimal("800.00"),
+            )
+
+    @mock.patch("staff_management.views.run_rebuild_async")
+    def test_only_one_rebuild_runs_at_a_time(self, run_async):
+        self.assertEqual(self.client.post(reverse("backfill-ledger"), {}, format="json").status_code, 202)
+
+        response = self.client.post(reverse("backfill-ledger"), {}, format="json")
+        self.assertEqual(response.status_code, 409)
+        with self.assertRaises(RebuildInProgress):
+            LedgerRebuilder.claim(LedgerRebuildJob(chunk_size=10))
+        self.assertEqual(run_async.call_count, 1)
+
+    @mock.patch("staff_management.views.run_rebuild_async")
+    def test_stale_running_job_expires_and_can_be_resumed(self, run_async):
+        stale = LedgerRebuilder.claim(LedgerRebuildJob())
+        LedgerRebuildJob.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - LedgerRebuildJob.STALE_AFTER - timedelta(minutes=1)
+        )
+
+        response = self.client.post(reverse("backfill-ledger"), {"resume": True}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["job"]["id"], stale.pk)
+        self.assertEqual(LedgerRebuildJob.objects.get(pk=stale.pk).status, LedgerRebuildJob.STATUS_RUNNING)
+
+    def test_failure_is_logged_and_recorded(self):
+        job = LedgerRebuilder.claim(LedgerRebuildJob())
+        with mock.patch.object(LedgerRebuilder, "_clear", side_effect=RuntimeError("disk full")):
+            with self.assertLogs("staff_management.ledger_rebuild", "ERROR"):
+                with self.assertRaises(RuntimeError):
+                    LedgerRebuilder(job).run()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (LedgerRebuildJob.STATUS_FAILED, "disk full"))
+        self.assertEqual(LedgerRebuilder.resumable(), job)
+
+    def test_payment_posted_mid_rebuild_is_not_credited_twice(self):
+        def progress(message):
+            if message == "Existing ledger entries cleared":
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.booking.paid_amount = Decimal("500.00")
+                    self.booking.save()
+
+        LedgerRebuilder.start(chunk_size=10, progress=progress)
+
+        credits = LedgerEntry.objects.filter(source_type="booking", source_id=self.booking.pk)
+        self.assertEqual(list(credits.values_list("credit", flat=True)), [Decimal("500.00")])
+
+
+class LedgerRebuildThreadTests(TransactionTestCase):
+
+    def test_background_failure_is_recorded_on_the_job(self):
+        job = LedgerRebuilder.claim(LedgerRebuildJob())
+        with mock.patch.object(LedgerRebuilder, "_clear", side_effect=RuntimeError("disk full")):
+            with self.assertLogs("staff_management.ledger_rebuild", "ERROR"):
+                run_rebuild_async(job).join()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, LedgerRebuildJob.STATUS_FAILED)
+        self.assertEqual(job.error, "disk full")
+
+
+@override_settings(FINANCIAL_YEAR_START_MONTH=4)
+class LedgerPartitionTests(TestCase):
+
+    def test_partition_bounds_and_names(self):
+        self.assertEqual(
+            LedgerPartitionManager.bounds(date(2025, 12, 31), SCHEME_MONTH), (date(2025, 12, 1), date(2026, 1, 1))
+        )
+        start, end = LedgerPartitionManager.bounds(date(2025, 3, 31), SCHEME_FY)
+        self.assertEqual((start, end), (date(2024, 4, 1), date(2025, 4, 1)))
+        self.assertEqual(LedgerPartitionManager.partition_name(start, SCHEME_FY), "staff_management_ledgerentry_fy2024")
+
+    def test_legacy_index_names_fit_and_stay_distinct(self):
+        names = [
+            "staff_management_ledgerentry_source_type_source_id_0a1b2c3d",
+            "staff_management_ledgerentry_source_type_source_id_4e5f6a7b",
+        ]
+        legacy = [LedgerPartitionManager.legacy_index_name(name) for name in names]
+        self.assertNotEqual(legacy[0], legacy[1])
+        self.assertTrue(all(len(name) <= 63 for name in legacy))
+
+    def test_everything_is_a_no_op_without_postgresql(self):
+        self.assertFalse(LedgerPartitionManager.is_supported())
+        self.assertFalse(LedgerPartitionManager.convert(SCHEME_MONTH))
+        self.assertEqual(LedgerPartitionManager.ensure_partitions(scheme=SCHEME_MONTH), [])
+        self.assertEqual(LedgerPartitionManager.archive_before(date(2025, 1, 1)), [])
+
+    def test_archived_days_are_not_reconciled_or_rebuilt(self):
+        food = IncomeCategory.resolve("Food")
+        with self.captureOnCommitCallbacks(execute=True):
+            SalesIncome.objects.create(date=date(2024, 6, 1), category=food, amount=Decimal("10.00"))
+            SalesIncome.objects.create(date=date(2025, 6, 1), category=food, amount=Decimal("20.00"))
+        # What detaching the 2024 partitions leaves behind
+        LedgerEntry.objects.filter(date__lt=date(2025, 4, 1)).delete()
+        SnapshotWatermark.objects.create(name=SnapshotWatermark.LEDGER_ARCHIVE, closed_through=date(2025, 3, 31))
+
+        self.assertEqual(LedgerReconciliation.run(full=True), {})
+        with self.assertRaises(LedgerArchived):
+            LedgerRebuilder.start()
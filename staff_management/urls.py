@@ -39,6 +39,7 @@ urlpatterns = [
     path('sales-income', CreateSalesIncomeAPIView.as_view(), name="sales-income"),
     path('list-sales-income', ListSalesIncomeAPIView.as_view(), name="list-sales-income"),
     path('update-sales-income/<int:pk>', UpdateSalesIncomeAPIView.as_view(), name="update-sales-income"),
+    path('list-income-categories', ListIncomeCategoriesAPIView.as_view(), name="list-income-categories"),
 
 
    #################### urls.py ################
@@ -55,6 +56,10 @@ urlpatterns = [
 # expense URLs
     path('add-expense', CreateExpenseAPIView.as_view(), name="add-expense"),
     path('list-expenses', ExpenseListAPIView.as_view(), name="list-expenses"),
+    path('import-expenses', ImportExpensesAPIView.as_view(), name="import-expenses"),
+    path('uploads', StartUploadAPIView.as_view(), name="start-upload"),
+    path('uploads/<uuid:upload_id>', UploadDetailAPIView.as_view(), name="upload-detail"),
+    path('uploads/<uuid:upload_id>/complete', CompleteUploadAPIView.as_view(), name="complete-upload"),
     path('update-expense/<int:pk>', UpdateExpenseAPIView.as_view(), name="update-expense"),
 
 
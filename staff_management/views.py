@@ -17,10 +17,21 @@ from admin_management.models import *
 
 
 
-from django.db.models import Sum
+from django.db.models import Sum, Count, F, Q, Value, Window, DecimalField, ExpressionWrapper, RowRange
 from django.db.models.functions import ExtractMonth, ExtractYear
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from datetime import date as date_cls
+from collections import defaultdict
+import io
+
+from .pagination import get_page_size, encode_cursor, decode_cursor, InvalidCursor
+from .ledger_service import LedgerService
+from .report_service import ReportService
+from .ledger_rebuild import LedgerArchived, LedgerRebuilder, RebuildInProgress, run_rebuild_async
+from .conditional_get import conditional_get
+from .expense_import import ExpenseImporter, ImportFileError
+from .chunked_upload import ChunkedUploadService, UploadError, UploadOffsetError, CHUNK_SIZE
 
 CATEGORY_MODEL_MAP = {
     "Laundry": (LaundryExpense, LaundryExpenseSerializer),
@@ -216,16 +227,14 @@ class LogRoomCleaningAPIView(APIView):
 class GetRoomCleaningItemsAPIView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        try:
-            category = CategoryMaster.objects.get(name="Room Cleaning")
-        except CategoryMaster.DoesNotExist:
+        # One joined query; the category itself is only checked when nothing matched
+        items = StockItem.objects.filter(category__name="Room Cleaning").select_related("category")
+        if not items and not CategoryMaster.objects.filter(name="Room Cleaning").exists():
             return Response(
                 {"error": "Room Cleaning category not found"},
                 status=404
             )
 
-        items = StockItem.objects.filter(category=category)
-
         serializer = StockItemListSerializer(items, many=True)
         return Response({"data": serializer.data}, status=200)
     
@@ -235,16 +244,14 @@ class GetRoomCleaningItemsAPIView(APIView):
 class GetLaundryItemsAPIView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        try:
-            category = CategoryMaster.objects.get(name="Laundry")
-        except CategoryMaster.DoesNotExist:
+        # One joined query; the category itself is only checked when nothing matched
+        items = StockItem.objects.filter(category__name="Laundry").select_related("category")
+        if not items and not CategoryMaster.objects.filter(name="Laundry").exists():
             return Response(
                 {"error": "Laundry category not found"},
                 status=404
             )
 
-        items = StockItem.objects.filter(category=category)
-
         serializer = StockItemListSerializer(items, many=True)
         return Response({"data": serializer.data}, status=200)
     
@@ -340,11 +347,20 @@ class CreateOtherIncomeAPIView(APIView):
 class ListOtherIncomeAPIView(APIView):
     permission_classes = [AllowAny]
     
+    @conditional_get(DataVersion.DOMAIN_INCOME)
     def get(self, request):
-        incomes = OtherIncome.objects.all()
+        incomes = OtherIncome.objects.select_related("category")
         serializer = OtherIncomeSerializer(incomes, many=True)
         return Response({"data": serializer.data}, status=200)
     
+class ListIncomeCategoriesAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    @conditional_get(DataVersion.DOMAIN_INCOME)
+    def get(self, request):
+        serializer = IncomeCategorySerializer(IncomeCategory.objects.all(), many=True)
+        return Response({"data": serializer.data}, status=200)
+
 # -----------------------
 # SALES INCOME APIs
 # -----------------------
@@ -360,8 +376,9 @@ class CreateSalesIncomeAPIView(APIView):
 class ListSalesIncomeAPIView(APIView):
     permission_classes = [AllowAny]
     
+    @conditional_get(DataVersion.DOMAIN_INCOME)
     def get(self, request):
-        sales = SalesIncome.objects.all()
+        sales = SalesIncome.objects.select_related("category")
         serializer = SalesIncomeSerializer(sales, many=True)
         return Response({"data": serializer.data}, status=200)
     
@@ -502,6 +519,7 @@ class CreatePaymentVoucherAPIView(APIView):
 class ListPaymentVouchersAPIView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get(DataVersion.DOMAIN_VOUCHER)
     def get(self, request):
         vouchers = PaymentVoucher.objects.all().order_by("-id")
         serializer = PaymentVoucherSerializer(vouchers, many=True)
@@ -533,27 +551,229 @@ class CreateExpenseAPIView(APIView):
         return Response(serializer.errors, status=400)
 
 
+class ImportExpensesAPIView(APIView):
+    """
+    Bulk expense entry from a CSV or XLSX file (multipart field `file`) with
+    columns category, date, amount and optionally description, voucher_no,
+    staff_code, bill_upload_id, voucher_upload_id. Valid rows are inserted,
+    invalid ones reported by row number.
+    """
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response({"error": "file is required"}, status=400)
+
+        try:
+            report = ExpenseImporter().run(upload, upload.name)
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response({"message": "Expenses imported", **report})
+
+
+class StartUploadAPIView(APIView):
+    """
+    Begin a resumable bill/voucher upload: {filename, size, sha256?}.
+    The sha256, when given, is checked against the received bytes on
+    completion; the bytes are always sent.
+    """
+    def post(self, request):
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            return Response({"error": "size must be a number of bytes"}, status=400)
+
+        filename = request.data.get("filename") or ""
+        if not filename:
+            return Response({"error": "filename is required"}, status=400)
+
+        try:
+            upload = ChunkedUploadService.start(filename, size, request.data.get("sha256") or "")
+        except UploadError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response(_upload_data(upload), status=status.HTTP_201_CREATED)
+
+
+class UploadDetailAPIView(APIView):
+    """
+    GET: how far an upload got, to resume after a dropped connection.
+    PUT: the raw bytes of the next chunk, at ?offset= (must equal `received`).
+    """
+    def get(self, request, upload_id):
+        upload = get_object_or_404(FileUpload, pk=upload_id)
+        return Response(_upload_data(upload))
+
+    def put(self, request, upload_id):
+        try:
+            offset = int(request.query_params.get("offset", ""))
+        except ValueError:
+            return Response({"error": "offset is required"}, status=400)
+
+        try:
+            upload = ChunkedUploadService.append(upload_id, offset, request.stream or io.BytesIO())
+        except FileUpload.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=404)
+        except UploadOffsetError as e:
+            return Response({"error": str(e), "received": e.received}, status=409)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response(_upload_data(upload))
+
+
+class CompleteUploadAPIView(APIView):
+    """Assemble a fully received upload; its upload_id can then be used on an expense."""
+    def post(self, request, upload_id):
+        try:
+            upload = ChunkedUploadService.complete(upload_id)
+        except FileUpload.DoesNotExist:
+            return Response({"error": "Upload not found"}, status=404)
+        except UploadError as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response(_upload_data(upload))
+
+
+def _upload_data(upload):
+    return {
+        "upload_id": str(upload.id),
+        "filename": upload.filename,
+        "size": upload.size,
+        "received": upload.received,
+        "status": upload.status,
+        "chunk_size": CHUNK_SIZE,
+        "sha256": upload.blob.sha256 if upload.blob_id else None,
+    }
+
+
+# Expense.category by the label the frontend sends ("Mess") or the key itself
+EXPENSE_CATEGORY_BY_LABEL = {label: key for key, label in Expense.CATEGORY_CHOICES}
+EXPENSE_LIST_FIELDS = (
+    "id", "category", "date", "amount", "description", "voucher_no", "bill_file", "voucher_file",
+)
+
+
 class ExpenseListAPIView(APIView):
+    """
+    Expenses of every category, newest first, filtered and sorted in the
+    database and served a page at a time.
+
+    Query Parameters:
+    - category: label or key, comma separated ("Mess,Salary")
+    - start_date, end_date: YYYY-MM-DD
+    - min_amount, max_amount
+    - voucher_no: exact match
+    - has_bill: true | false
+    - ordering: -date (default) | date, ties broken by id
+    - fields: comma separated subset of the row keys
+    - page_size, cursor: keyset pagination, pass back `next_cursor`
+    """
     permission_classes = [AllowAny]
+    CURSOR_SALT = "list-expenses"
 
+    @conditional_get(DataVersion.DOMAIN_EXPENSE)
     def get(self, request):
-        all_data = []
+        params = request.query_params
+        queryset = Expense.objects.all()
+
+        if params.get("category"):
+            categories = set()
+            for value in params["category"].split(","):
+                value = value.strip()
+                key = EXPENSE_CATEGORY_BY_LABEL.get(value, value)
+                if key not in EXPENSE_CATEGORY_BY_LABEL.values():
+                    return Response({"error": f"Invalid category: {value}"}, status=400)
+                categories.add(key)
+            queryset = queryset.filter(category__in=categories)
 
-        for category, (ModelClass, SerializerClass) in CATEGORY_MODEL_MAP.items():
-            items = ModelClass.objects.all().order_by("-id")
-            for obj in items:
-                all_data.append({
-                    "id": obj.id,
-                    "category": category,
-                    "date": obj.date,
-                    "amount": obj.amount,
-                    "description": obj.description,
-                    "voucher_no": obj.voucher_no,
-                    "bill_file": obj.bill_file.url if obj.bill_file else None,
-                    "voucher_file": obj.voucher_file.url if obj.voucher_file else None,
-                })
-        all_data = sorted(all_data, key=lambda x: x["id"], reverse=True)
-        return Response({"data": all_data}, status=200)
+        try:
+            start_date = _parse_date_param(request, "start_date")
+            end_date = _parse_date_param(request, "end_date")
+        except ValueError:
+            return Response({"error": "start_date/end_date must be YYYY-MM-DD"}, status=400)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+
+        try:
+            if params.get("min_amount"):
+                queryset = queryset.filter(amount__gte=Decimal(params["min_amount"]))
+            if params.get("max_amount"):
+                queryset = queryset.filter(amount__lte=Decimal(params["max_amount"]))
+        except ArithmeticError:
+            return Response({"error": "min_amount/max_amount must be numbers"}, status=400)
+
+        if params.get("voucher_no"):
+            queryset = queryset.filter(voucher_no=params["voucher_no"])
+
+        has_bill = params.get("has_bill", "").lower()
+        if has_bill in ("true", "1"):
+            queryset = queryset.exclude(bill_file="").exclude(bill_file=None)
+        elif has_bill in ("false", "0"):
+            queryset = queryset.filter(Q(bill_file="") | Q(bill_file=None))
+        elif has_bill:
+            return Response({"error": "has_bill must be true or false"}, status=400)
+
+        ordering = params.get("ordering", "-date")
+        if ordering not in ("date", "-date"):
+            return Response({"error": "ordering must be date or -date"}, status=400)
+        descending = ordering == "-date"
+
+        fields = EXPENSE_LIST_FIELDS
+        if params.get("fields"):
+            fields = tuple(name.strip() for name in params["fields"].split(",") if name.strip())
+            unknown = set(fields) - set(EXPENSE_LIST_FIELDS)
+            if unknown or not fields:
+                return Response(
+                    {"error": f"fields must be from {', '.join(EXPENSE_LIST_FIELDS)}"}, status=400
+                )
+
+        cursor = params.get("cursor")
+        if cursor:
+            try:
+                position = decode_cursor(cursor, self.CURSOR_SALT)
+                last_date = date_cls.fromisoformat(position["date"])
+                last_id = int(position["id"])
+            except (InvalidCursor, KeyError, TypeError, ValueError):
+                return Response({"error": "Invalid cursor"}, status=400)
+
+            if descending:
+                queryset = queryset.filter(date__lte=last_date).filter(
+                    Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id)
+                )
+            else:
+                queryset = queryset.filter(date__gte=last_date).filter(
+                    Q(date__gt=last_date) | Q(date=last_date, id__gt=last_id)
+                )
+
+        page_size = get_page_size(request)
+        order = ("-date", "-id") if descending else ("date", "id")
+        columns = {"id", "date"} | {name for name in fields if name in EXPENSE_LIST_FIELDS}
+        rows = list(queryset.order_by(*order).values(*columns)[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(
+                {"date": rows[-1]["date"].isoformat(), "id": rows[-1]["id"]}, self.CURSOR_SALT
+            )
+
+        labels = dict(Expense.CATEGORY_CHOICES)
+        storage = Expense._meta.get_field("bill_file").storage
+        data = []
+        for row in rows:
+            if "category" in row:
+                row["category"] = labels.get(row["category"], row["category"])
+            for name in ("bill_file", "voucher_file"):
+                if name in row:
+                    row[name] = storage.url(row[name]) if row[name] else None
+            data.append({name: row[name] for name in fields})
+
+        return Response({"data": data, "next_cursor": next_cursor}, status=200)
 
 # -----------------------
 # BOOKING APIs
@@ -595,6 +815,9 @@ class DeleteBookingTypeAPIView(APIView):
         except BookingTypeMaster.DoesNotExist:
             return Response({"error": "Booking type not found"}, status=404)
 
+        if bt.bookings.exists():
+            return Response({"error": "Booking type is used by existing bookings"}, status=400)
+
         bt.delete()
         return Response({"message": "Booking type deleted"})
 
@@ -617,8 +840,9 @@ class CreateBookingAPIView(APIView):
 class BookingListAPIView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get(DataVersion.DOMAIN_BOOKING, DataVersion.DOMAIN_BOOKING_TYPE)
     def get(self, request):
-        bookings = Booking.objects.all().order_by("-id")
+        bookings = Booking.objects.select_related("booking_type").order_by("-id")
         serializer = BookingFetchSerializer(bookings, many=True)
         return Response({"data": serializer.data}, status=200)
 
@@ -712,6 +936,11 @@ class WebsiteBookingListAPIView(APIView):
 #-----------------------
 #Ledger Entry signal handlers
 #-----------------------
+def _parse_date_param(request, name):
+    value = request.query_params.get(name)
+    return date_cls.fromisoformat(value) if value else None
+
+
 #Daybook: list entries for a date
 class DaybookAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]  # change as needed
@@ -720,85 +949,172 @@ class DaybookAPIView(APIView):
         date = request.query_params.get("date")
         if not date:
             return Response({"error": "date query param required, format YYYY-MM-DD"}, status=400)
-        entries = LedgerEntry.objects.filter(date=date).order_by("id")
+        try:
+            day = date_cls.fromisoformat(date)
+        except ValueError:
+            return Response({"error": "date query param required, format YYYY-MM-DD"}, status=400)
+
+        entries = LedgerEntry.objects.filter(date=day).order_by("id")
+
+        # Optional: one account with its opening/closing position from snapshots
+        account = request.query_params.get("account")
+        if not account:
+            serializer = LedgerEntrySerializer(entries, many=True)
+            return Response({"data":serializer.data})
+
+        entries = entries.filter(source_type=account)
+        opening_balance = LedgerService.opening_balance(account, day)
+        closing_balance = LedgerService.closing_balance(account, day)
+
         serializer = LedgerEntrySerializer(entries, many=True)
-        return Response({"data":serializer.data})
+        return Response({
+            "data": serializer.data,
+            "account": account,
+            "opening_balance": str(opening_balance),
+            "closing_balance": str(closing_balance),
+        })
 
 
 class LedgerAPIView(APIView):
+    """
+    Account ledger with a running balance (credit - debit) computed in the
+    database by a window function over (date, id).
+
+    Keyset pagination: pass back `next_cursor` as ?cursor= to get the next
+    page. The cursor carries the last (date, id) and the balance at that row,
+    so every page is a single indexed range scan regardless of its position.
+    With ?start_date= the first page opens from the account's closing
+    snapshot before that date.
+    """
+    CURSOR_SALT = "ledger-entries"
+
     def get(self, request):
         account = request.query_params.get("account")
+        if not account:
+            return Response({"error": "account query param required"}, status=400)
 
-        queryset = LedgerEntry.objects.filter(source_type=account).order_by("date", "id")
+        try:
+            start_date = _parse_date_param(request, "start_date")
+            end_date = _parse_date_param(request, "end_date")
+        except ValueError:
+            return Response({"error": "start_date/end_date must be YYYY-MM-DD"}, status=400)
 
-        results = []
-        running_balance = 0
-
-        for entry in queryset:
-            debit = float(entry.debit or 0)
-            credit = float(entry.credit or 0)
-
-            # Correct accounting logic:
-            # Charges & pending = debit  (+)
-            # Payments = credit          (-)
-            running_balance += (credit - debit)
-
-            results.append({
-                "id": entry.id,
-                "date": entry.date,
-                "description": entry.description,
-                "debit": debit,
-                "credit": credit,
-                "running_balance": running_balance
-            })
+        page_size = get_page_size(request)
+        opening_balance = Decimal("0.00")
+
+        queryset = LedgerEntry.objects.filter(source_type=account)
 
-        return Response({"results": results})
+        if start_date:
+            # Begin from the closing snapshot before the range instead of full history
+            queryset = queryset.filter(date__gte=start_date)
+            opening_balance = LedgerService.opening_balance(account, start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            try:
+                position = decode_cursor(cursor, self.CURSOR_SALT)
+                last_date = date_cls.fromisoformat(position["date"])
+                last_id = int(position["id"])
+                opening_balance = Decimal(position["balance"])
+            except (InvalidCursor, KeyError, TypeError, ValueError, ArithmeticError):
+                return Response({"error": "Invalid cursor"}, status=400)
+
+            queryset = queryset.filter(date__gte=last_date).filter(
+                Q(date__gt=last_date) | Q(date=last_date, id__gt=last_id)
+            )
+
+        # Correct accounting logic:
+        # Charges & pending = debit  (+)
+        # Payments = credit          (-)
+        movement = ExpressionWrapper(
+            F("credit") - F("debit"),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+        entries = list(
+            queryset
+            .annotate(
+                running_balance=Window(
+                    expression=Sum(movement),
+                    order_by=[F("date").asc(), F("id").asc()],
+                    frame=RowRange(start=None, end=0),
+                )
+            )
+            .order_by("date", "id")[:page_size + 1]
+        )
+
+        has_more = len(entries) > page_size
+        entries = entries[:page_size]
+
+        for entry in entries:
+            entry.running_balance = opening_balance + (entry.running_balance or Decimal("0.00"))
+
+        next_cursor = None
+        if has_more:
+            last = entries[-1]
+            next_cursor = encode_cursor({
+                "date": last.date.isoformat(),
+                "id": last.id,
+                "balance": str(last.running_balance),
+            }, self.CURSOR_SALT)
+
+        return Response({
+            "account": account,
+            "opening_balance": str(opening_balance),
+            "results": LedgerRunningBalanceSerializer(entries, many=True).data,
+            "next_cursor": next_cursor,
+        })
 
 
 
-# Backfill endpoint: generates ledger entries for all existing income/expense/booking rows.
-# Be careful: run once and remove or protect it in production.
+# Backfill endpoint: rebuilds the ledger from every income/expense/booking row.
+# Runs as a background LedgerRebuildJob; poll with GET ?job_id=<id>.
 class BackfillLedgerAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
+    def get(self, request):
+        job_id = request.query_params.get("job_id")
+        jobs = LedgerRebuildJob.objects.all()
+        job = jobs.filter(pk=job_id).first() if job_id else jobs.first()
+        if not job:
+            return Response({"error": "Rebuild job not found"}, status=404)
+        return Response(LedgerRebuildJobSerializer(job).data)
+
     def post(self, request):
         """
-        Recreate ledger entries for all existing objects by triggering the save handlers.
-        WARNING: This deletes existing ledger entries and re-writes them. Use with care.
+        Start a ledger rebuild (or resume the latest unfinished one with
+        {"resume": true}). Existing ledger entries are replaced.
         """
-        from .signals import _delete_existing_entries  # reuse helper if exposed
-        count = 0
-        with transaction.atomic():
-            # clear all ledger rows first
-            LedgerEntry.objects.all().delete()
-
-            # Recreate by iterating all sources and saving them (triggers post_save)
-            for model in [SalesIncome, OtherIncome, Booking]:
-                for obj in model.objects.all():
-                    obj.save()
-                    count += 1
-
-            # Expenses: iterate over all BaseExpense subclasses
-            # If models are in same file and imported in signals, saving them will trigger signal handlers
-            # You can import them explicitly if needed.
-            # Example:
-            from .models import (
-                LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
-                RentalExpense, SalaryExpense, MiscellaneousExpense,
-                MaintenanceExpense, CapitalExpense, OtherExpense,
-            )
+        if request.data.get("resume"):
+            job = LedgerRebuilder.resumable()
+            if not job:
+                running = LedgerRebuildJob.objects.filter(status=LedgerRebuildJob.STATUS_RUNNING).first()
+                if running:
+                    return self._already_running(running)
+                return Response({"error": "No unfinished rebuild to resume"}, status=404)
+        else:
+            try:
+                chunk_size = int(request.data.get("chunk_size", 1000))
+            except (TypeError, ValueError):
+                return Response({"error": "chunk_size must be an integer"}, status=400)
+            job = LedgerRebuildJob(chunk_size=max(1, min(chunk_size, 10000)))
 
-            expense_models = [
-                LaundryExpense, CleaningExpense, MessExpense, CafeteriaExpense,
-                RentalExpense, SalaryExpense, MiscellaneousExpense, MaintenanceExpense,
-                CapitalExpense, OtherExpense
-            ]
-            for model in expense_models:
-                for obj in model.objects.all():
-                    obj.save()
-                    count += 1
+        try:
+            job = LedgerRebuilder.claim(job)
+        except RebuildInProgress as e:
+            return self._already_running(e.job)
+        except LedgerArchived as e:
+            return Response({"error": str(e)}, status=409)
 
-        return Response({"status": "ok", "processed_objects": count})
+        run_rebuild_async(job)
+        return Response({"status": "started", "job": LedgerRebuildJobSerializer(job).data}, status=202)
+
+    def _already_running(self, job):
+        return Response({
+            "error": "A ledger rebuild is already running",
+            "job": LedgerRebuildJobSerializer(job).data if job else None,
+        }, status=409)
 
 
 
@@ -807,87 +1123,203 @@ class BackfillLedgerAPIView(APIView):
 # -----------------------
 # UNIFIED INCOME API
 # -----------------------
+# (type label, model, date field, amount field, ReportService source) in the
+# order rows of one day are listed
+INCOME_LIST_SOURCES = [
+    ("Booking", Booking, "booking_date", "booking_price", "booking"),
+    ("Sales Income", SalesIncome, "date", "amount", "salesincome"),
+    ("Other Income", OtherIncome, "date", "amount", "otherincome"),
+]
+
+
 class UnifiedIncomeListAPIView(APIView):
+    """
+    Bookings, sales and other incomes in one list, newest first, as a single
+    UNION ALL ordered and paged in the database.
+
+    Query Parameters:
+    - type: "Booking", "Sales Income", "Other Income", comma separated
+    - start_date, end_date: YYYY-MM-DD
+    - category: sales/other income category (case and spacing ignored); leaves bookings out
+    - page_size, cursor: keyset pagination, pass back `next_cursor`
+
+    total_income and count cover every row matching the filters, not just
+    the page.
+    """
     permission_classes = [AllowAny]
-    
+    CURSOR_SALT = "unified-income-list"
+
+    @conditional_get(DataVersion.DOMAIN_BOOKING, DataVersion.DOMAIN_INCOME, DataVersion.DOMAIN_BOOKING_TYPE)
     def get(self, request):
-        all_income = []
+        params = request.query_params
 
-        # 1. Booking Income
-        bookings = Booking.objects.all()
-        for booking in bookings:
+        # Each source's position in INCOME_LIST_SOURCES is its rank in the ordering
+        ranks = list(range(len(INCOME_LIST_SOURCES)))
+        if params.get("type"):
+            types = {value.strip() for value in params["type"].split(",")}
+            unknown = types - {source[0] for source in INCOME_LIST_SOURCES}
+            if unknown:
+                return Response({"error": f"Invalid type: {', '.join(sorted(unknown))}"}, status=400)
+            ranks = [rank for rank in ranks if INCOME_LIST_SOURCES[rank][0] in types]
 
-            # Convert booking_type ID → Name
+        category = params.get("category", "").strip()
+        if category:
+            ranks = [rank for rank in ranks if INCOME_LIST_SOURCES[rank][1] is not Booking]
+
+        try:
+            start_date = _parse_date_param(request, "start_date")
+            end_date = _parse_date_param(request, "end_date")
+        except ValueError:
+            return Response({"error": "start_date/end_date must be YYYY-MM-DD"}, status=400)
+
+        position = None
+        if params.get("cursor"):
             try:
-                booking_type_name = BookingTypeMaster.objects.get(
-                    id=int(booking.booking_type)
-                ).name
-            except:
-                booking_type_name = booking.booking_type  # fallback (text)
-
-            all_income.append({
-                "id": booking.id,
-                "type": "Booking",
-                "date": booking.booking_date,
-                "amount": booking.booking_price,
-                "description": (
-                    f"Guest: {booking.guest_name}, "
-                    f"Room: {booking.room_no}, "
-                    f"Type: {booking_type_name}"
-                ),
-                "details": {
-                    "guest_name": booking.guest_name,
-                    "room_no": booking.room_no,
-                    "phone_number": booking.phone_number,
-                    "booking_type": booking_type_name,
-                    "checkin_date": booking.checkin_date,
-                    "checkout_date": booking.checkout_date,
-                    "paid_amount": booking.paid_amount,
-                    "pending_amount": booking.pending_amount
-                }
-            })
-        
-        # 2. Sales Income
-        sales = SalesIncome.objects.all()
-        for sale in sales:
-            all_income.append({
-                "id": sale.id,
-                "type": "Sales Income",
-                "date": sale.date,
-                "amount": sale.amount,
-                "description": sale.description,
-                "details": {
-                    "category": sale.category
-                }
-            })
-        
-        # 3. Other Income
-        other_incomes = OtherIncome.objects.all()
-        for income in other_incomes:
-            all_income.append({
-                "id": income.id,
-                "type": "Other Income",
-                "date": income.date,
-                "amount": income.amount,
-                "description": income.description,
-                "details": {
-                    "category": income.category
-                }
-            })
-        
-        # Sort by date (most recent first)
-        all_income = sorted(all_income, key=lambda x: x["date"], reverse=True)
-        
-        # Calculate total income
-        total_income = sum(float(item["amount"]) for item in all_income)
-        
+                position = decode_cursor(params["cursor"], self.CURSOR_SALT)
+                position = (date_cls.fromisoformat(position["date"]), int(position["rank"]), int(position["id"]))
+            except (InvalidCursor, KeyError, TypeError, ValueError):
+                return Response({"error": "Invalid cursor"}, status=400)
+
+        page_size = get_page_size(request)
+        rows, total, count = [], Decimal("0.00"), 0
+
+        if ranks:
+            branches = []
+            for rank in ranks:
+                _label, model, date_field, amount_field, _source = INCOME_LIST_SOURCES[rank]
+                queryset = self._filtered(model, date_field, start_date, end_date, category)
+                if position:
+                    queryset = queryset.filter(self._after(position, rank, date_field))
+                branches.append(
+                    queryset
+                    .annotate(rank=Value(rank), row_date=F(date_field), row_amount=F(amount_field))
+                    .values_list("row_date", "rank", "id", "row_amount")
+                    .order_by()
+                )
+            first, *rest = branches
+            union = first.union(*rest, all=True) if rest else first
+            rows = list(union.order_by("-row_date", "rank", "-id")[:page_size + 1])
+            total, count = self._totals(ranks, start_date, end_date, category)
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_cursor = None
+        if has_more:
+            last_date, last_rank, last_id, _amount = rows[-1]
+            next_cursor = encode_cursor(
+                {"date": last_date.isoformat(), "rank": last_rank, "id": last_id}, self.CURSOR_SALT
+            )
+
         return Response({
-            "data": all_income,
-            "total_income": total_income,
-            "count": len(all_income)
+            "data": self._describe(rows),
+            "total_income": total,
+            "count": count,
+            "next_cursor": next_cursor,
         }, status=200)
-    
 
+    @staticmethod
+    def _filtered(model, date_field, start_date, end_date, category):
+        queryset = model.objects.all()
+        if start_date:
+            queryset = queryset.filter(**{f"{date_field}__gte": start_date})
+        if end_date:
+            queryset = queryset.filter(**{f"{date_field}__lte": end_date})
+        if category:
+            # Resolved inside the query so the (category, date) index applies
+            queryset = queryset.filter(
+                category__in=IncomeCategory.objects.filter(key=IncomeCategory.normalize(category)).values("id")
+            )
+        return queryset
+
+    @staticmethod
+    def _after(position, rank, date_field):
+        """Rows of a branch listed after `position` in (-date, rank, -id) order."""
+        last_date, last_rank, last_id = position
+        if rank > last_rank:
+            return Q(**{f"{date_field}__lte": last_date})
+        if rank < last_rank:
+            return Q(**{f"{date_field}__lt": last_date})
+        return Q(**{f"{date_field}__lt": last_date}) | Q(**{date_field: last_date, "id__lt": last_id})
+
+    @staticmethod
+    def _totals(ranks, start_date, end_date, category):
+        """
+        Exact (sum, count) of the filtered rows: each branch of the list's
+        union aggregated in SQL, in one UNION ALL query.
+        """
+        branches = []
+        for rank in ranks:
+            _label, model, date_field, amount_field, _source = INCOME_LIST_SOURCES[rank]
+            # Grouped by a constant only, so each branch is one aggregate row
+            branches.append(
+                UnifiedIncomeListAPIView._filtered(model, date_field, start_date, end_date, category)
+                .annotate(branch=Value(rank))
+                .values("branch")
+                .annotate(branch_total=Sum(amount_field), branch_count=Count("id"))
+                .values_list("branch_total", "branch_count")
+                .order_by()
+            )
+        first, *rest = branches
+        union = first.union(*rest, all=True) if rest else first
+
+        total, count = Decimal("0.00"), 0
+        for branch_total, branch_count in union:
+            total += branch_total or Decimal("0.00")
+            count += branch_count
+        return total, count
+
+    @staticmethod
+    def _describe(rows):
+        """Page rows as the list entries, reading each source's page rows in one query."""
+        ids = defaultdict(list)
+        for _date, rank, row_id, _amount in rows:
+            ids[rank].append(row_id)
+        objects = {}
+        for rank, row_ids in ids.items():
+            model = INCOME_LIST_SOURCES[rank][1]
+            related = "booking_type" if model is Booking else "category"
+            objects[rank] = model.objects.select_related(related).in_bulk(row_ids)
+
+        data = []
+        for row_date, rank, row_id, amount in rows:
+            obj = objects[rank][row_id]
+            label = INCOME_LIST_SOURCES[rank][0]
+            if rank == 0:
+                booking_type_name = obj.booking_type_name
+                data.append({
+                    "id": obj.id,
+                    "type": label,
+                    "date": row_date,
+                    "amount": amount,
+                    "description": (
+                        f"Guest: {obj.guest_name}, "
+                        f"Room: {obj.room_no}, "
+                        f"Type: {booking_type_name}"
+                    ),
+                    "details": {
+                        "guest_name": obj.guest_name,
+                        "room_no": obj.room_no,
+                        "phone_number": obj.phone_number,
+                        "booking_type": booking_type_name,
+                        "checkin_date": obj.checkin_date,
+                        "checkout_date": obj.checkout_date,
+                        "paid_amount": obj.paid_amount,
+                        "pending_amount": obj.pending_amount,
+                    },
+                })
+            else:
+                data.append({
+                    "id": obj.id,
+                    "type": label,
+                    "date": row_date,
+                    "amount": amount,
+                    "description": obj.description,
+                    "details": {
+                        "category": obj.category.name,
+                    },
+                })
+        return data
 
 
 # ------------------------------------
@@ -919,6 +1351,7 @@ class CreateCafeteriaExpenseAPIView(APIView):
 class CafeteriaExpenseListAPIView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get(DataVersion.DOMAIN_EXPENSE)
     def get(self, request):
         expenses = CafeteriaExpense.objects.all().order_by("-id")
         serializer = CafeteriaExpenseSerializer(expenses, many=True)
@@ -960,6 +1393,7 @@ class CreateSalaryExpenseAPIView(APIView):
 class SalaryExpenseListAPIView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get(DataVersion.DOMAIN_EXPENSE)
     def get(self, request):
         expenses = SalaryExpense.objects.all().order_by("-id")
 
@@ -1014,30 +1448,68 @@ class UpdateSalaryExpenseAPIView(APIView):
 
 
 class MonthlyLedgerSummaryAPIView(APIView):
+    """
+    Ledger credit/debit totals read from LedgerDailyRollup.
+
+    Query params:
+    - account: source_type filter
+    - year / start_date / end_date: restrict the dates (indexed range on rollup.date)
+    - group_by: 'month' (default), 'year' or 'range' (one total for the whole window)
+    """
     def get(self, request):
         account = request.query_params.get("account")
         year = request.query_params.get("year")
+        group_by = request.query_params.get("group_by", "month")
+
+        if group_by not in ("month", "year", "range"):
+            return Response({"error": "group_by must be month, year or range"}, status=400)
+
+        try:
+            start_date = _parse_date_param(request, "start_date")
+            end_date = _parse_date_param(request, "end_date")
+        except ValueError:
+            return Response({"error": "start_date/end_date must be YYYY-MM-DD"}, status=400)
 
-        queryset = LedgerEntry.objects.all()
+        queryset = LedgerDailyRollup.objects.all()
 
         if account:
             queryset = queryset.filter(source_type=account)
 
         if year:
-            queryset = queryset.filter(date__year=int(year))
+            try:
+                year_start, year_end = date_cls(int(year), 1, 1), date_cls(int(year), 12, 31)
+            except ValueError:
+                return Response({"error": "year must be a four digit year"}, status=400)
+            queryset = queryset.filter(date__gte=year_start, date__lte=year_end)
+
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+
+        if group_by == "range":
+            totals = queryset.aggregate(total_credit=Sum("credit"), total_debit=Sum("debit"))
+            return Response({
+                "account": account,
+                "start_date": start_date,
+                "end_date": end_date,
+                "credit": float(totals["total_credit"] or 0),
+                "debit": float(totals["total_debit"] or 0),
+            })
+
+        group_fields = {"year": ExtractYear("date")}
+        if group_by == "month":
+            group_fields["month"] = ExtractMonth("date")
 
         summary = (
             queryset
-            .annotate(
-                year=ExtractYear("date"),
-                month=ExtractMonth("date")
-            )
-            .values("year", "month")
+            .annotate(**group_fields)
+            .values(*group_fields)
             .annotate(
                 total_credit=Sum("credit"),
                 total_debit=Sum("debit")
             )
-            .order_by("year", "month")
+            .order_by(*group_fields)
         )
 
         month_names = {
@@ -1048,14 +1520,14 @@ class MonthlyLedgerSummaryAPIView(APIView):
 
         results = []
         for row in summary:
-            results.append({
-                "year": row["year"],
-                "month": month_names[row["month"]],
-                "credit": float(row["total_credit"] or 0),
-                "debit": float(row["total_debit"] or 0),
-            })
+            result = {"year": row["year"]}
+            if group_by == "month":
+                result["month"] = month_names[row["month"]]
+            result["credit"] = float(row["total_credit"] or 0)
+            result["debit"] = float(row["total_debit"] or 0)
+            results.append(result)
 
         return Response({
             "account": account,
             "results": results
-        })
\ No newline at end of file
+        })